@@ -34,6 +34,9 @@ class ProjectDirs:
     :ivar overlay_work_dir: The work directory for the overlay filesystem.
     :ivar stage_dir: The staging area containing installed files from all parts.
     :ivar prime_dir: The primed tree containing the final artifacts to deploy.
+    :ivar trash_dir: The directory containing work directories pending removal.
+    :ivar log_dir: The directory containing the output logs of each part.
+    :ivar profile_dir: The directory containing profiling data.
     """
 
     def __init__(self, *, work_dir: Union[Path, str] = "."):
@@ -46,3 +49,6 @@ class ProjectDirs:
         self.overlay_work_dir = self.overlay_dir / "work"
         self.stage_dir = self.work_dir / "stage"
         self.prime_dir = self.work_dir / "prime"
+        self.trash_dir = self.work_dir / ".trash"
+        self.log_dir = self.work_dir / ".logs"
+        self.profile_dir = self.work_dir / ".profile"
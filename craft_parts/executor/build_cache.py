@@ -0,0 +1,237 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2022 Canonical Ltd.
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License version 3 as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Compiler and package caches kept across builds."""
+
+import contextlib
+import json
+import logging
+import os
+import shutil
+import stat
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Minimum time between scans of a cache, in seconds.
+_SCAN_INTERVAL = 60.0
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Usage statistics of a build cache after a build.
+
+    The entries are the files in the cache directory. Whether the build tools
+    actually read an entry is not known, so these are not cache hits.
+
+    :param name: The name of the cache.
+    :param reused: The number of entries kept from the previous scan.
+    :param added: The number of entries added since the previous scan.
+    :param size: The total size of the cache after the build, in bytes.
+    """
+
+    name: str
+    reused: int
+    added: int
+    size: int
+
+
+class BuildCache:
+    """Compiler and package caches shared by the builds of a project.
+
+    Plugins name the caches used by their build tools, and each cache is
+    a directory under the application cache directory exposed to the build
+    commands through an environment variable. Caches are evicted as a whole,
+    least recently used first, when their total size exceeds the limit, so
+    that build tools never find partially removed cache contents.
+
+    :param cache_dir: The application cache directory.
+    :param max_size: The maximum total size of the caches, in bytes. If not
+        specified, caches are never evicted.
+    """
+
+    def __init__(self, cache_dir: Path, *, max_size: Optional[int] = None):
+        self._cache_dir = cache_dir / "build-cache"
+        self._index_path = self._cache_dir / "index.json"
+        self._max_size = max_size
+
+    def get_environment(self, caches: Dict[str, str]) -> Dict[str, str]:
+        """Obtain the environment variables pointing to the given caches.
+
+        :param caches: A dictionary mapping environment variables to cache names.
+
+        :return: A dictionary mapping environment variables to cache directories.
+        """
+        return {var: str(self._cache_dir / name) for var, name in caches.items()}
+
+    @contextlib.contextmanager
+    def track(self, names: Iterable[str]) -> Iterator[List[CacheStats]]:
+        """Collect usage statistics and evict caches around a build.
+
+        Walking a large cache is expensive, so a cache is scanned at most
+        once every ``_SCAN_INTERVAL`` seconds. Reused and added entries are
+        counted from the entries found by the previous scan, and the size
+        recorded by the previous scan is used for eviction in between.
+
+        :param names: The names of the caches used by the build.
+
+        :return: A context manager returning a list filled with the usage
+            statistics of each scanned cache when the context exits.
+        """
+        names = sorted(set(names))
+        if not names:
+            yield []
+            return
+
+        for name in names:
+            (self._cache_dir / name).mkdir(parents=True, exist_ok=True)
+
+        stats: List[CacheStats] = []
+        try:
+            yield stats
+        finally:
+            # Scan outside the index lock, other builds may be waiting for it.
+            index = self._load_index()
+            now = time.time()
+            scans = {
+                name: _scan(self._cache_dir / name)
+                for name in names
+                if now - index.get(name, {}).get("scanned", 0.0) >= _SCAN_INTERVAL
+            }
+
+            with self._index_lock():
+                index = self._load_index()
+
+                for name in names:
+                    entry = index.setdefault(name, {})
+                    entry["last-used"] = now
+                    if name not in scans:
+                        continue
+
+                    count, size = scans[name]
+                    added = max(count - int(entry.get("entries", 0)), 0)
+                    cache_stats = CacheStats(
+                        name=name, reused=count - added, added=added, size=size
+                    )
+                    logger.info(
+                        "build cache %s: %d entries reused, %d added, %d bytes",
+                        name,
+                        cache_stats.reused,
+                        cache_stats.added,
+                        cache_stats.size,
+                    )
+                    entry.update({"scanned": now, "entries": count, "size": size})
+                    stats.append(cache_stats)
+
+                self._evict(index, keep=names)
+                self._write_index(index)
+
+    def _evict(self, index: Dict[str, Dict[str, float]], *, keep: List[str]) -> None:
+        """Remove least recently used caches until the size limit is respected."""
+        if self._max_size is None:
+            return
+
+        total = sum(entry["size"] for entry in index.values())
+        candidates = sorted((entry["last-used"], name) for name, entry in index.items())
+
+        for _, name in candidates:
+            if total <= self._max_size:
+                break
+            if name in keep:
+                continue
+
+            logger.debug("evict build cache %s", name)
+            _remove_tree(self._cache_dir / name)
+            total -= index.pop(name)["size"]
+
+        if total > self._max_size:
+            logger.warning(
+                "Build caches %s exceed the cache size limit.", ", ".join(keep)
+            )
+
+    def _load_index(self) -> Dict[str, Dict[str, float]]:
+        try:
+            return json.loads(self._index_path.read_text())
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as err:
+            logger.debug("ignoring build cache index %s: %s", self._index_path, err)
+            return {}
+
+    def _write_index(self, index: Dict[str, Dict[str, float]]) -> None:
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self._cache_dir, prefix="index.", suffix=".tmp", delete=False
+        ) as tmp_file:
+            json.dump(index, tmp_file)
+
+        try:
+            os.replace(tmp_file.name, self._index_path)
+        except OSError:
+            os.unlink(tmp_file.name)
+            raise
+
+    @contextlib.contextmanager
+    def _index_lock(self) -> Iterator[None]:
+        """Serialize index updates between builds sharing the cache directory."""
+        import fcntl  # pylint: disable=import-outside-toplevel
+
+        with open(self._cache_dir / "index.lock", "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            yield
+
+
+def _scan(path: Path) -> Tuple[int, int]:
+    """Count the files in a cache and compute their total size.
+
+    :param path: The cache directory.
+
+    :return: A tuple containing the number of files in the cache and their
+        total size in bytes.
+    """
+    count = 0
+    size = 0
+    pending = [str(path)]
+    while pending:
+        with contextlib.suppress(FileNotFoundError), os.scandir(pending.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                    continue
+                count += 1
+                with contextlib.suppress(FileNotFoundError):
+                    size += entry.stat(follow_symlinks=False).st_size
+    return count, size
+
+
+def _remove_tree(path: Path) -> None:
+    """Remove a cache, including read-only directories (e.g. the Go module cache)."""
+
+    def _onerror(func, name, _excinfo):
+        if not os.path.lexists(name):
+            return
+        parent = os.path.dirname(name)
+        os.chmod(parent, os.stat(parent).st_mode | stat.S_IWUSR | stat.S_IXUSR)
+        if os.path.isdir(name) and not os.path.islink(name):
+            os.chmod(name, os.stat(name).st_mode | stat.S_IRWXU)
+            shutil.rmtree(name, onerror=_onerror)
+        else:
+            func(name)
+
+    shutil.rmtree(path, onerror=_onerror)
@@ -20,11 +20,15 @@ import filecmp
 import os
 from typing import Any, Dict, List, Optional
 
-from craft_parts import errors, permissions
+from craft_parts import errors
 from craft_parts.executor import filesets
 from craft_parts.executor.filesets import Fileset
 from craft_parts.parts import Part
-from craft_parts.permissions import Permissions, permissions_are_compatible
+from craft_parts.permissions import (
+    Permissions,
+    PermissionsTable,
+    permissions_are_compatible,
+)
 
 
 def check_for_stage_collisions(part_list: List[Part]) -> None:
@@ -46,6 +50,7 @@ def check_for_stage_collisions(part_list: List[Part]) -> None:
             stage_fileset, srcdir
         )
         part_contents = part_files | part_directories
+        permissions_table = PermissionsTable(part.spec.permissions)
 
         # Scan previous parts for collisions.
         for other_part_name, other_part_files in all_parts_files.items():
@@ -57,13 +62,8 @@ def check_for_stage_collisions(part_list: List[Part]) -> None:
                 this = os.path.join(part.part_install_dir, file)
                 other = os.path.join(other_part_files["installdir"], file)
 
-                permissions_this = permissions.filter_permissions(
-                    file, part.spec.permissions
-                )
-
-                permissions_other = permissions.filter_permissions(
-                    file, other_part_files["part"].spec.permissions
-                )
+                permissions_this = permissions_table.filter(file)
+                permissions_other = other_part_files["permissions"].filter(file)
 
                 if paths_collide(this, other, permissions_this, permissions_other):
                     conflict_files.append(file)
@@ -80,6 +80,7 @@ def check_for_stage_collisions(part_list: List[Part]) -> None:
             "files": part_contents,
             "installdir": part.part_install_dir,
             "part": part,
+            "permissions": permissions_table,
         }
 
 
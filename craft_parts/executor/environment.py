@@ -18,7 +18,8 @@
 
 import io
 import logging
-from typing import Any, Dict, Iterable, List, Optional, Union, cast
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union, cast
 
 from craft_parts.infos import ProjectInfo, StepInfo
 from craft_parts.parts import Part
@@ -26,22 +27,32 @@ from craft_parts.plugins import Plugin
 from craft_parts.steps import Step
 from craft_parts.utils import os_utils
 
+from .build_cache import BuildCache
+
 logger = logging.getLogger(__name__)
 
 
 def generate_step_environment(
-    *, part: Part, plugin: Plugin, step_info: StepInfo
+    *,
+    part: Part,
+    plugin: Plugin,
+    step_info: StepInfo,
+    cache: Optional["EnvironmentCache"] = None,
 ) -> str:
     """Generate an environment to use during step execution.
 
     :param part: The part being processed.
     :param plugin: The plugin used to build this part.
     :param step_info: Information about the step to be executed.
+    :param cache: The cache of built-in part environments, if any.
 
     :return: The environment to use when executing the step.
     """
     # Craft parts' say.
-    parts_environment = _basic_environment_for_part(part=part, step_info=step_info)
+    if cache:
+        parts_environment = cache.get_part_environment(part, step_info=step_info)
+    else:
+        parts_environment = _basic_environment_for_part(part, step_info=step_info)
 
     # Plugin's say.
     if step_info.step == Step.BUILD:
@@ -49,6 +60,15 @@ def generate_step_environment(
     else:
         plugin_environment = {}
 
+    # Managed build caches, if enabled.
+    if step_info.step == Step.BUILD and step_info.build_caches:
+        build_cache = BuildCache(
+            step_info.cache_dir, max_size=step_info.build_cache_size
+        )
+        cache_environment = build_cache.get_environment(plugin.get_build_caches())
+    else:
+        cache_environment = {}
+
     # Part's (user) say.
     user_environment = part.spec.build_environment or []
 
@@ -66,6 +86,11 @@ def generate_step_environment(
         for key, val in parts_environment.items():
             print(f'export {key}="{val}"', file=run_environment)
 
+        if cache_environment:
+            print("## Build cache environment", file=run_environment)
+            for key, val in cache_environment.items():
+                print(f'export {key}="{val}"', file=run_environment)
+
         print("## Plugin environment", file=run_environment)
         for key, val in plugin_environment.items():
             print(f'export {key}="{val}"', file=run_environment)
@@ -79,20 +104,35 @@ def generate_step_environment(
         return run_environment.getvalue()
 
 
-def _basic_environment_for_part(part: Part, *, step_info: StepInfo) -> Dict[str, str]:
+def _basic_environment_for_part(
+    part: Part, *, step_info: StepInfo, cache: Optional["EnvironmentCache"] = None
+) -> Dict[str, str]:
     """Return the built-in part environment.
 
     :param part: The part to get environment information from.
     :param step_info: Information for this step.
+    :param cache: The cache of paths found in the part trees, if any.
 
     :return: A dictionary containing the built-in environment.
     """
     part_environment = _get_step_environment(step_info)
-    paths = [part.part_install_dir, part.stage_dir]
 
-    bin_paths = []
-    for path in paths:
-        bin_paths.extend(os_utils.get_bin_paths(root=path, existing_only=True))
+    bin_paths: List[str] = []
+    include_paths: List[str] = []
+    library_paths: List[str] = []
+    pkg_config_paths: List[str] = []
+
+    for path in [part.part_install_dir, part.stage_dir]:
+        if cache:
+            env_paths = cache.get_paths(path, arch_triplet=step_info.arch_triplet)
+        else:
+            env_paths = _get_environment_paths(
+                path, arch_triplet=step_info.arch_triplet
+            )
+        bin_paths.extend(env_paths.bin_paths)
+        include_paths.extend(env_paths.include_paths)
+        library_paths.extend(env_paths.library_paths)
+        pkg_config_paths.extend(env_paths.pkg_config_paths)
 
     if bin_paths:
         bin_paths.append("$PATH")
@@ -100,37 +140,17 @@ def _basic_environment_for_part(part: Part, *, step_info: StepInfo) -> Dict[str,
             paths=bin_paths, prepend="", separator=":"
         )
 
-    include_paths = []
-    for path in paths:
-        include_paths.extend(
-            os_utils.get_include_paths(root=path, arch_triplet=step_info.arch_triplet)
-        )
-
     if include_paths:
         for envvar in ["CPPFLAGS", "CFLAGS", "CXXFLAGS"]:
             part_environment[envvar] = _combine_paths(
                 paths=include_paths, prepend="-isystem ", separator=" "
             )
 
-    library_paths = []
-    for path in paths:
-        library_paths.extend(
-            os_utils.get_library_paths(root=path, arch_triplet=step_info.arch_triplet)
-        )
-
     if library_paths:
         part_environment["LDFLAGS"] = _combine_paths(
             paths=library_paths, prepend="-L", separator=" "
         )
 
-    pkg_config_paths = []
-    for path in paths:
-        pkg_config_paths.extend(
-            os_utils.get_pkg_config_paths(
-                root=path, arch_triplet=step_info.arch_triplet
-            )
-        )
-
     if pkg_config_paths:
         part_environment["PKG_CONFIG_PATH"] = _combine_paths(
             pkg_config_paths, prepend="", separator=":"
@@ -139,6 +159,117 @@ def _basic_environment_for_part(part: Part, *, step_info: StepInfo) -> Dict[str,
     return part_environment
 
 
+class _EnvironmentPaths(NamedTuple):
+    """Existing executable, include, library and pkg-config paths in a tree."""
+
+    bin_paths: List[str]
+    include_paths: List[str]
+    library_paths: List[str]
+    pkg_config_paths: List[str]
+
+
+def _get_environment_paths(root: Path, *, arch_triplet: str) -> _EnvironmentPaths:
+    """Find the paths to add to the environment for the given tree.
+
+    :param root: The root of the tree containing the paths.
+    :param arch_triplet: The machine-vendor-os platform triplet definition.
+
+    :return: The existing paths in the tree.
+    """
+    candidates = _EnvironmentPaths(
+        bin_paths=os_utils.get_bin_paths(root=root, existing_only=False),
+        include_paths=os_utils.get_include_paths(
+            root=root, arch_triplet=arch_triplet, existing_only=False
+        ),
+        library_paths=os_utils.get_library_paths(
+            root=root, arch_triplet=arch_triplet, existing_only=False
+        ),
+        pkg_config_paths=os_utils.get_pkg_config_paths(
+            root=root, arch_triplet=arch_triplet, existing_only=False
+        ),
+    )
+
+    # Find all paths in a single pass over the tree.
+    existing = os_utils.find_existing_paths(
+        (Path(p) for paths in candidates for p in paths), root=root
+    )
+
+    return _EnvironmentPaths(
+        *([p for p in paths if Path(p) in existing] for paths in candidates)
+    )
+
+
+class EnvironmentCache:
+    """Memoize the built-in part environment of each step.
+
+    Paths added to the part environment depend on the contents of the part
+    install directory and of the stage directory. Each tree has a generation
+    number that must be increased with :meth:`invalidate` when the tree
+    contents change, and cached environments are only reused while the
+    generations of both trees are unchanged.
+    """
+
+    def __init__(self) -> None:
+        self._generations: Dict[Path, int] = {}
+        self._paths: Dict[Tuple[Path, str], Tuple[int, _EnvironmentPaths]] = {}
+        self._environments: Dict[
+            Tuple[str, Optional[Step]], Tuple[Tuple[int, int], Dict[str, str]]
+        ] = {}
+
+    def invalidate(self, *trees: Path) -> None:
+        """Mark the contents of the given trees as changed.
+
+        :param trees: The root directories of the changed trees.
+        """
+        for tree in trees:
+            self._generations[tree] = self._generations.get(tree, 0) + 1
+
+    def clear(self) -> None:
+        """Remove all cached paths and environments."""
+        self._paths.clear()
+        self._environments.clear()
+
+    def get_paths(self, root: Path, *, arch_triplet: str) -> _EnvironmentPaths:
+        """Obtain the paths to add to the environment for the given tree.
+
+        :param root: The root of the tree containing the paths.
+        :param arch_triplet: The machine-vendor-os platform triplet definition.
+
+        :return: The existing paths in the tree.
+        """
+        generation = self._generations.get(root, 0)
+        cached = self._paths.get((root, arch_triplet))
+        if cached and cached[0] == generation:
+            return cached[1]
+
+        paths = _get_environment_paths(root, arch_triplet=arch_triplet)
+        self._paths[(root, arch_triplet)] = (generation, paths)
+        return paths
+
+    def get_part_environment(
+        self, part: Part, *, step_info: StepInfo
+    ) -> Dict[str, str]:
+        """Obtain the built-in part environment for a step.
+
+        :param part: The part to get environment information from.
+        :param step_info: Information for this step.
+
+        :return: A dictionary containing the built-in environment.
+        """
+        generations = (
+            self._generations.get(part.part_install_dir, 0),
+            self._generations.get(part.stage_dir, 0),
+        )
+        key = (part.name, step_info.step)
+        cached = self._environments.get(key)
+        if cached and cached[0] == generations:
+            return dict(cached[1])
+
+        environment = _basic_environment_for_part(part, step_info=step_info, cache=self)
+        self._environments[key] = (generations, environment)
+        return dict(environment)
+
+
 def _get_global_environment(info: ProjectInfo) -> Dict[str, str]:
     """Add project and part information variables to the environment.
 
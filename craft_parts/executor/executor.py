@@ -18,22 +18,38 @@
 
 import contextlib
 import logging
+import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Union
-
-from craft_parts import callbacks, overlays, packages, parts, plugins
+from typing import Dict, List, Optional, Tuple, Union
+
+from craft_parts import (
+    callbacks,
+    instrumentation,
+    overlays,
+    packages,
+    parts,
+    plugins,
+)
 from craft_parts.actions import Action, ActionType
-from craft_parts.executor.environment import generate_step_environment
+from craft_parts.executor.environment import (
+    EnvironmentCache,
+    generate_step_environment,
+)
 from craft_parts.infos import PartInfo, ProjectInfo, StepInfo
-from craft_parts.overlays import LayerHash, OverlayManager
+from craft_parts.overlays import LayerHash, LayerHashChain, OverlayManager
 from craft_parts.parts import Part, sort_parts
+from craft_parts.plugins.validator import PluginEnvironmentValidator, ProbeCache
 from craft_parts.steps import Step
 from craft_parts.utils import os_utils
 
 from .collisions import check_for_stage_collisions
+from .log_multiplexer import LogMultiplexer
 from .part_handler import PartHandler
+from .shell_pool import ShellPool
 from .step_handler import Stream
+from .trash import Trash
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +68,12 @@ class Executor:
     :param extra_build_packages: Additional packages to install on the host system.
     :param extra_build_snaps: Additional snaps to install on the host system.
     :param ignore_patterns: File patterns to ignore when pulling local sources.
+    :param fast_clean: Move work directories to the trash when cleaning, and
+        remove them in the background.
+    :param persistent_shells: Run build and validation commands in reusable
+        shells. Idle shells are terminated in the execution epilogue.
+    :param part_logs: Write the output of step commands to a log file for
+        each part, in addition to the output streams.
     """
 
     def __init__(
@@ -64,14 +86,34 @@ class Executor:
         ignore_patterns: Optional[List[str]] = None,
         base_layer_dir: Optional[Path] = None,
         base_layer_hash: Optional[LayerHash] = None,
+        fast_clean: bool = False,
+        persistent_shells: bool = False,
+        part_logs: bool = False,
     ):
         self._part_list = sort_parts(part_list)
         self._project_info = project_info
         self._extra_build_packages = extra_build_packages
         self._extra_build_snaps = extra_build_snaps
         self._base_layer_hash = base_layer_hash
+        self._layer_hash_chain = LayerHashChain(self._part_list, base_layer_hash)
         self._handler: Dict[str, PartHandler] = {}
         self._ignore_patterns = ignore_patterns
+        self._trash: Optional[Trash] = None
+        self._env_cache = EnvironmentCache()
+        self._shell_pool: Optional[ShellPool] = None
+        self._log_multiplexer: Optional[LogMultiplexer] = None
+
+        if fast_clean:
+            self._trash = Trash(
+                project_info.dirs.trash_dir,
+                max_workers=project_info.parallel_build_count,
+            )
+
+        if persistent_shells:
+            self._shell_pool = ShellPool()
+
+        if part_logs:
+            self._log_multiplexer = LogMultiplexer(project_info.dirs.log_dir)
 
         self._overlay_manager = OverlayManager(
             project_info=self._project_info,
@@ -84,26 +126,44 @@ class Executor:
 
         This method is called before executing lifecycle actions.
         """
-        self._install_build_packages()
-        self._install_build_snaps()
+        with instrumentation.span("prologue"):
+            # Trees may have changed since the previous execution.
+            self._env_cache.clear()
+
+            self._install_build_packages()
+            self._install_build_snaps()
 
-        self._verify_plugin_environment()
+            self._verify_plugin_environment()
 
-        # update the overlay environment package list to allow installation of
-        # overlay packages.
-        if any(p.spec.overlay_packages for p in self._part_list):
-            with overlays.PackageCacheMount(self._overlay_manager) as ctx:
-                ctx.refresh_packages_list()
+            try:
+                # update the overlay environment package list to allow installation
+                # of overlay packages.
+                if any(p.spec.overlay_packages for p in self._part_list):
+                    with overlays.PackageCacheMount(self._overlay_manager) as ctx:
+                        ctx.refresh_packages_list()
 
-        callbacks.run_prologue(self._project_info)
+                callbacks.run_prologue(self._project_info)
+            except BaseException:
+                # The epilogue is not called if the prologue fails.
+                self._overlay_manager.close()
+                raise
 
     def epilogue(self) -> None:
         """Finish and clean the execution environment.
 
         This method is called after executing lifecycle actions.
         """
-        self._project_info.execution_finished = True
-        callbacks.run_epilogue(self._project_info)
+        try:
+            self._project_info.execution_finished = True
+            callbacks.run_epilogue(self._project_info)
+
+            if self._shell_pool:
+                self._shell_pool.close()
+
+            if self._log_multiplexer:
+                self._log_multiplexer.close()
+        finally:
+            self._overlay_manager.close()
 
     def execute(
         self,
@@ -150,11 +210,66 @@ class Executor:
         if not part_names:
             # also remove toplevel directories if part names are not specified
             with contextlib.suppress(FileNotFoundError):
-                shutil.rmtree(self._project_info.prime_dir)
+                self._remove_dir(self._project_info.prime_dir)
                 if initial_step <= Step.STAGE:
-                    shutil.rmtree(self._project_info.stage_dir)
+                    self._remove_dir(self._project_info.stage_dir)
                 if initial_step <= Step.PULL:
-                    shutil.rmtree(self._project_info.parts_dir)
+                    self._remove_dir(self._project_info.parts_dir)
+
+    def pending_removals(self) -> List[Path]:
+        """Obtain the trashed work directories not yet removed.
+
+        :return: The list of trash entries waiting to be removed.
+        """
+        if not self._trash:
+            return []
+
+        return self._trash.pending()
+
+    def wait_for_removals(self, timeout: Optional[float] = None) -> bool:
+        """Wait until trashed work directories are removed.
+
+        :param timeout: The maximum time to wait, in seconds. If not specified,
+            wait until all directories are removed.
+
+        :return: Whether all trashed directories were removed.
+        """
+        if not self._trash:
+            return True
+
+        return self._trash.wait(timeout)
+
+    def part_log_path(self, part_name: str) -> Optional[Path]:
+        """Obtain the path to the log file of a part.
+
+        :param part_name: The name of the part.
+
+        :return: The path to the part log file, or None if part logs are
+            not enabled.
+        """
+        if not self._log_multiplexer:
+            return None
+
+        return self._log_multiplexer.log_path(part_name)
+
+    def part_log_tail(self, part_name: str) -> str:
+        """Obtain the most recent output of the step commands of a part.
+
+        :param part_name: The name of the part.
+
+        :return: The most recent output of the part, or an empty string if
+            part logs are not enabled.
+        """
+        if not self._log_multiplexer:
+            return ""
+
+        return self._log_multiplexer.tail(part_name)
+
+    def _remove_dir(self, path: Path) -> None:
+        if self._trash:
+            self._trash.discard(path)
+        else:
+            shutil.rmtree(path)
 
     def _run_action(
         self,
@@ -183,7 +298,8 @@ class Executor:
             return
 
         if action.step == Step.STAGE:
-            check_for_stage_collisions(self._part_list)
+            with instrumentation.span("collision check"):
+                check_for_stage_collisions(self._part_list)
 
         handler = self._create_part_handler(part)
         handler.run_action(action, stdout=stdout, stderr=stderr)
@@ -203,6 +319,11 @@ class Executor:
             overlay_manager=self._overlay_manager,
             ignore_patterns=self._ignore_patterns,
             base_layer_hash=self._base_layer_hash,
+            trash=self._trash,
+            env_cache=self._env_cache,
+            shell_pool=self._shell_pool,
+            log_multiplexer=self._log_multiplexer,
+            layer_hash_chain=self._layer_hash_chain,
         )
         self._handler[part.name] = handler
 
@@ -247,9 +368,10 @@ class Executor:
             packages.snaps.install_snaps(build_snaps)
 
     def _verify_plugin_environment(self) -> None:
-        for part in self._part_list:
-            logger.debug("verify plugin environment for part %r", part.name)
+        probe_cache = ProbeCache()
+        validations: List[Tuple[PluginEnvironmentValidator, Part]] = []
 
+        for part in self._part_list:
             part_info = PartInfo(self._project_info, part)
             plugin_class = plugins.get_plugin_class(part.plugin_name)
             plugin = plugin_class(
@@ -260,29 +382,62 @@ class Executor:
                 part=part,
                 plugin=plugin,
                 step_info=StepInfo(part_info, Step.BUILD),
+                cache=self._env_cache,
             )
             validator = plugin_class.validator_class(
-                part_name=part.name, env=env, properties=part.plugin_properties
+                part_name=part.name,
+                env=env,
+                properties=part.plugin_properties,
+                probe_cache=probe_cache,
+                shell_pool=self._shell_pool,
             )
+            validations.append((validator, part))
+
+        def _validate(validator: PluginEnvironmentValidator, part: Part) -> None:
+            logger.debug("verify plugin environment for part %r", part.name)
             validator.validate_environment(part_dependencies=part.dependencies)
 
+        max_workers = min(len(validations), os.cpu_count() or 1)
+        if max_workers <= 1:
+            for validation in validations:
+                _validate(*validation)
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = [pool.submit(_validate, *v) for v in validations]
+                # Raise the first error in part order.
+                for future in futures:
+                    future.result()
+
 
 class ExecutionContext:
-    """A context manager to handle lifecycle action executions."""
+    """A context manager to handle lifecycle action executions.
+
+    :param executor: The executor to run the actions.
+    :param profiler: The profiler to use while the context is active, if any.
+    """
 
     def __init__(
         self,
         *,
         executor: Executor,
+        profiler: Optional[instrumentation.Profiler] = None,
     ):
         self._executor = executor
+        self._profiler = profiler
+        self._exit_stack = contextlib.ExitStack()
 
     def __enter__(self) -> "ExecutionContext":
-        self._executor.prologue()
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(instrumentation.profiling(self._profiler))
+            self._executor.prologue()
+            self._exit_stack = stack.pop_all()
         return self
 
     def __exit__(self, *exc):
-        self._executor.epilogue()
+        try:
+            self._executor.epilogue()
+        finally:
+            self._exit_stack.close()
 
     def execute(
         self,
@@ -16,12 +16,16 @@
 
 """Definitions and helpers to handle filesets."""
 
+import fnmatch
 import os
+import re
 from glob import iglob
-from typing import List, Set, Tuple
+from typing import Dict, Iterator, List, Optional, Pattern, Set, Tuple
 
 from craft_parts import errors
 
+_MAGIC_CHECK = re.compile("[*?[]")
+
 
 class Fileset:
     """Helper class to process string lists."""
@@ -29,6 +33,7 @@ class Fileset:
     def __init__(self, entries: List[str], *, name: str = ""):
         self._name = name
         self._list = entries
+        self._matcher: Optional["_CompiledFileset"] = None
 
     def __repr__(self):
         return f"Fileset({self._list!r}, name={self._name!r})"
@@ -53,12 +58,21 @@ class Fileset:
         """Return the list of files to be excluded."""
         return [x[1:] for x in self._list if x[0] == "-"]
 
+    @property
+    def matcher(self) -> "_CompiledFileset":
+        """Return the compiled include and exclude filters for this fileset."""
+        if self._matcher is None:
+            includes, excludes = _get_file_list(self)
+            self._matcher = _CompiledFileset(includes, excludes)
+        return self._matcher
+
     def remove(self, item: str) -> None:
         """Remove this entry from the list of files.
 
         :param item: The item to remove.
         """
         self._list.remove(item)
+        self._matcher = None
 
     def combine(self, other: "Fileset") -> None:
         """Combine the entries in this fileset with entries from another fileset.
@@ -85,6 +99,7 @@ class Fileset:
 
         if to_combine:
             self._list = list(set(self._list + other.entries))
+            self._matcher = None
 
 
 def migratable_filesets(fileset: Fileset, srcdir: str) -> Tuple[Set[str], Set[str]]:
@@ -95,42 +110,39 @@ def migratable_filesets(fileset: Fileset, srcdir: str) -> Tuple[Set[str], Set[st
     :return: A tuple containing the set of files and the set of directories
         that can be migrated.
     """
-    includes, excludes = _get_file_list(fileset)
+    matcher = fileset.matcher
+    tree = _Tree(srcdir)
 
-    include_files = _generate_include_set(srcdir, includes)
-    exclude_files, exclude_dirs = _generate_exclude_set(srcdir, excludes)
+    include_files = matcher.match_includes(tree)
+    exclude_files, exclude_dirs = matcher.match_excludes(tree)
 
     files = include_files - exclude_files
-    for exclude_dir in exclude_dirs:
-        files = {x for x in files if not x.startswith(exclude_dir + "/")}
+    if exclude_dirs:
+        files = {x for x in files if not _is_under(x, exclude_dirs)}
 
     # Separate dirs from files.
-    dirs = {
-        x
-        for x in files
-        if os.path.isdir(os.path.join(srcdir, x))
-        and not os.path.islink(os.path.join(srcdir, x))
-    }
+    dirs = {x for x in files if tree.is_real_dir(x)}
 
     # Remove dirs from files.
     files = files - dirs
 
-    # Include (resolved) parent directories for each selected file.
+    # Resolve parent paths for dirs and files, including (resolved) parent
+    # directories for each selected file.
+    resolved_parents: Dict[str, str] = {}
+    resolved_files = set()
     for filename in files:
-        filename = _get_resolved_relative_path(filename, srcdir)
+        filename = _get_resolved_relative_path(filename, srcdir, resolved_parents)
+        resolved_files.add(filename)
         dirname = os.path.dirname(filename)
         while dirname:
             dirs.add(dirname)
             dirname = os.path.dirname(dirname)
 
-    # Resolve parent paths for dirs and files.
     resolved_dirs = set()
     for dirname in dirs:
-        resolved_dirs.add(_get_resolved_relative_path(dirname, srcdir))
-
-    resolved_files = set()
-    for filename in files:
-        resolved_files.add(_get_resolved_relative_path(filename, srcdir))
+        resolved_dirs.add(
+            _get_resolved_relative_path(dirname, srcdir, resolved_parents)
+        )
 
     return resolved_files, resolved_dirs
 
@@ -165,67 +177,393 @@ def _get_file_list(fileset: Fileset) -> Tuple[List[str], List[str]]:
     return includes, excludes
 
 
-def _generate_include_set(directory: str, includes: List[str]) -> Set[str]:
-    """Obtain the list of files to include based on include file filter.
+class _Tree:
+    """A lazily scanned view of a directory tree.
 
-    :param directory: The path to the tree containing the files to filter.
+    Each directory is listed at most once with :func:`os.scandir`, and the
+    type of every listed entry is remembered so that matching and the
+    subsequent file/directory split don't need additional system calls.
 
-    :return: The set of files to include.
+    :param root: The path to the tree containing the files to filter.
     """
-    include_files = set()
 
-    for include in includes:
-        if "*" in include:
-            pattern = os.path.join(directory, include)
-            matches = iglob(pattern, recursive=True)
-            include_files |= set(matches)
+    def __init__(self, root: str):
+        self._root = root
+        self._listings: Dict[str, List[Tuple[str, bool, bool]]] = {}
+        self._names: Dict[str, Set[str]] = {}
+        self._kinds: Dict[str, Tuple[bool, bool]] = {}
+
+    def path(self, relpath: str) -> str:
+        """Return the path of an entry relative to the tree root."""
+        return os.path.join(self._root, relpath)
+
+    def listdir(self, relpath: str) -> List[Tuple[str, bool, bool]]:
+        """List a directory in the tree.
+
+        :param relpath: The directory path relative to the tree root, or an
+            empty string for the root itself.
+
+        :return: A list of tuples containing the entry name, whether it is
+            a directory (following symlinks) and whether it is a symlink.
+            Directories that can't be listed are reported as empty.
+        """
+        listing = self._listings.get(relpath)
+        if listing is not None:
+            return listing
+
+        listing = []
+        try:
+            with os.scandir(self.path(relpath)) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    is_link = entry.is_symlink()
+                    listing.append((entry.name, is_dir, is_link))
+                    self._kinds[_join(relpath, entry.name)] = (is_dir, is_link)
+        except OSError:
+            pass
+
+        self._listings[relpath] = listing
+        return listing
+
+    def lexists(self, relpath: str, name: str) -> bool:
+        """Verify if an entry exists in the given directory."""
+        names = self._names.get(relpath)
+        if names is None:
+            names = {x[0] for x in self.listdir(relpath)}
+            self._names[relpath] = names
+        return name in names
+
+    def is_dir(self, relpath: str) -> bool:
+        """Verify if the given entry is a directory (following symlinks)."""
+        kind = self._kinds.get(relpath)
+        if kind is None:
+            return os.path.isdir(self.path(relpath))
+        return kind[0]
+
+    def is_real_dir(self, relpath: str) -> bool:
+        """Verify if the given entry is a directory and not a symlink."""
+        kind = self._kinds.get(relpath)
+        if kind is None:
+            path = self.path(relpath)
+            return os.path.isdir(path) and not os.path.islink(path)
+        return kind[0] and not kind[1]
+
+    def rlist(self, relpath: str, *, dironly: bool) -> Iterator[str]:
+        """Recursively list non-hidden entries, like glob's ``**``.
+
+        :param relpath: The directory to list.
+        :param dironly: List only directories.
+        """
+        for name, is_dir, _ in self.listdir(relpath):
+            if name[0] == "." or (dironly and not is_dir):
+                continue
+            path = _join(relpath, name)
+            yield path
+            if is_dir:
+                yield from self.rlist(path, dironly=dironly)
+
+    def walk(self, relpath: str) -> Iterator[str]:
+        """Recursively list all entries without following symlinks.
+
+        :param relpath: The directory to list.
+        """
+        for name, is_dir, is_link in self.listdir(relpath):
+            path = _join(relpath, name)
+            yield path
+            if is_dir and not is_link:
+                yield from self.walk(path)
+
+
+class _PatternNode:
+    """A node in the trie of glob pattern components.
+
+    :param magic: Whether the path to this node contains wildcards.
+    """
+
+    def __init__(self, magic: bool = False) -> None:
+        self.magic = magic
+        self.terminal = False
+        self.trailing_sep = False
+        self.literals: Dict[str, "_PatternNode"] = {}
+        self.wildcards: Dict[str, "_PatternNode"] = {}
+        self.recursive: Optional["_PatternNode"] = None
+        self.wildcard_union: Optional[Pattern] = None
+        self.wildcard_matchers: List[Tuple[Pattern, bool, "_PatternNode"]] = []
+
+    @property
+    def has_children(self) -> bool:
+        """Whether patterns continue past this node."""
+        return bool(
+            self.literals or self.wildcards or self.recursive or self.trailing_sep
+        )
+
+    def add(self, components: List[str]) -> None:
+        """Add the remaining components of a pattern to this node.
+
+        :param components: The pattern components. An empty last component
+            means the pattern ends with a path separator.
+        """
+        if not components:
+            self.terminal = True
+            return
+
+        component = components[0]
+        if component == "":
+            self.trailing_sep = True
+            return
+
+        if component == "**":
+            if self.recursive is None:
+                self.recursive = _PatternNode(True)
+            child = self.recursive
+        elif _has_magic(component):
+            child = self.wildcards.setdefault(component, _PatternNode(True))
         else:
-            include_files |= set([os.path.join(directory, include)])
+            child = self.literals.setdefault(component, _PatternNode(self.magic))
 
-    include_dirs = [
-        x for x in include_files if os.path.isdir(x) and not os.path.islink(x)
-    ]
-    include_files = {os.path.relpath(x, directory) for x in include_files}
+        child.add(components[1:])
 
-    # Expand includeFiles, so that an exclude like '*/*.so' will still match
-    # files from an include like 'lib'
-    for include_dir in include_dirs:
-        for root, dirs, files in os.walk(include_dir):
-            include_files |= {
-                os.path.relpath(os.path.join(root, d), directory) for d in dirs
-            }
-            include_files |= {
-                os.path.relpath(os.path.join(root, f), directory) for f in files
-            }
+    def compile(self) -> None:
+        """Compile the wildcard components of this node and its children."""
+        if self.wildcards:
+            regexes = [fnmatch.translate(x) for x in self.wildcards]
+            self.wildcard_union = re.compile("|".join(f"(?:{x})" for x in regexes))
+            self.wildcard_matchers = [
+                (re.compile(regex), component[0] == ".", child)
+                for regex, (component, child) in zip(regexes, self.wildcards.items())
+            ]
 
-    return include_files
+        children = [*self.literals.values(), *self.wildcards.values()]
+        if self.recursive:
+            children.append(self.recursive)
+        for child in children:
+            child.compile()
 
 
-def _generate_exclude_set(
-    directory: str, excludes: List[str]
-) -> Tuple[Set[str], Set[str]]:
-    """Obtain the list of files to exclude based on exclude file filter.
+class _Matches:
+    """Paths matched in a tree, normalized to be relative to its root."""
 
-    :param directory: The path to the tree containing the files to filter.
+    def __init__(self) -> None:
+        self.paths: Set[str] = set()
+        # matches ending with a separator, as returned by glob
+        self.dir_paths: Set[str] = set()
 
-    :return: The set of files to exclude.
+    def add(self, relpath: str) -> None:
+        """Add a matched path."""
+        self.paths.add(relpath or ".")
+
+    def add_dir(self, relpath: str) -> None:
+        """Add a matched path that ends with a separator."""
+        self.paths.add(relpath or ".")
+        self.dir_paths.add(relpath or ".")
+
+
+def _match_trie(root: _PatternNode, tree: _Tree, matches: _Matches) -> None:
+    """Match all patterns in the trie during a single walk of the tree.
+
+    Semantics are the same as :func:`glob.iglob` with ``recursive=True``:
+    wildcards don't match hidden names unless the pattern component starts
+    with a dot, ``**`` matches zero or more non-hidden directories, and
+    symlinks to directories are followed.
+
+    :param root: The root node of the pattern trie.
+    :param tree: The tree to match.
+    :param matches: The matched paths.
+    """
+    pending: List[Tuple[_PatternNode, str]] = [(root, "")]
+    visited: Set[Tuple[int, str]] = set()
+
+    def schedule(node: _PatternNode, relpath: str) -> None:
+        key = (id(node), relpath)
+        if key not in visited:
+            visited.add(key)
+            pending.append((node, relpath))
+
+    while pending:
+        node, relpath = pending.pop()
+
+        if node.trailing_sep and tree.is_dir(relpath):
+            matches.add_dir(relpath)
+
+        for name, child in node.literals.items():
+            path = _join(relpath, name)
+            if child.terminal and tree.lexists(relpath, name):
+                matches.add(path)
+            # like glob, only check existence of literal components that
+            # follow a wildcard
+            if child.has_children and (not node.magic or tree.lexists(relpath, name)):
+                schedule(child, path)
+
+        if node.wildcard_union is not None:
+            for name, is_dir, _ in tree.listdir(relpath):
+                if not node.wildcard_union.match(name):
+                    continue
+                hidden = name[0] == "."
+                for regex, match_hidden, child in node.wildcard_matchers:
+                    if (hidden and not match_hidden) or not regex.match(name):
+                        continue
+                    path = _join(relpath, name)
+                    if child.terminal:
+                        matches.add(path)
+                    if child.has_children and is_dir:
+                        schedule(child, path)
+
+        child = node.recursive
+        if child is not None:
+            if child.terminal:
+                matches.add_dir(relpath)
+                for path in tree.rlist(relpath, dironly=False):
+                    matches.add(path)
+            if child.has_children:
+                schedule(child, relpath)
+                for path in tree.rlist(relpath, dironly=True):
+                    schedule(child, path)
+
+
+class _CompiledFileset:
+    """Include and exclude filters compiled into pattern tries.
+
+    :param includes: The list of include filters.
+    :param excludes: The list of exclude filters.
     """
-    exclude_files = set()
 
-    for exclude in excludes:
-        pattern = os.path.join(directory, exclude)
-        matches = iglob(pattern, recursive=True)
-        exclude_files |= set(matches)
+    def __init__(self, includes: List[str], excludes: List[str]):
+        self._include_literals: List[str] = []
+        self._include_globs: List[str] = []
+        self._include_trie = _PatternNode()
+        self._exclude_literals: List[str] = []
+        self._exclude_globs: List[str] = []
+        self._exclude_trie = _PatternNode()
+
+        for include in includes:
+            if "*" not in include:
+                self._include_literals.append(include)
+            elif not _add_pattern(self._include_trie, include):
+                self._include_globs.append(include)
 
-    exclude_dirs = {
-        os.path.relpath(x, directory) for x in exclude_files if os.path.isdir(x)
-    }
-    exclude_files = {os.path.relpath(x, directory) for x in exclude_files}
+        for exclude in excludes:
+            if not _has_magic(exclude):
+                self._exclude_literals.append(exclude)
+            elif not _add_pattern(self._exclude_trie, exclude):
+                self._exclude_globs.append(exclude)
 
-    return exclude_files, exclude_dirs
+        self._include_trie.compile()
+        self._exclude_trie.compile()
 
+    def match_includes(self, tree: _Tree) -> Set[str]:
+        """Obtain the list of files to include based on include file filter.
 
-def _get_resolved_relative_path(relative_path: str, base_directory: str) -> str:
+        :param tree: The tree containing the files to filter.
+
+        :return: The set of files to include.
+        """
+        matches = _Matches()
+        _match_trie(self._include_trie, tree, matches)
+        include_files = matches.paths
+
+        include_dirs = [
+            x
+            for x in include_files
+            if tree.is_dir(x) and (x in matches.dir_paths or tree.is_real_dir(x))
+        ]
+
+        for include in self._include_literals:
+            path = tree.path(include)
+            include_files.add(os.path.relpath(path, tree.path("")))
+            if os.path.isdir(path) and not os.path.islink(path):
+                include_dirs.append(os.path.relpath(path, tree.path("")))
+
+        for include in self._include_globs:
+            for path in iglob(tree.path(include), recursive=True):
+                include_files.add(os.path.relpath(path, tree.path("")))
+                if os.path.isdir(path) and not os.path.islink(path):
+                    include_dirs.append(os.path.relpath(path, tree.path("")))
+
+        # Expand includeFiles, so that an exclude like '*/*.so' will still match
+        # files from an include like 'lib'
+        for include_dir in include_dirs:
+            include_files.update(tree.walk("" if include_dir == "." else include_dir))
+
+        return include_files
+
+    def match_excludes(self, tree: _Tree) -> Tuple[Set[str], Set[str]]:
+        """Obtain the list of files to exclude based on exclude file filter.
+
+        :param tree: The tree containing the files to filter.
+
+        :return: The set of files and the set of directories to exclude.
+        """
+        matches = _Matches()
+        _match_trie(self._exclude_trie, tree, matches)
+        exclude_files = matches.paths
+        exclude_dirs = {x for x in exclude_files if tree.is_dir(x)}
+
+        patterns = [tree.path(x) for x in self._exclude_literals]
+        for exclude in self._exclude_globs:
+            patterns.extend(iglob(tree.path(exclude), recursive=True))
+
+        for path in patterns:
+            # literal patterns match only if they exist, as in glob
+            if path.endswith("/") and not os.path.isdir(path):
+                continue
+            if not os.path.lexists(path):
+                continue
+            relpath = os.path.relpath(path, tree.path(""))
+            exclude_files.add(relpath)
+            if os.path.isdir(path):
+                exclude_dirs.add(relpath)
+
+        return exclude_files, exclude_dirs
+
+
+def _add_pattern(root: _PatternNode, pattern: str) -> bool:
+    """Add a glob pattern to a pattern trie.
+
+    :param root: The root node of the trie.
+    :param pattern: The pattern to add.
+
+    :return: Whether the pattern can be matched using the trie. Patterns
+        containing relative path components must be expanded with glob.
+    """
+    parts = pattern.split("/")
+    components = [x for x in parts if x]
+    if not components or any(x in (".", "..") for x in components):
+        return False
+
+    if parts[-1] == "":
+        components.append("")
+
+    root.add(components)
+    return True
+
+
+def _has_magic(pattern: str) -> bool:
+    return _MAGIC_CHECK.search(pattern) is not None
+
+
+def _join(relpath: str, name: str) -> str:
+    return f"{relpath}/{name}" if relpath else name
+
+
+def _is_under(path: str, dirs: Set[str]) -> bool:
+    """Verify if any of the path's parents is in the given set of directories."""
+    idx = path.rfind("/")
+    while idx > 0:
+        path = path[:idx]
+        if path in dirs:
+            return True
+        idx = path.rfind("/")
+    return False
+
+
+def _get_resolved_relative_path(
+    relative_path: str,
+    base_directory: str,
+    resolved_parents: Optional[Dict[str, str]] = None,
+) -> str:
     """Resolve path components against target base_directory.
 
     If the resulting target path is a symlink, it will not be followed.
@@ -234,11 +572,19 @@ def _get_resolved_relative_path(relative_path: str, base_directory: str) -> str:
 
     :param relative_path: Path of target, relative to base_directory.
     :param base_directory: Base path of target.
+    :param resolved_parents: An optional cache of resolved parent paths,
+        shared between calls with the same base_directory.
 
     :return: Resolved path, relative to base_directory.
     """
     parent_relpath, filename = os.path.split(relative_path)
-    parent_abspath = os.path.realpath(os.path.join(base_directory, parent_relpath))
+    if resolved_parents is None:
+        resolved_parents = {}
+
+    parent_abspath = resolved_parents.get(parent_relpath)
+    if parent_abspath is None:
+        parent_abspath = os.path.realpath(os.path.join(base_directory, parent_relpath))
+        resolved_parents[parent_relpath] = parent_abspath
 
     filename_abspath = os.path.join(parent_abspath, filename)
     filename_relpath = os.path.relpath(filename_abspath, base_directory)
@@ -0,0 +1,311 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2022 Canonical Ltd.
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License version 3 as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Capture of the output of step commands in per-part logs."""
+
+import contextlib
+import logging
+import os
+import selectors
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from craft_parts.steps import Step
+
+from .shell_pool import Stream, get_stream_writer
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_SIZE = 65536
+
+
+class LogMultiplexer:
+    """Capture the output of step commands in per-part log files.
+
+    The output of all running commands is read by a single thread through
+    a selector, in large chunks, and forwarded to the original streams. Each
+    chunk is also written to the log file of the part that produced it,
+    preceded by a header line with the capture time, part, step and stream.
+    When a log file exceeds the maximum size it's rotated, keeping a single
+    previous log file. The most recent output of each part is kept in memory
+    so it can be inspected while the part is running.
+
+    :param log_dir: The directory to write part log files to.
+    :param max_size: The size in bytes after which a part log file is rotated.
+    :param tail_size: The size in bytes of the recent output kept in memory
+        for each part.
+    """
+
+    def __init__(
+        self,
+        log_dir: Path,
+        *,
+        max_size: int = 10 * 2**20,
+        tail_size: int = 64 * 2**10,
+    ):
+        self._log_dir = log_dir
+        self._max_size = max_size
+        self._tail_size = tail_size
+        self._logs: Dict[str, _PartLog] = {}
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[int, _Channel]] = []
+        self._wakeup_read_fd, self._wakeup_write_fd = os.pipe()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def log_path(self, part_name: str) -> Path:
+        """Obtain the path to the log file of a part.
+
+        :param part_name: The name of the part.
+
+        :return: The path to the part log file.
+        """
+        return self._log_dir / f"{part_name}.log"
+
+    @contextlib.contextmanager
+    def capture(
+        self,
+        part_name: str,
+        step: Step,
+        *,
+        stdout: Stream = None,
+        stderr: Stream = None,
+        timeout: float = 5.0,
+    ) -> Iterator[Tuple[int, int]]:
+        """Capture the output of the commands executed for a part step.
+
+        :param part_name: The name of the part.
+        :param step: The step being executed.
+        :param stdout: The stream to forward the command output to.
+        :param stderr: The stream to forward the command error output to.
+        :param timeout: The maximum time to wait for the output of background
+            processes started by the commands, in seconds.
+
+        :return: A context manager returning the file descriptors to be used
+            as the standard output and error of the commands.
+        """
+        part_log = self._get_part_log(part_name)
+        write_fds: List[int] = []
+        channels: List[_Channel] = []
+
+        for name, stream, default_fd in [("stdout", stdout, 1), ("stderr", stderr, 2)]:
+            read_fd, write_fd = os.pipe()
+            channel = _Channel(
+                part_log,
+                step=step,
+                stream_name=name,
+                forward=get_stream_writer(stream, default_fd=default_fd),
+            )
+            with self._lock:
+                self._pending.append((read_fd, channel))
+            write_fds.append(write_fd)
+            channels.append(channel)
+
+        self._wakeup()
+
+        try:
+            yield write_fds[0], write_fds[1]
+        finally:
+            for write_fd in write_fds:
+                os.close(write_fd)
+
+            # Commands exited, wait until their remaining output is read.
+            for channel in channels:
+                if not channel.done.wait(timeout):
+                    logger.debug(
+                        "output of part %r still open after step %s", part_name, step
+                    )
+
+    def tail(self, part_name: str) -> str:
+        """Obtain the most recent output of a part.
+
+        :param part_name: The name of the part.
+
+        :return: The most recent output of the part, or an empty string if
+            nothing was captured for the part.
+        """
+        with self._lock:
+            part_log = self._logs.get(part_name)
+
+        if not part_log:
+            return ""
+
+        return part_log.tail()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop reading command output and close the part log files.
+
+        :param timeout: The maximum time to wait for the output of background
+            processes started by step commands, in seconds.
+        """
+        with self._lock:
+            thread = self._thread
+            self._stopping = True
+
+        if thread:
+            self._wakeup()
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.debug("command output still open when closing part logs")
+
+        with self._lock:
+            self._thread = None
+            self._stopping = False
+            for part_log in self._logs.values():
+                part_log.close()
+
+    def _get_part_log(self, part_name: str) -> "_PartLog":
+        with self._lock:
+            part_log = self._logs.get(part_name)
+            if not part_log:
+                part_log = _PartLog(
+                    self.log_path(part_name),
+                    part_name=part_name,
+                    max_size=self._max_size,
+                    tail_size=self._tail_size,
+                )
+                self._logs[part_name] = part_log
+
+            if not self._thread:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+        return part_log
+
+    def _wakeup(self) -> None:
+        os.write(self._wakeup_write_fd, b"\0")
+
+    def _run(self) -> None:
+        """Read the output of all captured commands."""
+        with selectors.DefaultSelector() as selector:
+            selector.register(self._wakeup_read_fd, selectors.EVENT_READ)
+            stopping = False
+
+            while True:
+                for key, _ in selector.select():
+                    if key.fd == self._wakeup_read_fd:
+                        os.read(self._wakeup_read_fd, _CHUNK_SIZE)
+                        with self._lock:
+                            pending, self._pending = self._pending, []
+                            stopping = self._stopping
+                        for fd, channel in pending:
+                            selector.register(fd, selectors.EVENT_READ, channel)
+                        continue
+
+                    channel = key.data
+                    data = os.read(key.fd, _CHUNK_SIZE)
+                    if data:
+                        channel.feed(data)
+                    else:
+                        selector.unregister(key.fd)
+                        os.close(key.fd)
+                        channel.finish()
+
+                if stopping and len(selector.get_map()) == 1:
+                    return
+
+
+class _PartLog:
+    """The log file and recent output of a part."""
+
+    def __init__(self, path: Path, *, part_name: str, max_size: int, tail_size: int):
+        self._path = path
+        self._part_name = part_name
+        self._max_size = max_size
+        self._tail_size = tail_size
+        self._file: Optional[IO[bytes]] = None
+        self._recent: Deque[bytes] = deque()
+        self._recent_size = 0
+        self._lock = threading.Lock()
+
+    def write(self, step: Step, stream_name: str, data: bytes) -> None:
+        """Write a tagged chunk of complete lines to the log file."""
+        if self._file is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self._path.open("ab")  # pylint: disable=consider-using-with
+
+        timestamp = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        header = f"@@ {timestamp} {self._part_name} {step.name} {stream_name}\n"
+        self._file.write(header.encode())
+        self._file.write(data)
+        self._file.flush()
+
+        if self._file.tell() > self._max_size:
+            self._file.close()
+            self._path.replace(self._path.with_name(self._path.name + ".1"))
+            self._file = self._path.open("ab")  # pylint: disable=consider-using-with
+
+    def record(self, data: bytes) -> None:
+        """Keep a chunk of output in the recent output buffer."""
+        with self._lock:
+            self._recent.append(data)
+            self._recent_size += len(data)
+            while self._recent_size - len(self._recent[0]) >= self._tail_size:
+                self._recent_size -= len(self._recent.popleft())
+
+    def tail(self) -> str:
+        """Return the recent output."""
+        with self._lock:
+            data = b"".join(self._recent)
+        return data[-self._tail_size :].decode(errors="replace")
+
+    def close(self) -> None:
+        """Close the log file."""
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class _Channel:
+    """An output stream of commands executed for a part step."""
+
+    def __init__(
+        self,
+        part_log: _PartLog,
+        *,
+        step: Step,
+        stream_name: str,
+        forward: Callable[[bytes], None],
+    ):
+        self._part_log = part_log
+        self._step = step
+        self._stream_name = stream_name
+        self._forward = forward
+        self._partial = b""
+        self.done = threading.Event()
+
+    def feed(self, data: bytes) -> None:
+        """Forward a chunk of output and write its complete lines to the log."""
+        try:
+            self._forward(data)
+        except OSError as err:
+            logger.debug("cannot forward %s output: %s", self._stream_name, err)
+
+        self._part_log.record(data)
+
+        lines, newline, self._partial = (self._partial + data).rpartition(b"\n")
+        if newline:
+            self._part_log.write(self._step, self._stream_name, lines + newline)
+
+    def finish(self) -> None:
+        """Write the remaining incomplete line to the log."""
+        if self._partial:
+            self._part_log.write(self._step, self._stream_name, self._partial + b"\n")
+            self._partial = b""
+        self.done.set()
@@ -16,13 +16,16 @@
 
 """Handle the execution of built-in or user specified step commands."""
 
+import errno
 import logging
 import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple
 
-from craft_parts import overlays
-from craft_parts.permissions import Permissions, filter_permissions
+from craft_parts import instrumentation, overlays
+from craft_parts.permissions import Permissions, PermissionsTable
 from craft_parts.state_manager.states import MigrationState, StepState
 from craft_parts.utils import file_utils
 
@@ -40,6 +43,7 @@ def migrate_files(
     oci_translation: bool = False,
     fixup_func=lambda *args: None,
     permissions: Optional[List[Permissions]] = None,
+    max_workers: int = 1,
 ) -> Tuple[Set[str], Set[str]]:
     """Copy or link files from a directory to another.
 
@@ -57,12 +61,41 @@ def migrate_files(
     :param fixup_func: A function to run on each migrated file.
     :param permissions: A list of permissions definitions to take into
         account when migrating the files (the original files are not modified).
+    :param max_workers: The maximum number of files to link or copy concurrently.
 
     :returns: A tuple containing sets of migrated files and directories.
     """
+    with instrumentation.span("migrate", files=len(files), directories=len(dirs)):
+        return _migrate_files(
+            files=files,
+            dirs=dirs,
+            srcdir=srcdir,
+            destdir=destdir,
+            missing_ok=missing_ok,
+            follow_symlinks=follow_symlinks,
+            oci_translation=oci_translation,
+            fixup_func=fixup_func,
+            permissions=permissions,
+            max_workers=max_workers,
+        )
+
+
+def _migrate_files(
+    *,
+    files: Set[str],
+    dirs: Set[str],
+    srcdir: Path,
+    destdir: Path,
+    missing_ok: bool,
+    follow_symlinks: bool,
+    oci_translation: bool,
+    fixup_func,
+    permissions: Optional[List[Permissions]],
+    max_workers: int,
+) -> Tuple[Set[str], Set[str]]:
     migrated_files: Set[str] = set()
     migrated_dirs: Set[str] = set()
-    permissions = permissions or []
+    permissions_table = PermissionsTable(permissions)
 
     for dirname in sorted(dirs):
         src = srcdir / dirname
@@ -75,7 +108,7 @@ def migrate_files(
             dst = overlays.oci_whiteout(dst)
 
         file_utils.create_similar_directory(
-            str(src), str(dst), filter_permissions(dirname, permissions)
+            str(src), str(dst), permissions_table.filter(dirname)
         )
         migrated_dirs.add(dirname)
 
@@ -89,11 +122,15 @@ def migrate_files(
             oci_dst.touch()
             migrated_files.add(str(oci_opaque_marker))
 
+    # Plan the migration of each file, then link or copy them in parallel.
+    # Directories were created above, so workers don't depend on each other.
+    links: List[Tuple[str, Path, Path, List[Permissions]]] = []
+
     for filename in sorted(files):
         src = srcdir / filename
         dst = destdir / filename
 
-        if not src.exists():
+        if not os.path.exists(src):
             # If migrating a whited out file from stage (OCI) using layer (overlayfs)
             # as reference, use the OCI whiteout file names.
             if overlays.oci_whiteout(src).exists():
@@ -103,12 +140,20 @@ def migrate_files(
                 continue
 
         # If the file is already here and it's a symlink, leave it alone.
-        if dst.is_symlink():
-            continue
-
-        # Otherwise, remove and re-link it.
-        if dst.exists():
-            dst.unlink()
+        # If it's still linked to the source file (e.g. when incrementally
+        # migrating after a previous run), keep it. Otherwise, remove and
+        # re-link it.
+        try:
+            dst_stat = os.lstat(dst)
+        except OSError:
+            pass
+        else:
+            if stat.S_ISLNK(dst_stat.st_mode):
+                continue
+            if not permissions_table.filter(filename) and _is_linked(src, dst_stat):
+                migrated_files.add(filename)
+                continue
+            os.unlink(dst)
 
         # If source is a whiteout file (overlayfs or OCI), create an OCI whiteout file
         # in destination and add it to the list of migrated files so it can be removed
@@ -120,18 +165,45 @@ def migrate_files(
             oci_dst.touch()
             migrated_files.add(str(oci_whiteout))
         else:
-            file_utils.link_or_copy(
-                str(src),
-                str(dst),
-                follow_symlinks=follow_symlinks,
-                permissions=filter_permissions(filename, permissions),
-            )
-            fixup_func(str(dst))
-            migrated_files.add(str(filename))
+            links.append((filename, src, dst, permissions_table.filter(filename)))
+
+    def _migrate_file(filename: str, src: Path, dst: Path, perms: List[Permissions]):
+        file_utils.link_or_copy(
+            str(src),
+            str(dst),
+            follow_symlinks=follow_symlinks,
+            permissions=perms,
+        )
+
+    if max_workers <= 1 or len(links) <= 1:
+        for link in links:
+            _migrate_file(*link)
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_migrate_file, *link) for link in links]
+            # Raise the first error in migration order.
+            for future in futures:
+                future.result()
+
+    # Fixup functions aren't required to be thread-safe (e.g. the pkg-config
+    # file fixup edits files using fileinput, which has global state), so run
+    # them after all files were migrated, in migration order.
+    for filename, _, dst, _ in links:
+        fixup_func(str(dst))
+        migrated_files.add(filename)
 
     return migrated_files, migrated_dirs
 
 
+def _is_linked(src: Path, dst_stat: os.stat_result) -> bool:
+    """Verify if the destination is a hard link to the regular source file."""
+    try:
+        src_stat = os.lstat(src)
+    except OSError:
+        return False
+    return stat.S_ISREG(src_stat.st_mode) and os.path.samestat(src_stat, dst_stat)
+
+
 def _is_whiteout_file(path: Path) -> bool:
     return overlays.is_whiteout_file(path) or overlays.is_oci_whiteout_file(path)
 
@@ -172,13 +244,35 @@ def clean_shared_area(
             files -= other_state.files
             directories -= other_state.directories
 
+    # Finally, clean the files and directories that are specific to this
+    # part.
+    clean_shared_entries(
+        files=files,
+        directories=directories,
+        shared_dir=shared_dir,
+        overlay_migration_state=overlay_migration_state,
+    )
+
+
+def clean_shared_entries(
+    *,
+    files: Set[str],
+    directories: Set[str],
+    shared_dir: Path,
+    overlay_migration_state: Optional[MigrationState],
+) -> None:
+    """Clean files and directories owned by a single part from a shared directory.
+
+    :param files: The files owned only by the part being cleaned.
+    :param directories: The directories owned only by the part being cleaned.
+    :param shared_dir: The shared directory to remove files from.
+    :param overlay_migration_state: The state of the overlay migration to step.
+    """
     # If overlay has been migrated, also take overlay files into account
     if overlay_migration_state:
-        files -= overlay_migration_state.files
-        directories -= overlay_migration_state.directories
+        files = files - overlay_migration_state.files
+        directories = directories - overlay_migration_state.directories
 
-    # Finally, clean the files and directories that are specific to this
-    # part.
     _clean_migrated_files(files, directories, shared_dir)
 
 
@@ -231,17 +325,21 @@ def _clean_migrated_files(files: Set[str], dirs: Set[str], directory: Path) -> N
     # parents, and we want to be able to remove directories if possible, so
     # we'll sort them in reverse here to get subdirectories before parents.
 
+    # Removing non-empty directories fails, so try to remove each one instead
+    # of listing its contents first.
     for each_dir in sorted(dirs, reverse=True):
         migrated_directory = os.path.join(directory, each_dir)
         try:
-            if not os.listdir(migrated_directory):
-                os.rmdir(migrated_directory)
+            os.rmdir(migrated_directory)
         except FileNotFoundError:
             logger.warning(
                 "Attempted to remove directory '%s', but it didn't exist. "
                 "Skipping...",
                 each_dir,
             )
+        except OSError as err:
+            if err.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                raise
 
 
 def filter_dangling_whiteouts(
@@ -27,7 +27,7 @@ import os
 import shutil
 from glob import iglob
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Tuple
 
 from craft_parts import errors
 from craft_parts.utils import file_utils
@@ -35,7 +35,7 @@ from craft_parts.utils import file_utils
 
 def organize_files(
     *, part_name: str, mapping: Dict[str, str], base_dir: Path, overwrite: bool
-) -> None:
+) -> List[Tuple[str, str]]:
     """Rearrange files for part staging.
 
     :param fileset: A fileset containing the `organize` file mapping.
@@ -43,7 +43,12 @@ def organize_files(
     :param overwrite: Whether existing files should be overwritten. This is
         only used in build updates, when a part may organize over files
         it previously organized.
+
+    :return: The list of (source, destination) pairs of organized files and
+        directories, relative to base_dir.
     """
+    relocations: List[Tuple[str, str]] = []
+
     for key in sorted(mapping, key=lambda x: ["*" in x, x]):
         src = os.path.join(base_dir, key)
         # Remove the leading slash so the path actually joins
@@ -63,6 +68,9 @@ def organize_files(
                 # TODO create alternate organization location to avoid
                 # deletions.
                 shutil.rmtree(src)
+                relocations.append(
+                    (os.path.relpath(src, base_dir), os.path.relpath(dst, base_dir))
+                )
                 continue
 
             if os.path.isfile(dst):
@@ -97,4 +105,12 @@ def organize_files(
                         os.remove(real_dst)
 
             os.makedirs(os.path.dirname(dst), exist_ok=True)
+            real_dst = (
+                os.path.join(dst, os.path.basename(src)) if os.path.isdir(dst) else dst
+            )
             shutil.move(src, dst)
+            relocations.append(
+                (os.path.relpath(src, base_dir), os.path.relpath(real_dst, base_dir))
+            )
+
+    return relocations
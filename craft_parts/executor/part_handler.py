@@ -16,32 +16,51 @@
 
 """Definitions and helpers for part handlers."""
 
+import contextlib
 import logging
 import os
 import os.path
 import shutil
 from glob import iglob
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Set, cast
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, cast
 
 from typing_extensions import Protocol
 
-from craft_parts import callbacks, errors, overlays, packages, plugins, sources, xattrs
+from craft_parts import (
+    callbacks,
+    errors,
+    instrumentation,
+    overlays,
+    packages,
+    plugins,
+    sources,
+    xattrs,
+)
 from craft_parts.actions import Action, ActionType
 from craft_parts.infos import PartInfo, StepInfo
-from craft_parts.overlays import LayerHash, OverlayManager
+from craft_parts.overlays import LayerHash, LayerHashChain, OverlayManager
 from craft_parts.packages import errors as packages_errors
 from craft_parts.packages.platform import is_deb_based
 from craft_parts.parts import Part, get_parts_with_overlay, has_overlay_visibility
 from craft_parts.plugins import Plugin
-from craft_parts.state_manager import MigrationState, StepState, states
+from craft_parts.state_manager import (
+    MigrationState,
+    SharedAreaIndex,
+    StepState,
+    states,
+)
 from craft_parts.steps import Step
 from craft_parts.utils import file_utils, os_utils
 
 from . import filesets, migration
-from .environment import generate_step_environment
+from .build_cache import BuildCache
+from .environment import EnvironmentCache, generate_step_environment
+from .log_multiplexer import LogMultiplexer
 from .organize import organize_files
+from .shell_pool import ShellPool
 from .step_handler import StepContents, StepHandler, Stream
+from .trash import Trash
 
 logger = logging.getLogger(__name__)
 
@@ -88,12 +107,23 @@ class PartHandler:
         overlay_manager: OverlayManager,
         ignore_patterns: Optional[List[str]] = None,
         base_layer_hash: Optional[LayerHash] = None,
+        trash: Optional[Trash] = None,
+        env_cache: Optional[EnvironmentCache] = None,
+        shell_pool: Optional[ShellPool] = None,
+        log_multiplexer: Optional[LogMultiplexer] = None,
+        layer_hash_chain: Optional[LayerHashChain] = None,
     ):
         self._part = part
         self._part_info = part_info
         self._part_list = part_list
         self._overlay_manager = overlay_manager
-        self._base_layer_hash = base_layer_hash
+        self._layer_hash_chain = layer_hash_chain or LayerHashChain(
+            part_list, base_layer_hash
+        )
+        self._trash = trash
+        self._env_cache = env_cache or EnvironmentCache()
+        self._shell_pool = shell_pool
+        self._log_multiplexer = log_multiplexer
         self._app_environment: Dict[str, str] = {}
 
         self._plugin = plugins.get_plugin(
@@ -122,6 +152,30 @@ class PartHandler:
     ) -> None:
         """Execute the given action for this part using a plugin.
 
+        :param action: The action to execute.
+        """
+        # Stage packages and previous runs may have changed the trees used
+        # to generate the step environment, and so can this action.
+        trees = self._get_environment_trees(action.step)
+        self._env_cache.invalidate(*trees)
+        try:
+            with instrumentation.action_span(
+                f"{self._part.name}:{action.step.name.lower()}",
+                action_type=action.action_type.name.lower(),
+            ):
+                self._run_action(action, stdout=stdout, stderr=stderr)
+        finally:
+            self._env_cache.invalidate(*trees)
+
+    def _run_action(
+        self,
+        action: Action,
+        *,
+        stdout: Stream,
+        stderr: Stream,
+    ) -> None:
+        """Execute the given action for this part using a plugin.
+
         :param action: The action to execute.
         """
         step_info = StepInfo(self._part_info, action.step)
@@ -142,8 +196,19 @@ class PartHandler:
             return
 
         if action.action_type == ActionType.RERUN:
-            for step in [action.step] + action.step.next_steps():
-                self.clean_step(step=step)
+            if action.step == Step.PRIME and self._can_prime_incrementally():
+                # Keep primed files, only changes since the last run of the
+                # prime step will be migrated.
+                logger.debug("incremental prime of part %s", self._part.name)
+            else:
+                for step in [action.step] + action.step.next_steps():
+                    if step == Step.BUILD and self._syncs_build_dir():
+                        # Keep build artifacts for incremental builds, sources
+                        # will be synchronized to the existing build dir.
+                        _remove(self._part.part_install_dir, trash=self._trash)
+                        states.remove(self._part, step)
+                    else:
+                        self.clean_step(step=step)
 
         handler: _RunHandler
 
@@ -163,8 +228,29 @@ class PartHandler:
 
         callbacks.run_pre_step(step_info)
         state = handler(step_info, stdout=stdout, stderr=stderr)
+
+        if instrumentation.is_recording():
+            instrumentation.annotate(
+                bytes_written=self._get_output_size(action.step, state)
+            )
+
         state_file = states.get_step_state_path(self._part, action.step)
         state.write(state_file)
+
+        if action.step in (Step.STAGE, Step.PRIME):
+            # Only the entries of this part are written, other parts are not
+            # loaded.
+            index = SharedAreaIndex(
+                states.get_shared_index_path(self._part.parts_dir, action.step)
+            )
+            index.add(
+                self._part.name,
+                files=state.files,
+                directories=state.directories,
+                state_path=state_file,
+            )
+            index.write()
+
         callbacks.run_post_step(step_info)
 
     def _run_pull(
@@ -180,7 +266,7 @@ class PartHandler:
 
         :return: The pull step state.
         """
-        _remove(self._part.part_src_dir)
+        _remove(self._part.part_src_dir, trash=self._trash)
         self._make_dirs()
 
         fetched_packages = self._fetch_stage_packages(step_info=step_info)
@@ -223,16 +309,13 @@ class PartHandler:
         self._make_dirs()
 
         if self._part.has_overlay:
-            # install overlay packages
-            overlay_packages = self._part.spec.overlay_packages
-            if overlay_packages:
-                with overlays.LayerMount(
-                    self._overlay_manager, top_part=self._part
-                ) as ctx:
+            with overlays.LayerMount(self._overlay_manager, top_part=self._part) as ctx:
+                # install overlay packages
+                overlay_packages = self._part.spec.overlay_packages
+                if overlay_packages:
                     ctx.install_packages(overlay_packages)
 
-            # execute overlay script
-            with overlays.LayerMount(self._overlay_manager, top_part=self._part):
+                # execute overlay script
                 contents = self._run_step(
                     step_info=step_info,
                     scriptlet_name="overlay-script",
@@ -280,16 +363,42 @@ class PartHandler:
         self._unpack_stage_snaps()
 
         if not update and not self._plugin.get_out_of_source_build():
-            _remove(self._part.part_build_dir)
+            if self._syncs_build_dir():
+                # Only link sources changed since the previous build
+                file_utils.sync_tree(
+                    str(self._part.part_src_dir),
+                    str(self._part.part_build_dir),
+                    manifest=self._part.part_state_dir / "build_manifest",
+                )
+            else:
+                _remove(self._part.part_build_dir, trash=self._trash)
 
-            # Copy source from the part source dir to the part build dir
-            shutil.copytree(
-                self._part.part_src_dir, self._part.part_build_dir, symlinks=True
-            )
+                # Copy source from the part source dir to the part build dir
+                shutil.copytree(
+                    self._part.part_src_dir, self._part.part_build_dir, symlinks=True
+                )
+
+        if step_info.build_caches:
+            cache_names: Iterable[str] = self._plugin.get_build_caches().values()
+        else:
+            cache_names = []
+
+        build_cache = BuildCache(
+            step_info.cache_dir, max_size=step_info.build_cache_size
+        )
 
         # Perform the build step
-        if has_overlay_visibility(self._part, part_list=self._part_list):
-            with overlays.LayerMount(self._overlay_manager, top_part=self._part):
+        with build_cache.track(cache_names):
+            if has_overlay_visibility(self._part, part_list=self._part_list):
+                with overlays.LayerMount(self._overlay_manager, top_part=self._part):
+                    self._run_step(
+                        step_info=step_info,
+                        scriptlet_name="override-build",
+                        work_dir=self._part.part_build_dir,
+                        stdout=stdout,
+                        stderr=stderr,
+                    )
+            else:
                 self._run_step(
                     step_info=step_info,
                     scriptlet_name="override-build",
@@ -297,14 +406,6 @@ class PartHandler:
                     stdout=stdout,
                     stderr=stderr,
                 )
-        else:
-            self._run_step(
-                step_info=step_info,
-                scriptlet_name="override-build",
-                work_dir=self._part.part_build_dir,
-                stdout=stdout,
-                stderr=stderr,
-            )
 
         # Organize the installed files as requested. We do this in the build step for
         # two reasons:
@@ -398,6 +499,9 @@ class PartHandler:
         """
         self._make_dirs()
 
+        # The state of a previous run is only kept for incremental primes.
+        previous_state = states.load_step_state(self._part, Step.PRIME)
+
         contents = self._run_step(
             step_info=step_info,
             scriptlet_name="override-prime",
@@ -406,11 +510,23 @@ class PartHandler:
             stderr=stderr,
         )
 
+        if previous_state:
+            self._clean_vanished(
+                Step.PRIME,
+                shared_dir=self._part.prime_dir,
+                previous_state=previous_state,
+                contents=contents,
+            )
+
         self._migrate_overlay_files_to_prime()
 
         if self._part.spec.stage_packages and is_deb_based():
             primed_stage_packages = _get_primed_stage_packages(
-                contents.files, prime_dir=self._part.prime_dir
+                contents.files,
+                prime_dir=self._part.prime_dir,
+                origin_index_path=packages.get_origin_index_path(
+                    self._part.part_packages_dir
+                ),
             )
         else:
             primed_stage_packages = set()
@@ -443,7 +559,10 @@ class PartHandler:
             the step's file and directory artifacts.
         """
         step_env = generate_step_environment(
-            part=self._part, plugin=self._plugin, step_info=step_info
+            part=self._part,
+            plugin=self._plugin,
+            step_info=step_info,
+            cache=self._env_cache,
         )
 
         if step_info.step == Step.BUILD:
@@ -455,30 +574,40 @@ class PartHandler:
                 part_name=step_info.part_name,
                 env=step_env,
                 properties=self._part.plugin_properties,
+                shell_pool=self._shell_pool,
             )
             validator.validate_environment()
 
-        step_handler = StepHandler(
-            self._part,
-            step_info=step_info,
-            plugin=self._plugin,
-            source_handler=self._source_handler,
-            env=step_env,
-            stdout=stdout,
-            stderr=stderr,
-        )
+        with contextlib.ExitStack() as stack:
+            if self._log_multiplexer:
+                stdout, stderr = stack.enter_context(
+                    self._log_multiplexer.capture(
+                        self._part.name, step_info.step, stdout=stdout, stderr=stderr
+                    )
+                )
 
-        scriptlet = self._part.spec.get_scriptlet(step_info.step)
-        if scriptlet is not None:
-            step_handler.run_scriptlet(
-                scriptlet,
-                scriptlet_name=scriptlet_name,
-                step=step_info.step,
-                work_dir=work_dir,
+            step_handler = StepHandler(
+                self._part,
+                step_info=step_info,
+                plugin=self._plugin,
+                source_handler=self._source_handler,
+                env=step_env,
+                stdout=stdout,
+                stderr=stderr,
+                shell_pool=self._shell_pool,
             )
-            return StepContents()
 
-        return step_handler.run_builtin()
+            scriptlet = self._part.spec.get_scriptlet(step_info.step)
+            if scriptlet is not None:
+                step_handler.run_scriptlet(
+                    scriptlet,
+                    scriptlet_name=scriptlet_name,
+                    step=step_info.step,
+                    work_dir=work_dir,
+                )
+                return StepContents()
+
+            return step_handler.run_builtin()
 
     def _compute_layer_hash(self, *, all_parts: bool) -> LayerHash:
         """Obtain the layer verification hash.
@@ -494,12 +623,11 @@ class PartHandler:
 
         :returns: The layer verification hash.
         """
-        part_hash = self._base_layer_hash
-
-        for part in self._part_list:
-            part_hash = LayerHash.for_part(part, previous_layer_hash=part_hash)
-            if not all_parts and part.name == self._part.name:
-                break
+        part_hash: Optional[LayerHash]
+        if all_parts:
+            part_hash = self._layer_hash_chain.get_overlay_hash()
+        else:
+            part_hash = self._layer_hash_chain.get_layer_hash(self._part)
 
         if not part_hash:
             raise RuntimeError("could not compute layer hash")
@@ -625,7 +753,7 @@ class PartHandler:
             source.check_if_outdated(str(state_file))  # required by source.update()
             source.update()
 
-        _remove(self._part.part_install_dir)
+        _remove(self._part.part_install_dir, trash=self._trash)
 
         self._run_build(step_info, stdout=stdout, stderr=stderr, update=True)
 
@@ -679,17 +807,22 @@ class PartHandler:
         migrated_dirs: Set[str] = set()
 
         # process layers from top to bottom (reversed)
-        for part in reversed(parts_with_overlay):
+        layers = list(reversed(parts_with_overlay))
+        visibility = overlays.visible_in_layers(
+            [part.part_layer_dir for part in layers],
+            self._part_info.stage_dir,
+            max_workers=self._part_info.parallel_build_count,
+        )
+
+        for part, (visible_files, visible_dirs) in zip(layers, visibility):
             logger.debug("migrate part %r layer to stage", part.name)
-            visible_files, visible_dirs = overlays.visible_in_layer(
-                part.part_layer_dir, part.stage_dir
-            )
             layer_files, layer_dirs = migration.migrate_files(
                 files=visible_files,
                 dirs=visible_dirs,
                 srcdir=part.part_layer_dir,
                 destdir=part.stage_dir,
                 oci_translation=True,
+                max_workers=self._part_info.parallel_build_count,
             )
             migrated_files |= layer_files
             migrated_dirs |= layer_dirs
@@ -725,11 +858,15 @@ class PartHandler:
         migrated_dirs: Set[str] = set()
 
         # process layers from top to bottom (reversed)
-        for part in reversed(parts_with_overlay):
+        layers = list(reversed(parts_with_overlay))
+        visibility = overlays.visible_in_layers(
+            [part.part_layer_dir for part in layers],
+            self._part_info.prime_dir,
+            max_workers=self._part_info.parallel_build_count,
+        )
+
+        for part, (visible_files, visible_dirs) in zip(layers, visibility):
             logger.debug("migrate part %r layer to prime", part.name)
-            visible_files, visible_dirs = overlays.visible_in_layer(
-                part.part_layer_dir, part.prime_dir
-            )
             layer_files, layer_dirs = migration.migrate_files(
                 files=visible_files,
                 dirs=visible_dirs,
@@ -737,6 +874,7 @@ class PartHandler:
                 destdir=part.prime_dir,
                 oci_translation=True,
                 permissions=part.spec.permissions,
+                max_workers=self._part_info.parallel_build_count,
             )
             migrated_files |= layer_files
             migrated_dirs |= layer_dirs
@@ -784,25 +922,35 @@ class PartHandler:
 
         handler()
         states.remove(self._part, step)
+        self._env_cache.invalidate(*self._get_environment_trees(step))
+
+    def _get_environment_trees(self, step: Step) -> List[Path]:
+        """Obtain the environment trees changed when running or cleaning a step."""
+        if step == Step.BUILD:
+            return [self._part.part_install_dir]
+        if step == Step.STAGE:
+            return [self._part.stage_dir]
+        return []
 
     def _clean_pull(self) -> None:
         """Remove the current part's pull step files and state."""
         # remove dirs where stage packages and snaps are fetched
-        _remove(self._part.part_packages_dir)
-        _remove(self._part.part_snaps_dir)
+        _remove(self._part.part_packages_dir, trash=self._trash)
+        _remove(self._part.part_snaps_dir, trash=self._trash)
 
         # remove the source tree
-        _remove(self._part.part_src_dir)
+        _remove(self._part.part_src_dir, trash=self._trash)
 
     def _clean_overlay(self) -> None:
         """Remove the current part' s layer data and verification hash."""
-        _remove(self._part.part_layer_dir)
-        _remove(self._part.part_state_dir / "layer_hash")
+        _remove(self._part.part_layer_dir, trash=self._trash)
+        _remove(self._part.part_state_dir / "layer_hash", trash=self._trash)
 
     def _clean_build(self) -> None:
         """Remove the current part's build step files and state."""
-        _remove(self._part.part_build_dir)
-        _remove(self._part.part_install_dir)
+        _remove(self._part.part_build_dir, trash=self._trash)
+        _remove(self._part.part_install_dir, trash=self._trash)
+        _remove(self._part.part_state_dir / "build_manifest", trash=self._trash)
 
     def _clean_stage(self) -> None:
         """Remove the current part's stage step files and state."""
@@ -818,23 +966,63 @@ class PartHandler:
         :param step: The step corresponding to the shared directory.
         :param shared_dir: The shared directory to clean.
         """
-        part_states = _load_part_states(step, self._part_list)
         overlay_migration_state = states.load_overlay_migration_state(
             self._part.overlay_dir, step
         )
 
-        migration.clean_shared_area(
-            part_name=self._part.name,
-            shared_dir=shared_dir,
-            part_states=part_states,
-            overlay_migration_state=overlay_migration_state,
-        )
+        # Use the shared area index to find entries owned only by this part.
+        # If the index is out of sync with the part states, clean using the
+        # states and rebuild the index.
+        index_path = states.get_shared_index_path(self._part.parts_dir, step)
+        index = SharedAreaIndex.load(index_path)
+        state_paths = {
+            p.name: states.get_step_state_path(p, step) for p in self._part_list
+        }
+        part_states: Optional[Dict[str, StepState]] = None
+
+        if index.is_current(state_paths):
+            files, directories = index.get_exclusive_entries(
+                self._part.name, part_names=state_paths.keys()
+            )
+            migration.clean_shared_entries(
+                files=files,
+                directories=directories,
+                shared_dir=shared_dir,
+                overlay_migration_state=overlay_migration_state,
+            )
+        else:
+            logger.debug("rebuild shared area index %s", index_path)
+            part_states = _load_part_states(step, self._part_list)
+            index = SharedAreaIndex(index_path)
+            for name in state_paths:
+                state = part_states.get(name)
+                if state and name != self._part.name:
+                    index.add(
+                        name,
+                        files=state.files,
+                        directories=state.directories,
+                        state_path=state_paths[name],
+                    )
+                else:
+                    index.remove(name)
+
+            migration.clean_shared_area(
+                part_name=self._part.name,
+                shared_dir=shared_dir,
+                part_states=part_states,
+                overlay_migration_state=overlay_migration_state,
+            )
+
+        index.remove(self._part.name)
+        index.write()
 
         # remove overlay data if this is the last part with overlay
         if (
             self._part.has_overlay
             and len(_parts_with_overlay_in_step(step, part_list=self._part_list)) == 1
         ):
+            if part_states is None:
+                part_states = _load_part_states(step, self._part_list)
             migration.clean_shared_overlay(
                 shared_dir=shared_dir,
                 part_states=part_states,
@@ -845,6 +1033,62 @@ class PartHandler:
             )
             overlay_migration_state_path.unlink()
 
+    def _syncs_build_dir(self) -> bool:
+        """Verify if the build directory is kept and synchronized with sources.
+
+        Parts with the ``incremental-sync`` build attribute keep their build
+        directory when the build step runs again, so incremental builds can
+        reuse previous build artifacts.
+        """
+        return "incremental-sync" in self._part.spec.build_attributes
+
+    def _can_prime_incrementally(self) -> bool:
+        """Verify if primed files can be updated instead of primed again.
+
+        Only the built-in prime handler migrates a known set of files, so
+        incremental primes are not used with prime overrides or overlays.
+        """
+        if self._part.spec.override_prime or get_parts_with_overlay(
+            part_list=self._part_list
+        ):
+            return False
+
+        return states.get_step_state_path(self._part, Step.PRIME).exists()
+
+    def _clean_vanished(
+        self,
+        step: Step,
+        *,
+        shared_dir: Path,
+        previous_state: StepState,
+        contents: StepContents,
+    ) -> None:
+        """Remove entries migrated by a previous run that are no longer migrated.
+
+        :param step: The step corresponding to the shared directory.
+        :param shared_dir: The shared directory to clean.
+        :param previous_state: The state of the previous run of the step.
+        :param contents: The files and directories migrated in this run.
+        """
+        vanished_files = previous_state.files - contents.files
+        vanished_dirs = previous_state.directories - contents.dirs
+        if not vanished_files and not vanished_dirs:
+            return
+
+        part_states = _load_part_states(step, self._part_list)
+        part_states[self._part.name] = previous_state.copy(
+            update={"files": vanished_files, "directories": vanished_dirs}
+        )
+
+        migration.clean_shared_area(
+            part_name=self._part.name,
+            shared_dir=shared_dir,
+            part_states=part_states,
+            overlay_migration_state=states.load_overlay_migration_state(
+                self._part.overlay_dir, step
+            ),
+        )
+
     def _make_dirs(self):
         dirs = [
             self._part.part_src_dir,
@@ -861,13 +1105,20 @@ class PartHandler:
 
     def _organize(self, *, overwrite=False):
         mapping = self._part.spec.organize_files
-        organize_files(
+        relocations = organize_files(
             part_name=self._part.name,
             mapping=mapping,
             base_dir=self._part.part_install_dir,
             overwrite=overwrite,
         )
 
+        # keep the stage packages origin index in sync with organized files
+        if relocations:
+            packages.relocate_origin_index(
+                packages.get_origin_index_path(self._part.part_packages_dir),
+                relocations,
+            )
+
     def _fetch_stage_packages(self, *, step_info: StepInfo) -> Optional[List[str]]:
         """Download stage packages to the part's package directory.
 
@@ -899,7 +1150,9 @@ class PartHandler:
             return None
 
         packages.snaps.download_snaps(
-            snaps_list=stage_snaps, directory=str(self._part.part_snaps_dir)
+            snaps_list=stage_snaps,
+            directory=str(self._part.part_snaps_dir),
+            max_workers=self._part_info.parallel_build_count,
         )
 
         return stage_snaps
@@ -921,6 +1174,33 @@ class PartHandler:
                 part_name=self._part.name, package_name=err.package_name
             )
 
+    def _get_output_size(self, step: Step, state: StepState) -> int:
+        """Obtain the size of the files produced by a step.
+
+        :param step: The step that was executed.
+        :param state: The state of the executed step.
+
+        :return: The total size in bytes of the files in the part install
+            directory after the build step, or of the files migrated by the
+            part after the stage and prime steps.
+        """
+        if step == Step.BUILD:
+            return _get_tree_size(self._part.part_install_dir)
+
+        if step == Step.STAGE:
+            shared_dir = self._part.stage_dir
+        elif step == Step.PRIME:
+            shared_dir = self._part.prime_dir
+        else:
+            return 0
+
+        size = 0
+        for name in state.files:
+            with contextlib.suppress(OSError):
+                size += os.lstat(shared_dir / name).st_size
+        return size
+
+    @instrumentation.span("unpack")
     def _unpack_stage_packages(self):
         """Extract stage packages contents to the part's install directory."""
         pulled_packages = None
@@ -936,6 +1216,7 @@ class PartHandler:
             stage_packages=pulled_packages,
         )
 
+    @instrumentation.span("unpack")
     def _unpack_stage_snaps(self):
         """Extract stage snap contents to the part's install directory."""
         stage_snaps = self._part.spec.stage_snaps
@@ -950,7 +1231,10 @@ class PartHandler:
         snap_files = iglob(os.path.join(snaps_dir, "*.snap"))
         snap_sources = (
             sources.SnapSource(
-                source=s, part_src_dir=snaps_dir, cache_dir=self._part_info.cache_dir
+                source=s,
+                part_src_dir=snaps_dir,
+                cache_dir=self._part_info.cache_dir,
+                processors=self._part_info.parallel_build_count,
             )
             for s in snap_files
         )
@@ -959,12 +1243,16 @@ class PartHandler:
             snap_source.provision(install_dir, keep=True)
 
 
-def _remove(filename: Path) -> None:
+def _remove(filename: Path, *, trash: Optional[Trash] = None) -> None:
     """Remove the given directory entry.
 
     :param filename: The path to the file or directory to remove.
+    :param trash: The trash to move directories to, if removing them in
+        the background.
     """
-    if filename.is_symlink() or filename.is_file():
+    if trash:
+        trash.discard(filename)
+    elif filename.is_symlink() or filename.is_file():
         logger.debug("remove file %s", filename)
         filename.unlink()
     elif filename.is_dir():
@@ -972,6 +1260,20 @@ def _remove(filename: Path) -> None:
         shutil.rmtree(filename)
 
 
+def _get_tree_size(path: Path) -> int:
+    """Obtain the total size of the files in a directory tree."""
+    size = 0
+    pending = [str(path)]
+    while pending:
+        with contextlib.suppress(OSError), os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                else:
+                    size += entry.stat(follow_symlinks=False).st_size
+    return size
+
+
 def _apply_file_filter(
     *, filter_files: Set[str], filter_dirs: Set[str], destdir: Path
 ) -> None:
@@ -1109,7 +1411,26 @@ def _parts_with_overlay_in_step(step: Step, *, part_list: List[Part]) -> List[Pa
     return [p for p in oparts if states.get_step_state_path(p, step).exists()]
 
 
-def _get_primed_stage_packages(snap_files: Set[str], *, prime_dir: Path) -> Set[str]:
+def _get_primed_stage_packages(
+    snap_files: Set[str], *, prime_dir: Path, origin_index_path: Optional[Path] = None
+) -> Set[str]:
+    """Obtain the stage packages that provided the primed files.
+
+    The origin index written when stage packages were unpacked is used if
+    available, otherwise the origin is read from each file's extended
+    attributes.
+
+    :param snap_files: The primed files, relative to the prime directory.
+    :param prime_dir: The prime directory.
+    :param origin_index_path: The stage packages origin index file path.
+
+    :return: The set of stage packages with files in the prime directory.
+    """
+    if origin_index_path:
+        index = packages.read_origin_index(origin_index_path)
+        if index is not None:
+            return packages.get_origin_stage_packages(index, snap_files)
+
     primed_stage_packages: Set[str] = set()
     for snap_file in snap_files:
         snap_file = str(prime_dir / snap_file)
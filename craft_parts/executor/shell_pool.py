@@ -0,0 +1,389 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2022 Canonical Ltd.
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License version 3 as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Persistent shells to run commands in a build environment."""
+
+import hashlib
+import io
+import logging
+import os
+import selectors
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, TextIO, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+_PART_ENVIRONMENT_MARKER = "## Part environment\n"
+
+Stream = Optional[Union[TextIO, int]]
+
+
+@dataclass(frozen=True)
+class ShellResult:
+    """The result of a command executed in a persistent shell.
+
+    :param returncode: The command exit code.
+    :param stdout: The captured standard output, if requested.
+    :param stderr: The captured standard error, if requested.
+    """
+
+    returncode: int
+    stdout: bytes = b""
+    stderr: bytes = b""
+
+
+class ShellPool:
+    """Reusable shells with a build environment already loaded.
+
+    Starting a shell and sourcing the generated build environment for each
+    command dominates the execution time of small parts. The pool keeps
+    idle shells with the application environment loaded, which is shared by
+    all parts. Each command runs in a subshell forked from one of these
+    shells, that sources the rest of the environment (the part, plugin and
+    user environment) before running the command. Changes made by a command
+    (e.g. to variables, options or the current directory) are not seen by
+    other commands or parts.
+
+    Commands are sent to the shell one line at a time, and the shell replies
+    with the command exit code on a dedicated pipe. The command output is
+    received through FIFOs and forwarded to the requested streams.
+
+    :param max_idle: The maximum number of idle shells to keep.
+    """
+
+    def __init__(self, *, max_idle: int = 8):
+        self._max_idle = max_idle
+        self._idle: "OrderedDict[_Shell, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def run(
+        self,
+        script: str,
+        *,
+        env: str,
+        cwd: Optional[Path] = None,
+        stdout: Stream = subprocess.PIPE,
+        stderr: Stream = subprocess.PIPE,
+    ) -> ShellResult:
+        """Run a script in a shell with the given environment.
+
+        :param script: The script to run.
+        :param env: The environment setup script.
+        :param cwd: The directory to run the script in. If not specified,
+            the current directory is used.
+        :param stdout: Where to send the script output: a file object, a file
+            descriptor, ``None`` to inherit, or ``subprocess.PIPE`` to capture it.
+        :param stderr: Where to send the script error output, as above, or
+            ``subprocess.STDOUT`` to send it with the script output.
+
+        :return: The command exit code and captured output.
+        """
+        shared_env, part_env = _split_environment(env)
+        key = _environment_key(shared_env)
+        shell = self._acquire(key, shared_env)
+
+        try:
+            result = shell.run(
+                script,
+                env=part_env,
+                cwd=cwd or Path.cwd(),
+                stdout=stdout,
+                stderr=stderr,
+            )
+        except BaseException:
+            shell.close()
+            raise
+
+        self._release(shell, key)
+        return result
+
+    def close(self) -> None:
+        """Terminate all idle shells."""
+        with self._lock:
+            shells = list(self._idle)
+            self._idle.clear()
+
+        for shell in shells:
+            shell.close()
+
+    def _acquire(self, key: str, env: str) -> "_Shell":
+        with self._lock:
+            for shell, shell_key in self._idle.items():
+                if shell_key == key:
+                    del self._idle[shell]
+                    return shell
+
+        logger.debug("start persistent shell for environment %s", key[:12])
+        return _Shell(env)
+
+    def _release(self, shell: "_Shell", key: str) -> None:
+        if not shell.alive:
+            shell.close()
+            return
+
+        evicted: List[_Shell] = []
+        with self._lock:
+            self._idle[shell] = key
+            while len(self._idle) > self._max_idle:
+                evicted.append(self._idle.popitem(last=False)[0])
+
+        for idle_shell in evicted:
+            idle_shell.close()
+
+
+class _Shell:
+    """A bash process running commands sent through its standard input."""
+
+    def __init__(self, env: str):
+        self._dir = Path(tempfile.mkdtemp(prefix="craft-parts-shell-"))
+        self._script = self._dir / "script.sh"
+        self._part_env = self._dir / "part-environment.sh"
+        self._out = self._dir / "out"
+        self._err = self._dir / "err"
+        os.mkfifo(self._out)
+        os.mkfifo(self._err)
+
+        # Using RDWR so that opening the FIFOs for writing never blocks, and
+        # reads don't end when a command closes its end.
+        self._out_fd = os.open(self._out, os.O_RDWR | os.O_NONBLOCK)
+        self._err_fd = os.open(self._err, os.O_RDWR | os.O_NONBLOCK)
+
+        env_path = self._dir / "environment.sh"
+        env_path.write_text(env)
+
+        self._reply_fd, reply_write_fd = os.pipe()
+        self._reply_write_fd = reply_write_fd
+        try:
+            self._process = subprocess.Popen(  # pylint: disable=consider-using-with
+                ["/bin/bash", "--noprofile", "--norc", "-s"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                pass_fds=(reply_write_fd,),
+            )
+        finally:
+            os.close(reply_write_fd)
+
+        # Load the environment once, subshells inherit it.
+        if (
+            not self._send(
+                f"source {shlex.quote(str(env_path))} >/dev/null 2>&1 </dev/null"
+            )
+            or self._read_reply() != 0
+        ):
+            logger.debug("persistent shell environment setup failed")
+
+    @property
+    def alive(self) -> bool:
+        """Whether the shell process is still running."""
+        return self._process.poll() is None
+
+    def run(
+        self, script: str, *, env: str, cwd: Path, stdout: Stream, stderr: Stream
+    ) -> ShellResult:
+        """Run a script in a subshell and forward its output.
+
+        :param script: The script to run.
+        :param env: The environment setup to load in the subshell before
+            running the script.
+        """
+        self._script.write_text(script)
+        self._part_env.write_text(env)
+
+        captured_out: List[bytes] = []
+        captured_err: List[bytes] = []
+        write_out = get_stream_writer(stdout, default_fd=1, captured=captured_out)
+        if stderr == subprocess.STDOUT:
+            write_err = write_out
+        else:
+            write_err = get_stream_writer(stderr, default_fd=2, captured=captured_err)
+
+        command = (
+            f"(cd {shlex.quote(str(cwd))}"
+            f" && source {shlex.quote(str(self._part_env))}"
+            f" && source {shlex.quote(str(self._script))})"
+            f" >{shlex.quote(str(self._out))} 2>{shlex.quote(str(self._err))}"
+            f" </dev/null {self._reply_write_fd}>&-"
+        )
+        if not self._send(command):
+            return ShellResult(returncode=self._exit_code())
+
+        writers: Dict[int, Callable[[bytes], None]] = {
+            self._out_fd: write_out,
+            self._err_fd: write_err,
+        }
+        reply = b""
+
+        with selectors.DefaultSelector() as selector:
+            for fd in (self._out_fd, self._err_fd, self._reply_fd):
+                selector.register(fd, selectors.EVENT_READ)
+
+            while not reply.endswith(b"\n"):
+                for key, _ in selector.select():
+                    if key.fd != self._reply_fd:
+                        _forward(key.fd, writers[key.fd])
+                        continue
+
+                    data = os.read(self._reply_fd, 64)
+                    if not data:
+                        # The shell died while running the command.
+                        return ShellResult(returncode=self._exit_code())
+                    reply += data
+
+        # The subshell exited before replying, all its output is buffered.
+        _forward(self._out_fd, write_out)
+        _forward(self._err_fd, write_err)
+
+        return ShellResult(
+            returncode=int(reply),
+            stdout=b"".join(captured_out),
+            stderr=b"".join(captured_err),
+        )
+
+    def close(self) -> None:
+        """Terminate the shell and remove its files."""
+        if self._process.stdin:
+            try:
+                self._process.stdin.close()
+            except BrokenPipeError:
+                pass
+        try:
+            self._process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+
+        for fd in (self._out_fd, self._err_fd, self._reply_fd):
+            os.close(fd)
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _send(self, command: str) -> bool:
+        """Send a command line followed by the exit code reply."""
+        line = f'{command}; echo "$?" >&{self._reply_write_fd}\n'
+        try:
+            self._process.stdin.write(line.encode())  # type: ignore
+            self._process.stdin.flush()  # type: ignore
+        except BrokenPipeError:
+            return False
+        return True
+
+    def _read_reply(self) -> Optional[int]:
+        reply = b""
+        while not reply.endswith(b"\n"):
+            data = os.read(self._reply_fd, 64)
+            if not data:
+                return None
+            reply += data
+        return int(reply)
+
+    def _exit_code(self) -> int:
+        returncode = self._process.wait()
+        logger.debug("persistent shell exited with code %d", returncode)
+        return returncode if returncode else -1
+
+
+def _split_environment(env: str) -> Tuple[str, str]:
+    """Split a step environment into its shared and part-specific sections.
+
+    The application environment comes first in the environments created by
+    :func:`generate_step_environment`, and is followed by the part
+    environment. Environments in a different format are not split.
+
+    :param env: The environment setup script.
+
+    :return: A tuple containing the application environment and the rest of
+        the environment.
+    """
+    marker = env.find(_PART_ENVIRONMENT_MARKER)
+    if marker < 0:
+        return env, ""
+    return env[:marker], env[marker:]
+
+
+def _environment_key(env: str) -> str:
+    """Identify the shells that can run commands in the given environment.
+
+    Shells also inherit the environment of this process, which may change
+    between commands.
+    """
+    digest = hashlib.sha256(env.encode())
+    for name, value in sorted(os.environ.items()):
+        digest.update(f"\0{name}={value}".encode())
+    return digest.hexdigest()
+
+
+def get_stream_writer(
+    stream: Stream, *, default_fd: int, captured: Optional[List[bytes]] = None
+) -> Callable[[bytes], None]:
+    """Create a function to send command output to a stream.
+
+    :param stream: A file object, a file descriptor, ``None`` to write to the
+        default file descriptor, ``subprocess.DEVNULL`` to discard the output,
+        or ``subprocess.PIPE`` to append it to the captured list.
+    :param default_fd: The file descriptor to write to if no stream is given.
+    :param captured: The list to store captured output in.
+
+    :return: A function writing data to the stream.
+    """
+    if stream == subprocess.PIPE:
+        if captured is None:
+            raise ValueError("captured output list not specified")
+        return captured.append
+
+    if stream == subprocess.DEVNULL:
+        return lambda data: None
+
+    if stream is None:
+        return lambda data: _write_fd(default_fd, data)
+
+    if isinstance(stream, int):
+        return lambda data: _write_fd(stream, data)  # type: ignore
+
+    try:
+        fd = stream.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        encoding = getattr(stream, "encoding", None) or sys.getfilesystemencoding()
+        return lambda data: stream.write(  # type: ignore
+            data.decode(encoding, errors="replace")
+        )
+
+    stream.flush()
+    return lambda data: _write_fd(fd, data)
+
+
+def _write_fd(fd: int, data: bytes) -> None:
+    while data:
+        data = data[os.write(fd, data) :]
+
+
+def _forward(fd: int, write: Callable[[bytes], None]) -> None:
+    """Forward all data available in a non-blocking file descriptor."""
+    while True:
+        try:
+            data = os.read(fd, 65536)
+        except BlockingIOError:
+            return
+        if not data:
+            return
+        write(data)
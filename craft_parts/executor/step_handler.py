@@ -16,17 +16,19 @@
 
 """Handle the execution of built-in or user specified step commands."""
 
+import contextlib
 import dataclasses
 import functools
 import json
 import logging
 import os
+import selectors
 import subprocess
 import tempfile
 import textwrap
-import time
+import threading
 from pathlib import Path
-from typing import List, Optional, Set, TextIO, Union
+from typing import Iterator, List, Optional, Set, TextIO, Tuple, Union
 
 from craft_parts import errors, packages
 from craft_parts.infos import StepInfo
@@ -39,6 +41,7 @@ from craft_parts.utils import file_utils
 from . import filesets
 from .filesets import Fileset
 from .migration import migrate_files
+from .shell_pool import ShellPool
 
 logger = logging.getLogger(__name__)
 
@@ -75,6 +78,7 @@ class StepHandler:
         env: str,
         stdout: Stream = None,
         stderr: Stream = None,
+        shell_pool: Optional[ShellPool] = None,
     ):
         self._part = part
         self._step_info = step_info
@@ -83,6 +87,7 @@ class StepHandler:
         self._env = env
         self._stdout = stdout
         self._stderr = stderr
+        self._shell_pool = shell_pool
 
     def run_builtin(self) -> StepContents:
         """Run the built-in commands for the current step."""
@@ -138,6 +143,11 @@ class StepHandler:
                 print(build_command, file=run_file)
 
         build_script_path.chmod(0o755)
+
+        if self._shell_pool:
+            self._run_build_commands(plugin_build_commands, build_script_path)
+            return StepContents()
+
         logger.debug("Executing %r", build_script_path)
 
         try:
@@ -153,6 +163,29 @@ class StepHandler:
 
         return StepContents()
 
+    def _run_build_commands(self, commands: List[str], build_script_path: Path):
+        """Run the build commands in a shell with the build environment loaded.
+
+        :param commands: The build commands to run.
+        :param build_script_path: The build script equivalent to the commands.
+        """
+        logger.debug("Executing %r in a persistent shell", build_script_path)
+
+        script = "\n".join(["set -euo pipefail", "set -x", *commands])
+        result = self._shell_pool.run(  # type: ignore
+            script,
+            env=self._env,
+            cwd=self._part.part_build_subdir,
+            stdout=self._stdout,
+            stderr=self._stderr,
+        )
+
+        if result.returncode != 0:
+            process_error = subprocess.CalledProcessError(
+                result.returncode, [str(build_script_path)]
+            )
+            raise errors.PluginBuildError(part_name=self._part.name) from process_error
+
     def _builtin_stage(self) -> StepContents:
         stage_fileset = Fileset(self._part.spec.stage_files, name="stage")
         srcdir = str(self._part.part_install_dir)
@@ -175,6 +208,7 @@ class StepHandler:
             srcdir=self._part.part_install_dir,
             destdir=self._part.stage_dir,
             fixup_func=pkgconfig_fixup,
+            max_workers=self._step_info.parallel_build_count,
         )
         return StepContents(files, dirs)
 
@@ -195,6 +229,7 @@ class StepHandler:
             srcdir=self._part.stage_dir,
             destdir=self._part.prime_dir,
             permissions=self._part.spec.permissions,
+            max_workers=self._step_info.parallel_build_count,
         )
         # TODO: handle elf dependencies
 
@@ -233,8 +268,6 @@ class StepHandler:
                 {scriptlet}"""
             )
 
-            # FIXME: refactor ctl protocol server
-
             with tempfile.TemporaryFile(mode="w+") as script_file:
                 print(script, file=script_file)
                 script_file.flush()
@@ -247,24 +280,14 @@ class StepHandler:
                     stderr=self._stderr,
                 )
 
-            status = None
             try:
-                while status is None:
-                    function_call = call_fifo.read()
-                    if not function_call:
-                        status = process.poll()
-                        time.sleep(0.1)  # Don't loop TOO busily
-                        continue
-
-                    # Handle the function and send feedback to caller.
-                    try:
-                        retval = self._handle_control_api(
-                            step, scriptlet_name, function_call.strip()
-                        )
-                        feedback_fifo.write(f"OK {retval!s}\n" if retval else "OK\n")
-                    except errors.PartsError as error:
-                        feedback_fifo.write(f"ERR {error!s}\n")
-
+                self._serve_control_calls(
+                    process,
+                    call_fifo=call_fifo,
+                    feedback_fifo=feedback_fifo,
+                    step=step,
+                    scriptlet_name=scriptlet_name,
+                )
             except Exception as error:
                 logger.debug("scriptlet execution failed: %s", error)
                 raise error
@@ -276,9 +299,64 @@ class StepHandler:
                 raise errors.ScriptletRunError(
                     part_name=self._part.name,
                     scriptlet_name=scriptlet_name,
-                    exit_code=status,
+                    exit_code=process.returncode,
                 )
 
+    def _serve_control_calls(
+        self,
+        process: subprocess.Popen,
+        *,
+        call_fifo: file_utils.NonBlockingRWFifo,
+        feedback_fifo: file_utils.NonBlockingRWFifo,
+        step: Step,
+        scriptlet_name: str,
+    ) -> None:
+        """Handle control calls until the scriptlet process exits.
+
+        The server sleeps until a control call is received or the scriptlet
+        process exits, so calls are answered and the process exit is noticed
+        without delay.
+
+        :param process: The scriptlet process.
+        :param call_fifo: The FIFO to receive control calls from.
+        :param feedback_fifo: The FIFO to send control call results to.
+        :param step: The step running the scriptlet.
+        :param scriptlet_name: The name of the scriptlet.
+        """
+        pending = ""
+
+        with selectors.DefaultSelector() as selector, _process_exit_fd(
+            process
+        ) as exit_fd:
+            selector.register(call_fifo.fileno(), selectors.EVENT_READ)
+            selector.register(exit_fd, selectors.EVENT_READ)
+
+            while True:
+                events = selector.select()
+
+                # Answer calls before verifying if the process exited, so a
+                # call sent just before exiting is not lost.
+                pending += call_fifo.read()
+                calls, pending = _split_control_calls(pending)
+                for function_call in calls:
+                    # Handle the function and send feedback to caller.
+                    try:
+                        retval = self._handle_control_api(
+                            step, scriptlet_name, function_call
+                        )
+                        feedback_fifo.write(f"OK {retval!s}\n" if retval else "OK\n")
+                    except errors.PartsError as error:
+                        feedback_fifo.write(f"ERR {error!s}\n")
+
+                if any(key.fd == exit_fd for key, _ in events):
+                    break
+
+        process.wait()
+
+        # A truncated call left by the exiting scriptlet is reported as invalid.
+        if pending.strip():
+            self._handle_control_api(step, scriptlet_name, pending.strip())
+
     def _handle_control_api(
         self, step: Step, scriptlet_name: str, function_call: str
     ) -> str:
@@ -378,3 +456,71 @@ class StepHandler:
             self._builtin_stage()
         elif step == Step.PRIME:
             self._builtin_prime()
+
+
+def _split_control_calls(data: str) -> Tuple[List[str], str]:
+    """Split the data received from control clients into calls.
+
+    Each control call is a JSON object. Clients don't delimit calls, so
+    calls are separated by decoding consecutive objects, and a truncated
+    object is kept until the rest of the call is received.
+
+    :param data: The data received from control clients.
+
+    :return: A tuple containing the list of complete calls, and the
+        remaining data to be completed by the next read.
+    """
+    decoder = json.JSONDecoder()
+    calls: List[str] = []
+    data = data.lstrip()
+
+    while data:
+        try:
+            _, end = decoder.raw_decode(data)
+        except json.JSONDecodeError as err:
+            if err.pos >= len(data) or err.msg.startswith("Unterminated string"):
+                break
+            # Let the handler report the invalid call.
+            calls.append(data.strip())
+            return calls, ""
+
+        calls.append(data[:end])
+        data = data[end:].lstrip()
+
+    return calls, data
+
+
+@contextlib.contextmanager
+def _process_exit_fd(process: subprocess.Popen) -> Iterator[int]:
+    """Obtain a file descriptor that becomes readable when a process exits.
+
+    :param process: The process to wait for.
+
+    :return: A context manager returning a process file descriptor if
+        supported by the system, or the read end of a pipe closed by a
+        thread waiting for the process otherwise.
+    """
+    try:
+        pidfd = os.pidfd_open(process.pid)  # type: ignore
+    except (AttributeError, OSError):
+        pass
+    else:
+        try:
+            yield pidfd
+        finally:
+            os.close(pidfd)
+        return
+
+    read_fd, write_fd = os.pipe()
+
+    def _wait():
+        try:
+            process.wait()
+        finally:
+            os.close(write_fd)
+
+    threading.Thread(target=_wait, daemon=True).start()
+    try:
+        yield read_fd
+    finally:
+        os.close(read_fd)
@@ -0,0 +1,192 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2022 Canonical Ltd.
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License version 3 as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Deferred removal of work directories."""
+
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Trash:
+    """Remove directories in the background.
+
+    Directories to remove are atomically renamed to an entry in the trash
+    directory, which must be in the same filesystem, and removed later by
+    background workers. Each subtree of a trashed directory is removed by
+    a separate worker. A directory is never left partially removed in its
+    original location: if the process is interrupted, remaining trash
+    entries are removed the next time the trash is opened.
+
+    :param trash_dir: The directory to move entries to be removed to.
+    :param max_workers: The maximum number of subtrees to remove concurrently.
+    """
+
+    def __init__(self, trash_dir: Path, *, max_workers: int = 1):
+        self._trash_dir = trash_dir
+        self._max_workers = max(max_workers, 1)
+        self._queue: "queue.Queue[Tuple[Path, str]]" = queue.Queue()
+        self._workers: List[threading.Thread] = []
+        self._pending: Dict[Path, int] = {}
+        self._lock = threading.Condition()
+
+        # Remove leftovers from a previous interrupted execution.
+        try:
+            with os.scandir(trash_dir) as entries:
+                stale = [Path(entry.path) for entry in entries]
+        except FileNotFoundError:
+            stale = []
+
+        for entry in stale:
+            logger.debug("remove stale trash entry %s", entry)
+            self._schedule(entry)
+
+    def discard(self, path: Path) -> None:
+        """Remove the given directory entry.
+
+        Directories are moved to the trash and removed in the background.
+        Other entries, or directories that can't be moved to the trash, are
+        removed immediately.
+
+        :param path: The path to the file or directory to remove.
+        """
+        if path.is_symlink() or not path.is_dir():
+            if path.exists() or path.is_symlink():
+                logger.debug("remove file %s", path)
+                path.unlink()
+            return
+
+        self._trash_dir.mkdir(parents=True, exist_ok=True)
+        entry = Path(tempfile.mkdtemp(prefix=path.name + "-", dir=self._trash_dir))
+
+        try:
+            os.rename(path, entry / path.name)
+        except OSError as err:
+            # E.g. crossing filesystem boundaries or a busy mountpoint.
+            logger.debug("cannot move %s to trash: %s", path, err)
+            os.rmdir(entry)
+            logger.debug("remove directory %s", path)
+            shutil.rmtree(path)
+            return
+
+        logger.debug("moved directory %s to trash", path)
+        self._schedule(entry)
+
+    def pending(self) -> List[Path]:
+        """Obtain the trash entries not yet removed.
+
+        :return: The list of trash entries waiting to be removed.
+        """
+        with self._lock:
+            return sorted(self._pending)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all pending entries are removed.
+
+        :param timeout: The maximum time to wait, in seconds. If not specified,
+            wait until all entries are removed.
+
+        :return: Whether all pending entries were removed.
+        """
+        with self._lock:
+            return self._lock.wait_for(lambda: not self._pending, timeout)
+
+    def _schedule(self, entry: Path) -> None:
+        """Queue the subtrees of a trash entry for removal."""
+        try:
+            names = _list_subtrees(entry)
+        except NotADirectoryError:
+            entry.unlink()
+            return
+        except OSError as err:
+            logger.warning("cannot remove trash entry %s: %s", entry, err)
+            return
+
+        if not names:
+            os.rmdir(entry)
+            return
+
+        with self._lock:
+            self._pending[entry] = len(names)
+
+        for name in names:
+            self._queue.put((entry, name))
+
+        self._start_workers()
+
+    def _start_workers(self) -> None:
+        while len(self._workers) < self._max_workers:
+            # Daemon workers don't delay the interpreter exit; entries not
+            # yet removed are removed when the trash is opened again.
+            worker = threading.Thread(target=self._work, daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def _work(self) -> None:
+        while True:
+            entry, name = self._queue.get()
+            path = entry / name
+            try:
+                if path.is_symlink() or not path.is_dir():
+                    path.unlink()
+                else:
+                    shutil.rmtree(path)
+            except OSError as err:
+                logger.warning("cannot remove trash entry %s: %s", path, err)
+
+            with self._lock:
+                self._pending[entry] -= 1
+                if self._pending[entry]:
+                    continue
+
+                shutil.rmtree(entry, ignore_errors=True)
+                del self._pending[entry]
+                self._lock.notify_all()
+
+
+def _list_subtrees(entry: Path) -> List[str]:
+    """Split a trash entry into subtrees that can be removed concurrently.
+
+    Trashed directories are split into their children, so that the contents
+    of a single large directory are removed in parallel.
+
+    :param entry: The trash entry to split.
+
+    :return: The list of subtree paths relative to the trash entry.
+    """
+    subtrees: List[str] = []
+    with os.scandir(entry) as it:
+        for child in it:
+            if child.is_dir(follow_symlinks=False):
+                try:
+                    with os.scandir(child.path) as grandchildren:
+                        names = [
+                            os.path.join(child.name, x.name) for x in grandchildren
+                        ]
+                except OSError:
+                    names = []
+                if names:
+                    subtrees.extend(names)
+                    continue
+            subtrees.append(child.name)
+    return subtrees
@@ -60,6 +60,9 @@ class ProjectInfo:
     :param project_vars_part_name: Project variables can be set only if
         the part name matches this name.
     :param project_vars: A dictionary containing the project variables.
+    :param build_caches: Whether to keep compiler and package caches used
+        by plugins across builds.
+    :param build_cache_size: The maximum total size of build caches, in bytes.
     :param custom_args: Any additional arguments defined by the application
         when creating a :class:`LifecycleManager`.
     """
@@ -76,6 +79,8 @@ class ProjectInfo:
         project_name: Optional[str] = None,
         project_vars_part_name: Optional[str] = None,
         project_vars: Optional[Dict[str, str]] = None,
+        build_caches: bool = False,
+        build_cache_size: Optional[int] = None,
         **custom_args,  # custom passthrough args
     ):
         if not project_dirs:
@@ -92,6 +97,8 @@ class ProjectInfo:
         self._project_name = project_name
         self._project_vars_part_name = project_vars_part_name
         self._project_vars = {k: ProjectVar(value=v) for k, v in pvars.items()}
+        self._build_caches = build_caches
+        self._build_cache_size = build_cache_size
         self._custom_args = custom_args
         self.global_environment: Dict[str, str] = {}
 
@@ -136,6 +143,16 @@ class ProjectInfo:
         """Return the maximum allowable number of concurrent build jobs."""
         return self._parallel_build_count
 
+    @property
+    def build_caches(self) -> bool:
+        """Return whether compiler and package caches are kept across builds."""
+        return self._build_caches
+
+    @property
+    def build_cache_size(self) -> Optional[int]:
+        """Return the maximum total size of build caches, in bytes."""
+        return self._build_cache_size
+
     @property
     def host_arch(self) -> str:
         """Return the host architecture used for debs, snaps and charms."""
@@ -0,0 +1,495 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2022 Canonical Ltd.
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License version 3 as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Timing and resource usage of lifecycle actions and internal phases.
+
+Instrumentation is disabled unless a :class:`Recorder` is active. While
+recording, each lifecycle action and internal phase (e.g. planning, stage
+collision checks, file migration) is recorded as a span with its duration.
+Actions also record the processor time and peak memory usage of the
+processes they executed, and the size of the files they produced.
+
+Spans can also be profiled with :mod:`cProfile` while a :class:`Profiler`
+is active, independently of recording.
+"""
+
+import contextlib
+import cProfile
+import json
+import logging
+import os
+import pstats
+import re
+import resource
+import shutil
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, DefaultDict, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_STATS_NAME_RE = re.compile(r"[^\w.-]+")
+
+
+@dataclass(frozen=True)
+class Span:
+    """A timed section of the lifecycle processing.
+
+    :param name: The span name.
+    :param category: The span category, ``action`` for lifecycle actions and
+        ``phase`` for internal phases.
+    :param start: The start time in seconds, relative to the recording start.
+    :param duration: The span duration in seconds.
+    :param thread_id: The identifier of the thread running the span.
+    :param args: Additional span information.
+    """
+
+    name: str
+    category: str
+    start: float
+    duration: float
+    thread_id: int
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+class Recorder:
+    """Collect spans while the lifecycle is processed."""
+
+    def __init__(self) -> None:
+        self._origin = time.perf_counter()
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    @property
+    def spans(self) -> List[Span]:
+        """Return the spans recorded so far."""
+        with self._lock:
+            return list(self._spans)
+
+    def add(self, span: Span) -> None:
+        """Add a span to the recording.
+
+        :param span: The span to add.
+        """
+        with self._lock:
+            self._spans.append(span)
+
+    def elapsed(self, timestamp: float) -> float:
+        """Convert a performance counter value to a recording time."""
+        return timestamp - self._origin
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Obtain the recorded spans in the Chrome trace event format.
+
+        The trace can be loaded in ``chrome://tracing`` or Perfetto.
+
+        :return: A dictionary containing the trace events.
+        """
+        pid = os.getpid()
+        events = [
+            {
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": round(span.start * 1e6),
+                "dur": round(span.duration * 1e6),
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": span.args,
+            }
+            for span in self.spans
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: Path) -> None:
+        """Write the recorded spans to a Chrome trace event file.
+
+        :param path: The path to the trace file.
+        """
+        path.write_text(json.dumps(self.chrome_trace()))
+
+    def summary(self) -> str:
+        """Obtain a table summarizing the recorded actions and phases.
+
+        :return: The formatted summary table.
+        """
+        lines = [
+            f"{'Action':<32} {'Wall (s)':>9} {'CPU (s)':>9} "
+            f"{'Max RSS (MiB)':>14} {'Written (MiB)':>14}"
+        ]
+        phases: Dict[str, Tuple[int, float]] = {}
+
+        for span in self.spans:
+            if span.category == "action":
+                lines.append(
+                    f"{span.name:<32} {span.duration:>9.3f} "
+                    f"{span.args.get('child_cpu_time', 0.0):>9.3f} "
+                    f"{span.args.get('max_rss', 0) / 2**20:>14.1f} "
+                    f"{span.args.get('bytes_written', 0) / 2**20:>14.1f}"
+                )
+            else:
+                count, total = phases.get(span.name, (0, 0.0))
+                phases[span.name] = (count + 1, total + span.duration)
+
+        lines.append("")
+        lines.append(f"{'Phase':<32} {'Count':>9} {'Total (s)':>9}")
+        for name, (count, total) in sorted(phases.items()):
+            lines.append(f"{name:<32} {count:>9} {total:>9.3f}")
+
+        return "\n".join(lines)
+
+
+class Profiler:
+    """Profile the outermost span of each thread with cProfile.
+
+    The statistics of each profiled span are written to a numbered
+    ``.pstats`` file in the profile directory, and its call stacks are
+    appended to a collapsed stack file shared by all spans, using the span
+    name as the root frame. The collapsed stack file can be converted to a
+    flame graph by tools such as ``flamegraph.pl`` or speedscope.
+
+    Spans nested in a profiled span (e.g. file migration during a lifecycle
+    action) are included in the statistics of the outer span.
+
+    :param profile_dir: The directory to write profiling data to. Existing
+        profiling data in this directory is removed.
+    """
+
+    def __init__(self, profile_dir: Path):
+        self._profile_dir = profile_dir
+        self._count = 0
+        self._lock = threading.Lock()
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+    @property
+    def profile_dir(self) -> Path:
+        """Return the directory containing the profiling data."""
+        return self._profile_dir
+
+    @property
+    def collapsed_stacks_path(self) -> Path:
+        """Return the path to the collapsed stack file."""
+        return self._profile_dir / "profile.collapsed"
+
+    def begin(self) -> Optional[cProfile.Profile]:
+        """Start profiling a span in the current thread.
+
+        :return: The active profile, or None if a span is already being
+            profiled in this thread or if profiling is not available.
+        """
+        if getattr(_local, "profiling", False):
+            return None
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as err:
+            # Another profiler is already active in this interpreter.
+            logger.debug("cannot profile span: %s", err)
+            return None
+
+        _local.profiling = True
+        return profile
+
+    def end(self, name: str, profile: cProfile.Profile) -> None:
+        """Stop profiling a span and write its profiling data.
+
+        :param name: The span name.
+        :param profile: The profile returned when the span started.
+        """
+        profile.disable()
+        _local.profiling = False
+
+        stats = pstats.Stats(profile)
+        stacks = _collapse_stacks(stats.stats)  # type: ignore
+        root = name.replace(";", ":")
+        lines = [
+            f"{root};{';'.join(stack)} {round(duration * 1e6)}\n"
+            for stack, duration in stacks.items()
+            if round(duration * 1e6) > 0
+        ]
+
+        with self._lock:
+            self._count += 1
+            filename = f"{self._count:03d}-{_STATS_NAME_RE.sub('-', name)}.pstats"
+            self._profile_dir.mkdir(parents=True, exist_ok=True)
+            stats.dump_stats(self._profile_dir / filename)
+            with self.collapsed_stacks_path.open("a") as collapsed:
+                collapsed.writelines(lines)
+
+
+_recorder: Optional[Recorder] = None
+_profiler: Optional[Profiler] = None
+_local = threading.local()
+
+
+def start_recording() -> Recorder:
+    """Start recording spans.
+
+    :return: The active recorder.
+    """
+    global _recorder  # pylint: disable=global-statement
+    _recorder = Recorder()
+    return _recorder
+
+
+def stop_recording() -> None:
+    """Stop recording spans."""
+    global _recorder  # pylint: disable=global-statement
+    _recorder = None
+
+
+def get_recorder() -> Optional[Recorder]:
+    """Obtain the active recorder.
+
+    :return: The active recorder, or None if not recording.
+    """
+    return _recorder
+
+
+@contextlib.contextmanager
+def recording() -> Iterator[Recorder]:
+    """Record spans while the context is active.
+
+    :return: A context manager returning the active recorder.
+    """
+    recorder = start_recording()
+    try:
+        yield recorder
+    finally:
+        stop_recording()
+
+
+def start_profiling(profile_dir: Path) -> Profiler:
+    """Start profiling spans.
+
+    :param profile_dir: The directory to write profiling data to.
+
+    :return: The active profiler.
+    """
+    global _profiler  # pylint: disable=global-statement
+    _profiler = Profiler(profile_dir)
+    return _profiler
+
+
+def stop_profiling() -> None:
+    """Stop profiling spans."""
+    global _profiler  # pylint: disable=global-statement
+    _profiler = None
+
+
+@contextlib.contextmanager
+def profiling(profiler: Optional[Profiler]) -> Iterator[None]:
+    """Profile spans with the given profiler while the context is active.
+
+    The previously active profiler is restored when the context exits. The
+    active profiler is left unchanged if no profiler is given.
+
+    :param profiler: The profiler to use, if any.
+    """
+    if profiler is None:
+        yield
+        return
+
+    global _profiler  # pylint: disable=global-statement
+    previous = _profiler
+    _profiler = profiler
+    try:
+        yield
+    finally:
+        _profiler = previous
+
+
+def get_profiler() -> Optional[Profiler]:
+    """Obtain the active profiler.
+
+    :return: The active profiler, or None if not profiling.
+    """
+    return _profiler
+
+
+@contextlib.contextmanager
+def span(name: str, *, category: str = "phase", **args: Any) -> Iterator[None]:
+    """Record the duration of a section of the lifecycle processing.
+
+    Nothing is recorded if no recorder is active. If a profiler is active,
+    the span is also profiled unless it's nested in a profiled span.
+
+    :param name: The span name.
+    :param category: The span category.
+    :param args: Additional span information.
+    """
+    recorder = _recorder
+    profiler = _profiler
+    if recorder is None and profiler is None:
+        yield
+        return
+
+    stack = _span_stack()
+    stack.append(args)
+    start = time.perf_counter()
+    profile = profiler.begin() if profiler else None
+    try:
+        yield
+    finally:
+        if profiler and profile:
+            profiler.end(name, profile)
+        duration = time.perf_counter() - start
+        stack.pop()
+        if recorder is None:
+            return
+        recorder.add(
+            Span(
+                name=name,
+                category=category,
+                start=recorder.elapsed(start),
+                duration=duration,
+                thread_id=threading.get_ident(),
+                args=args,
+            )
+        )
+
+
+@contextlib.contextmanager
+def action_span(name: str, **args: Any) -> Iterator[None]:
+    """Record the duration and resource usage of a lifecycle action.
+
+    In addition to the span duration, the processor time used by child
+    processes that finished during the action and the peak memory usage of
+    all child processes so far are recorded.
+
+    :param name: The action name.
+    :param args: Additional span information.
+    """
+    if _recorder is None:
+        with span(name, category="action", **args):
+            yield
+        return
+
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    with span(name, category="action", **args):
+        try:
+            yield
+        finally:
+            after = resource.getrusage(resource.RUSAGE_CHILDREN)
+            annotate(
+                child_cpu_time=(after.ru_utime - before.ru_utime)
+                + (after.ru_stime - before.ru_stime),
+                # ru_maxrss is in kilobytes on Linux.
+                max_rss=after.ru_maxrss * 1024,
+            )
+
+
+def annotate(**args: Any) -> None:
+    """Add information to the innermost span running in this thread.
+
+    Nothing is added if no recorder is active.
+
+    :param args: Additional span information.
+    """
+    if _recorder is None:
+        return
+
+    stack = _span_stack()
+    if stack:
+        stack[-1].update(args)
+
+
+def is_recording() -> bool:
+    """Verify whether spans are being recorded.
+
+    :return: Whether a recorder is active.
+    """
+    return _recorder is not None
+
+
+def is_profiling() -> bool:
+    """Verify whether spans are being profiled.
+
+    :return: Whether a profiler is active.
+    """
+    return _profiler is not None
+
+
+def _span_stack() -> List[Dict[str, Any]]:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+_FuncKey = Tuple[str, int, str]
+
+
+def _collapse_stacks(
+    stats: Dict[_FuncKey, Tuple[int, int, float, float, Dict[_FuncKey, Any]]],
+    *,
+    max_depth: int = 128,
+    min_duration: float = 1e-6,
+) -> Dict[Tuple[str, ...], float]:
+    """Estimate the time spent in each call stack from cProfile statistics.
+
+    cProfile only records caller and callee pairs, so the time of a function
+    called from several places is split between its call stacks in the
+    proportion of the time spent in it when called from each caller.
+
+    :param stats: The cProfile statistics.
+    :param max_depth: The maximum call stack depth.
+    :param min_duration: The duration below which call stacks are ignored.
+
+    :return: A dictionary mapping call stacks, outermost function first, to
+        the time spent in the innermost function in seconds.
+    """
+    callees: DefaultDict[_FuncKey, List[Tuple[_FuncKey, float]]] = defaultdict(list)
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, (_, _, _, caller_cumtime) in callers.items():
+            callees[caller].append((func, caller_cumtime))
+
+    stacks: DefaultDict[Tuple[str, ...], float] = defaultdict(float)
+    pending: List[Tuple[_FuncKey, Tuple[_FuncKey, ...], float]] = [
+        (func, (func,), 1.0) for func, entry in stats.items() if not entry[4]
+    ]
+
+    while pending:
+        func, path, fraction = pending.pop()
+        _, _, tottime, cumtime, _ = stats[func]
+        if cumtime * fraction < min_duration and tottime * fraction < min_duration:
+            continue
+
+        stacks[tuple(_frame_label(key) for key in path)] += tottime * fraction
+        if len(path) >= max_depth:
+            continue
+
+        for callee, edge_cumtime in callees[func]:
+            callee_cumtime = stats[callee][3]
+            if callee in path or callee_cumtime <= 0:
+                continue
+            callee_fraction = fraction * edge_cumtime / callee_cumtime
+            pending.append((callee, path + (callee,), min(callee_fraction, 1.0)))
+
+    return dict(stacks)
+
+
+def _frame_label(func: _FuncKey) -> str:
+    filename, line, name = func
+    if filename == "~":
+        label = name
+    else:
+        label = f"{name} ({os.path.basename(filename)}:{line})"
+    return label.replace(";", ":")
@@ -24,7 +24,14 @@ from typing import Any, Dict, List, Optional, Sequence, Union, cast
 
 from pydantic import ValidationError
 
-from craft_parts import errors, executor, packages, plugins, sequencer
+from craft_parts import (
+    errors,
+    executor,
+    instrumentation,
+    packages,
+    plugins,
+    sequencer,
+)
 from craft_parts.actions import Action
 from craft_parts.dirs import ProjectDirs
 from craft_parts.infos import ProjectInfo
@@ -71,6 +78,26 @@ class LifecycleManager:
     :param project_vars_part_name: Project variables can only be set in the part
         matching this name.
     :param project_vars: A dictionary containing project variables.
+    :param build_caches: Keep the compiler and package caches used by plugins
+        (such as Go, Cargo, npm and pip caches) under the cache directory, so
+        they can be reused by subsequent builds.
+    :param build_cache_size: The maximum total size of build caches in bytes.
+        Least recently used caches are evicted when the limit is exceeded.
+    :param fast_clean: Move work directories to a trash area when cleaning, and
+        remove them in the background. Use :meth:`wait_for_removals` to wait
+        until all trashed directories are removed.
+    :param persistent_shells: Run build commands and plugin environment
+        validation commands in reusable shells with the build environment
+        already loaded, instead of starting a new shell for each of them.
+    :param part_logs: Also write the output of step commands to a log file
+        for each part. Use :meth:`part_log_tail` to obtain the most recent
+        output of a part while it's being processed.
+    :param profile: Profile planning, state loading, the execution prologue,
+        each lifecycle action and file migration with cProfile, and write
+        the statistics of each of them and a collapsed stack file for flame
+        graphs to the ``.profile`` directory under the work directory.
+        Profiling can also be enabled by setting the ``CRAFT_PARTS_PROFILE``
+        environment variable to ``1``.
     :param custom_args: Any additional arguments that will be passed directly
         to :ref:`callbacks<callbacks>`.
     """
@@ -94,6 +121,12 @@ class LifecycleManager:
         base_layer_hash: Optional[bytes] = None,
         project_vars_part_name: Optional[str] = None,
         project_vars: Optional[Dict[str, str]] = None,
+        build_caches: bool = False,
+        build_cache_size: Optional[int] = None,
+        fast_clean: bool = False,
+        persistent_shells: bool = False,
+        part_logs: bool = False,
+        profile: bool = False,
         **custom_args,  # custom passthrough args
     ):
         # pylint: disable=too-many-locals
@@ -114,6 +147,13 @@ class LifecycleManager:
 
         project_dirs = ProjectDirs(work_dir=work_dir)
 
+        if profile or os.getenv("CRAFT_PARTS_PROFILE") == "1":
+            self._profiler: Optional[
+                instrumentation.Profiler
+            ] = instrumentation.Profiler(project_dirs.profile_dir)
+        else:
+            self._profiler = None
+
         project_info = ProjectInfo(
             application_name=application_name,
             cache_dir=Path(cache_dir),
@@ -124,6 +164,8 @@ class LifecycleManager:
             project_dirs=project_dirs,
             project_vars_part_name=project_vars_part_name,
             project_vars=project_vars,
+            build_caches=build_caches,
+            build_cache_size=build_cache_size,
             **custom_args,
         )
 
@@ -156,12 +198,13 @@ class LifecycleManager:
         self._part_list = part_list
         self._application_name = application_name
         self._target_arch = project_info.target_arch
-        self._sequencer = sequencer.Sequencer(
-            part_list=self._part_list,
-            project_info=project_info,
-            ignore_outdated=ignore_local_sources,
-            base_layer_hash=layer_hash,
-        )
+        with instrumentation.profiling(self._profiler):
+            self._sequencer = sequencer.Sequencer(
+                part_list=self._part_list,
+                project_info=project_info,
+                ignore_outdated=ignore_local_sources,
+                base_layer_hash=layer_hash,
+            )
         self._executor = executor.Executor(
             part_list=self._part_list,
             project_info=project_info,
@@ -170,6 +213,9 @@ class LifecycleManager:
             extra_build_snaps=extra_build_snaps,
             base_layer_dir=base_layer_dir,
             base_layer_hash=layer_hash,
+            fast_clean=fast_clean,
+            persistent_shells=persistent_shells,
+            part_logs=part_logs,
         )
         self._project_info = project_info
         # pylint: enable=too-many-locals
@@ -194,6 +240,43 @@ class LifecycleManager:
         """
         self._executor.clean(initial_step=step, part_names=part_names)
 
+    def pending_removals(self) -> List[Path]:
+        """Obtain the work directories removed in fast clean mode not yet deleted.
+
+        :return: The list of trash entries waiting to be removed.
+        """
+        return self._executor.pending_removals()
+
+    def wait_for_removals(self, timeout: Optional[float] = None) -> bool:
+        """Wait until work directories removed in fast clean mode are deleted.
+
+        :param timeout: The maximum time to wait, in seconds. If not specified,
+            wait until all directories are deleted.
+
+        :return: Whether all trashed directories were deleted.
+        """
+        return self._executor.wait_for_removals(timeout)
+
+    def part_log_path(self, part_name: str) -> Optional[Path]:
+        """Obtain the path to the log file of a part.
+
+        :param part_name: The name of the part.
+
+        :return: The path to the part log file, or None if part logs are
+            not enabled.
+        """
+        return self._executor.part_log_path(part_name)
+
+    def part_log_tail(self, part_name: str) -> str:
+        """Obtain the most recent output of the step commands of a part.
+
+        :param part_name: The name of the part.
+
+        :return: The most recent output of the part, or an empty string if
+            part logs are not enabled.
+        """
+        return self._executor.part_log_tail(part_name)
+
     def refresh_packages_list(self) -> None:
         """Update the available packages list.
 
@@ -216,16 +299,20 @@ class LifecycleManager:
         :return: The list of :class:`Action` objects that should be executed in
             order to reach the target step for the specified parts.
         """
-        actions = self._sequencer.plan(target_step, part_names)
+        with instrumentation.profiling(self._profiler):
+            actions = self._sequencer.plan(target_step, part_names)
         return actions
 
     def reload_state(self) -> None:
         """Reload the ephemeral state from disk."""
-        self._sequencer.reload_state()
+        with instrumentation.profiling(self._profiler):
+            self._sequencer.reload_state()
 
     def action_executor(self) -> executor.ExecutionContext:
         """Return a context manager for action execution."""
-        return executor.ExecutionContext(executor=self._executor)
+        return executor.ExecutionContext(
+            executor=self._executor, profiler=self._profiler
+        )
 
     def get_pull_assets(self, *, part_name: str) -> Optional[Dict[str, Any]]:
         """Return the part's pull state assets.
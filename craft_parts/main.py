@@ -34,7 +34,7 @@ from xdg import BaseDirectory  # type: ignore
 
 import craft_parts
 import craft_parts.errors
-from craft_parts import ActionType, Step
+from craft_parts import ActionType, Step, instrumentation
 
 
 def main():
@@ -52,6 +52,8 @@ def main():
 
     logging.basicConfig(level=log_level)
 
+    recorder = instrumentation.start_recording() if options.profile else None
+
     try:
         _process_parts(options)
     except OSError as err:
@@ -72,6 +74,19 @@ def main():
     except RuntimeError as err:
         print(f"Error: {err}", file=sys.stderr)
         sys.exit(5)
+    finally:
+        if recorder:
+            instrumentation.stop_recording()
+            _write_profile(recorder, options)
+
+
+def _write_profile(
+    recorder: instrumentation.Recorder, options: argparse.Namespace
+) -> None:
+    trace_path = Path(options.work_dir, "craft-parts-trace.json")
+    recorder.write_chrome_trace(trace_path)
+    print(recorder.summary())
+    print(f"Trace written to {trace_path}.")
 
 
 def _process_parts(options: argparse.Namespace) -> None:
@@ -279,6 +294,14 @@ def _parse_arguments() -> argparse.Namespace:
         action="store_true",
         help="Enable debug messages.",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=(
+            "Show the time and resources used by each action and write a "
+            "Chrome trace to craft-parts-trace.json in the work directory."
+        ),
+    )
     parser.add_argument(
         "--version",
         action="store_true",
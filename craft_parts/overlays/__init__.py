@@ -17,6 +17,7 @@
 """Overlay filesystem management and helpers."""
 
 from .layers import LayerHash  # noqa: F401
+from .layers import LayerHashChain  # noqa: F401
 from .layers import LayerStateManager  # noqa: F401
 from .overlay_fs import is_opaque_dir  # noqa: F401
 from .overlay_fs import is_whiteout_file  # noqa: F401
@@ -29,3 +30,4 @@ from .overlays import oci_opaque_dir  # noqa: F401
 from .overlays import oci_whited_out_file  # noqa: F401
 from .overlays import oci_whiteout  # noqa: F401
 from .overlays import visible_in_layer  # noqa: F401
+from .overlays import visible_in_layers  # noqa: F401
@@ -19,11 +19,15 @@
 import logging
 import multiprocessing
 import os
+import pickle
+import stat
 import sys
+import threading
+import traceback
 from collections import namedtuple
 from multiprocessing.connection import Connection
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from craft_parts.utils import os_utils
 
@@ -31,6 +35,9 @@ from . import errors
 
 logger = logging.getLogger(__name__)
 
+# Time to wait for the chroot worker to exit before terminating it.
+_STOP_TIMEOUT = 10.0
+
 
 def chroot(path: Path, target: Callable, *args, **kwargs) -> Any:
     """Execute a callable in a chroot environment.
@@ -84,6 +91,207 @@ def _runner(
     conn.send((res, None))
 
 
+class ChrootWorker:
+    """A long-lived process executing callables in a chroot environment.
+
+    The chroot environment is prepared and the worker process is started
+    when the first callable is executed. Both are kept until the worker is
+    closed, so that consecutive calls (e.g. refreshing the package list,
+    downloading and installing packages) share the mounts, the imported
+    modules and the caches of a single process. Calls are executed in order,
+    and callables, arguments and return values must be picklable.
+
+    :param path: The new filesystem root.
+    """
+
+    def __init__(self, path: Path):
+        self._path = Path(path)
+        self._process: Optional[multiprocessing.Process] = None
+        self._conn: Optional[Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        """Whether the worker process has been started and not closed."""
+        return self._process is not None
+
+    def execute(self, target: Callable, *args, **kwargs) -> Any:
+        """Execute a callable in the worker chroot environment.
+
+        :param target: The callable to run in the chroot environment.
+        :param args: Arguments for target.
+        :param kwargs: Keyword arguments for target.
+
+        :returns: The target function return value.
+
+        :raises OverlayChrootExecutionError: If the target function raised an
+            exception, or the worker process exited unexpectedly. The error
+            details contain the traceback from the worker process, and the
+            original exception is chained if it could be transferred.
+        """
+        with self._lock:
+            if not self._conn:
+                self._start()
+
+            try:
+                self._conn.send((target, args, kwargs))  # type: ignore
+                res, exc, message, tb_text = self._conn.recv()  # type: ignore
+            except (EOFError, OSError) as err:
+                self._stop()
+                raise errors.OverlayChrootExecutionError(
+                    f"chroot worker exited unexpectedly: {err!s}"
+                ) from err
+
+        if message is not None:
+            raise errors.OverlayChrootExecutionError(message, tb_text) from exc
+
+        return res
+
+    def close(self) -> None:
+        """Stop the worker process and clean up the chroot environment."""
+        with self._lock:
+            self._stop()
+
+    def _start(self) -> None:
+        parent_conn, child_conn = multiprocessing.Pipe()
+
+        # Listed before the process is started, so that the pipes created by
+        # multiprocessing to wait for the worker are not included.
+        if multiprocessing.get_start_method() == "fork":
+            pipes = _list_pipes(exclude=child_conn.fileno())
+        else:
+            pipes = []
+
+        process = multiprocessing.Process(
+            target=_worker, args=(self._path, child_conn, pipes), daemon=True
+        )
+        logger.debug("[pid=%d] set up chroot", os.getpid())
+        _setup_chroot(self._path)
+        try:
+            process.start()
+        except BaseException:
+            _cleanup_chroot(self._path)
+            raise
+        finally:
+            # Only the worker must hold its end, so that a crash is seen as EOF.
+            child_conn.close()
+
+        logger.debug("[pid=%d] started chroot worker %d", os.getpid(), process.pid)
+        self._process = process
+        self._conn = parent_conn
+
+    def _stop(self) -> None:
+        if not self._process or not self._conn:
+            return
+
+        try:
+            self._conn.send(None)
+        except OSError:
+            pass
+
+        self._process.join(timeout=_STOP_TIMEOUT)
+        if self._process.is_alive():
+            logger.debug("terminate chroot worker %d", self._process.pid)
+            self._process.terminate()
+            self._process.join()
+
+        self._conn.close()
+        self._process = None
+        self._conn = None
+
+        logger.debug("[pid=%d] clean up chroot", os.getpid())
+        _cleanup_chroot(self._path)
+
+
+def _worker(path: Path, conn: Connection, pipes: List[int]) -> None:
+    """Chroot to the execution directory and call target functions until stopped.
+
+    Each request is a tuple containing the target function and its arguments,
+    or None to stop the worker. Each reply is a tuple containing the target
+    function return value, the exception raised, the error message and the
+    formatted traceback.
+
+    The pipes inherited from the parent process are closed. The parent may
+    be capturing command output when the worker is forked, and readers would
+    wait for the end of the captured output for as long as the worker holds
+    a copy of the pipe.
+    """
+    logger.debug("[pid=%d] chroot worker: chroot to %r", os.getpid(), path)
+    for fd in pipes:
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
+    setup_error: Optional[Tuple[Any, ...]] = None
+    try:
+        os.chdir(path)
+        os.chroot(path)
+    except OSError as exc:
+        setup_error = _error_reply(exc)
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+
+        if request is None:
+            return
+
+        if setup_error:
+            conn.send(setup_error)
+            continue
+
+        target, args, kwargs = request
+        logger.debug("[pid=%d] chroot worker: target=%r", os.getpid(), target)
+        try:
+            reply: Tuple[Any, ...] = (target(*args, **kwargs), None, None, None)
+        except Exception as exc:  # pylint: disable=broad-except
+            reply = _error_reply(exc)
+
+        try:
+            conn.send(reply)
+        except Exception as exc:  # pylint: disable=broad-except
+            conn.send(_error_reply(exc))
+
+
+def _error_reply(exc: Exception) -> Tuple[Any, ...]:
+    """Create the reply to a failed call, with the exception if it's picklable."""
+    tb_text = "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+    try:
+        pickle.loads(pickle.dumps(exc))
+    except Exception:  # pylint: disable=broad-except
+        return None, None, str(exc), tb_text
+
+    return None, exc, str(exc), tb_text
+
+
+def _list_pipes(*, exclude: int) -> List[int]:
+    """List the pipes open in this process, other than the standard streams.
+
+    :param exclude: A file descriptor to leave out of the list.
+
+    :return: The file descriptors of the open pipes.
+    """
+    try:
+        fds = [int(fd) for fd in os.listdir("/proc/self/fd")]
+    except OSError:
+        return []
+
+    pipes: List[int] = []
+    for fd in fds:
+        if fd <= 2 or fd == exclude:
+            continue
+        try:
+            if stat.S_ISFIFO(os.fstat(fd).st_mode):
+                pipes.append(fd)
+        except OSError:
+            pass
+
+    return pipes
+
+
 def _setup_chroot(path: Path) -> None:
     """Prepare the chroot environment before executing the target function."""
     logger.debug("setup chroot: %r", path)
@@ -16,6 +16,8 @@
 
 """Overlay error definitions."""
 
+from typing import Optional
+
 from craft_parts import errors
 
 
@@ -54,10 +56,14 @@ class OverlayUnmountError(OverlayError):
 
 
 class OverlayChrootExecutionError(OverlayError):
-    """Failed to execute in a chroot environment."""
+    """Failed to execute in a chroot environment.
 
-    def __init__(self, message: str) -> None:
+    :param message: The error message.
+    :param details: The traceback of the error in the chroot environment.
+    """
+
+    def __init__(self, message: str, details: Optional[str] = None) -> None:
         self.message = message
         brief = f"Overlay environment execution error: {message}"
 
-        super().__init__(brief=brief)
+        super().__init__(brief=brief, details=details)
@@ -18,7 +18,7 @@
 
 import hashlib
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from craft_parts.parts import Part
 
@@ -103,9 +103,68 @@ class LayerHash:
         return self.digest.hex()
 
 
+class LayerHashChain:
+    """The layer validation hashes of the overlay stack.
+
+    Each layer hash is computed from the overlay parameters of the parts up
+    to the corresponding layer. Hashes are computed once, as they're needed,
+    and reused for the following layers, so that obtaining the hash of the
+    complete overlay stack for each part doesn't hash the whole stack again.
+
+    :param part_list: The list of parts in the project.
+    :param base_layer_hash: The verification hash of the overlay base layer.
+    """
+
+    def __init__(self, part_list: List[Part], base_layer_hash: Optional[LayerHash]):
+        self._part_list = part_list
+        self._base_layer_hash = base_layer_hash
+        self._part_index = {part.name: i for i, part in enumerate(part_list)}
+        self._layer_hashes: List[LayerHash] = []
+
+    def get_layer_hash(self, part: Part) -> LayerHash:
+        """Obtain the validation hash of the layer corresponding to a part.
+
+        :param part: The part corresponding to the layer.
+
+        :return: The validation hash of the layer stack up to the given part.
+        """
+        index = self._part_index[part.name]
+
+        while len(self._layer_hashes) <= index:
+            if self._layer_hashes:
+                previous_layer_hash: Optional[LayerHash] = self._layer_hashes[-1]
+            else:
+                previous_layer_hash = self._base_layer_hash
+
+            next_part = self._part_list[len(self._layer_hashes)]
+            self._layer_hashes.append(
+                LayerHash.for_part(next_part, previous_layer_hash=previous_layer_hash)
+            )
+
+        return self._layer_hashes[index]
+
+    def get_overlay_hash(self) -> Optional[LayerHash]:
+        """Obtain the validation hash of the complete overlay stack.
+
+        :return: The validation hash of the topmost layer, or the base layer
+            hash if there are no parts.
+        """
+        if not self._part_list:
+            return self._base_layer_hash
+
+        return self.get_layer_hash(self._part_list[-1])
+
+
 class LayerStateManager:
     """An in-memory layer state management helper for action planning.
 
+    Computed layer hashes are kept for each part together with the previous
+    layer hash they were computed from, and are only computed again if the
+    previous layer hash changes. The manager also tracks the number of bottom
+    layers known to be consistent, i.e. whose layer hash matches the hash
+    computed from the previous layer, so that consistency checks don't need
+    to verify the whole stack again.
+
     :param part_list: The list of parts in the project.
     :param base_layer_hash: The verification hash of the overlay base layer.
     """
@@ -113,19 +172,58 @@ class LayerStateManager:
     def __init__(self, part_list: List[Part], base_layer_hash: Optional[LayerHash]):
         self._part_list = part_list
         self._base_layer_hash = base_layer_hash
+        self._part_index = {part.name: i for i, part in enumerate(part_list)}
+        self._computed: Dict[str, Tuple[Optional[bytes], LayerHash]] = {}
+        self._consistent_layers = 0
 
         self._layer_hash: Dict[str, Optional[LayerHash]] = {}
         for part in part_list:
             self.set_layer_hash(part, LayerHash.load(part))
 
+    @property
+    def consistent_layers(self) -> int:
+        """Return the number of bottom layers known to be consistent."""
+        return self._consistent_layers
+
+    def get_index(self, part: Part) -> int:
+        """Obtain the position of the part layer in the overlay stack.
+
+        :param part: The part corresponding to the layer.
+
+        :return: The index of the part in the list of parts.
+
+        :raises ValueError: If the part is not in the list of parts.
+        """
+        index = self._part_index.get(part.name)
+        if index is None:
+            raise ValueError(f"part {part.name!r} not in parts list")
+        return index
+
     def get_layer_hash(self, part: Part) -> Optional[LayerHash]:
         """Obtain the layer hash for the given part."""
         return self._layer_hash.get(part.name)
 
     def set_layer_hash(self, part: Part, layer_hash: Optional[LayerHash]) -> None:
         """Store the value of the layer hash for the given part."""
+        if self._layer_hash.get(part.name) != layer_hash:
+            # The consistency of this layer and the layers above it must be
+            # verified again.
+            index = self._part_index.get(part.name, 0)
+            self._consistent_layers = min(self._consistent_layers, index)
+
         self._layer_hash[part.name] = layer_hash
 
+    def set_consistent(self, part: Part) -> None:
+        """Record that the layer hash of the given part has been verified.
+
+        Layers are only known to be consistent if all layers below them are
+        also consistent.
+
+        :param part: The part whose layer hash matches its computed hash.
+        """
+        if self.get_index(part) == self._consistent_layers:
+            self._consistent_layers += 1
+
     def compute_layer_hash(self, part: Part) -> LayerHash:
         """Calculate the layer validation hash for the given part.
 
@@ -134,14 +232,21 @@ class LayerStateManager:
         :return: The validation hash of the layer corresponding to the
             given part.
         """
-        index = self._part_list.index(part)
+        index = self.get_index(part)
 
         if index > 0:
             previous_layer_hash = self.get_layer_hash(self._part_list[index - 1])
         else:
             previous_layer_hash = self._base_layer_hash
 
-        return LayerHash.for_part(part, previous_layer_hash=previous_layer_hash)
+        previous_digest = previous_layer_hash.digest if previous_layer_hash else None
+        computed = self._computed.get(part.name)
+        if computed and computed[0] == previous_digest:
+            return computed[1]
+
+        layer_hash = LayerHash.for_part(part, previous_layer_hash=previous_layer_hash)
+        self._computed[part.name] = (previous_digest, layer_hash)
+        return layer_hash
 
     def get_overlay_hash(self) -> bytes:
         """Obtain the overlay validation hash."""
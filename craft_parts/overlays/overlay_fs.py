@@ -16,12 +16,15 @@
 
 """Low level interface to OS overlayfs."""
 
+import enum
 import logging
 import os
+import time
 from pathlib import Path
 from subprocess import CalledProcessError
 from typing import List, Optional
 
+from craft_parts import instrumentation
 from craft_parts.utils import os_utils
 
 from . import errors
@@ -29,14 +32,52 @@ from . import errors
 logger = logging.getLogger(__name__)
 
 
+class MountStrategy(enum.Enum):
+    """The implementation used to mount an overlay filesystem."""
+
+    KERNEL = "overlay"
+    FUSE = "fuse-overlayfs"
+
+
+# Whether the kernel overlayfs can be used, or None if not verified yet.
+_kernel_overlay_usable: Optional[bool] = None
+
+
 class OverlayFS:
-    """Linux overlayfs operations."""
+    """Linux overlayfs operations.
+
+    The kernel overlayfs is used if running as root, falling back to
+    fuse-overlayfs if the kernel overlayfs can't be mounted. Once a kernel
+    overlayfs mount fails, fuse-overlayfs is used for all subsequent mounts.
+
+    :param lower_dirs: The lower directories, from top to bottom.
+    :param upper_dir: The upper directory.
+    :param work_dir: The overlayfs work directory.
+    :param metacopy: Only copy up file metadata when changing the ownership
+        or permissions of lower layer files, if using the kernel overlayfs.
+        The upper directory then contains metadata-only files, so it can't
+        be used as a standalone layer.
+    """
 
-    def __init__(self, *, lower_dirs: List[Path], upper_dir: Path, work_dir: Path):
+    def __init__(
+        self,
+        *,
+        lower_dirs: List[Path],
+        upper_dir: Path,
+        work_dir: Path,
+        metacopy: bool = False,
+    ):
         self._lower_dirs = lower_dirs
         self._upper_dir = upper_dir
         self._work_dir = work_dir
+        self._metacopy = metacopy
         self._mountpoint: Optional[Path] = None
+        self._strategy: Optional[MountStrategy] = None
+
+    @property
+    def strategy(self) -> Optional[MountStrategy]:
+        """Return the strategy used to mount the overlayfs, if mounted."""
+        return self._strategy
 
     def mount(self, mountpoint: Path) -> None:
         """Mount an overlayfs.
@@ -47,17 +88,52 @@ class OverlayFS:
         """
         logger.debug("mount overlayfs on %s", mountpoint)
         lower_dir = ":".join([str(p) for p in self._lower_dirs])
+        options = (
+            f"lowerdir={lower_dir!s},upperdir={self._upper_dir!s},"
+            f"workdir={self._work_dir!s}"
+        )
+
+        start = time.monotonic()
+        with instrumentation.span("mount overlay"):
+            strategy = self._mount(mountpoint, options)
+            instrumentation.annotate(strategy=strategy.value)
+
+        logger.debug(
+            "mounted %s on %s in %.3fs",
+            strategy.value,
+            mountpoint,
+            time.monotonic() - start,
+        )
+        self._mountpoint = mountpoint
+        self._strategy = strategy
+
+    def _mount(self, mountpoint: Path, options: str) -> MountStrategy:
+        global _kernel_overlay_usable  # pylint: disable=global-statement
+
+        if _kernel_overlay_usable is None:
+            _kernel_overlay_usable = os.geteuid() == 0
+
+        if _kernel_overlay_usable:
+            kernel_options = options
+            if self._metacopy:
+                kernel_options += ",index=off,metacopy=on"
+
+            try:
+                os_utils.mount_kernel_overlayfs(str(mountpoint), f"-o{kernel_options}")
+                return MountStrategy.KERNEL
+            except CalledProcessError as err:
+                logger.debug(
+                    "cannot mount kernel overlayfs, using fuse-overlayfs: %s",
+                    (err.stderr or b"").decode(errors="replace").strip() or err,
+                )
+                _kernel_overlay_usable = False
 
         try:
-            os_utils.mount_overlayfs(
-                str(mountpoint),
-                f"-olowerdir={lower_dir!s},upperdir={self._upper_dir!s},"
-                f"workdir={self._work_dir!s}",
-            )
+            os_utils.mount_overlayfs(str(mountpoint), f"-o{options}")
         except CalledProcessError as err:
             raise errors.OverlayMountError(str(mountpoint), message=str(err)) from err
 
-        self._mountpoint = mountpoint
+        return MountStrategy.FUSE
 
     def unmount(self) -> None:
         """Umount an overlayfs.
@@ -76,6 +152,7 @@ class OverlayFS:
             ) from err
 
         self._mountpoint = None
+        self._strategy = None
 
 
 def is_whiteout_file(path: Path) -> bool:
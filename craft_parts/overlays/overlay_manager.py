@@ -20,7 +20,7 @@ import logging
 import os
 import sys
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Callable, List, Optional, Tuple
 
 from craft_parts import packages
 from craft_parts.infos import ProjectInfo
@@ -31,10 +31,25 @@ from .overlay_fs import OverlayFS
 
 logger = logging.getLogger(__name__)
 
+_MountKey = Tuple[Tuple[Path, ...], Path]
+
 
 class OverlayManager:
     """Execution time overlay mounting and package installation.
 
+    A mount is reused if the same layer stack is requested again while it's
+    still mounted. The package cache mount is kept after it's released, so
+    that consecutive package list refreshes and downloads share a single
+    mount, until a different stack is mounted or :meth:`close` is called.
+    Mounts used by a failed operation are not kept.
+    Layer stacks are unmounted when released, because part layers are
+    modified directly (e.g. when filtering overlay files) between steps.
+
+    Package operations run in a chroot worker process started on the first
+    operation. The worker is kept with the package cache mount, so that the
+    package list refresh and downloads share the chroot environment and the
+    package repository state, and is stopped before the overlay is unmounted.
+
     :param project_info: The project information.
     :param part_list: A list of all parts in the project.
     :param base_layer_dir: The directory containing the overlay base, or None
@@ -52,6 +67,9 @@ class OverlayManager:
         self._part_list = part_list
         self._layer_dirs = [p.part_layer_dir for p in part_list]
         self._overlay_fs: Optional[OverlayFS] = None
+        self._mount_key: Optional[_MountKey] = None
+        self._keep_mounted = False
+        self._chroot_worker: Optional[chroot.ChrootWorker] = None
         self._base_layer_dir = base_layer_dir
 
     @property
@@ -80,13 +98,7 @@ class OverlayManager:
         # lower dirs are stacked from right to left
         lowers.reverse()
 
-        self._overlay_fs = OverlayFS(
-            lower_dirs=lowers,
-            upper_dir=upper,
-            work_dir=self._project_info.overlay_work_dir,
-        )
-
-        self._overlay_fs.mount(self._project_info.overlay_mount_dir)
+        self._mount(lowers, upper, keep_mounted=False)
 
     def mount_pkg_cache(self) -> None:
         """Mount the overlay step package cache layer."""
@@ -95,21 +107,63 @@ class OverlayManager:
                 "request to mount the overlay package cache without a base layer"
             )
 
-        self._overlay_fs = OverlayFS(
-            lower_dirs=[self._base_layer_dir],
-            upper_dir=self._project_info.overlay_packages_dir,
-            work_dir=self._project_info.overlay_work_dir,
+        self._mount(
+            [self._base_layer_dir],
+            self._project_info.overlay_packages_dir,
+            keep_mounted=True,
         )
 
-        self._overlay_fs.mount(self._project_info.overlay_mount_dir)
+    def release(self) -> None:
+        """Release the overlay step layer stack after use.
+
+        The package cache mount is kept for reuse, other stacks are unmounted.
+        """
+        if not self._overlay_fs:
+            raise RuntimeError("filesystem is not mounted")
+
+        if self._keep_mounted:
+            logger.debug("keep overlay mounted for reuse")
+            return
+
+        self.unmount()
 
     def unmount(self) -> None:
         """Unmount the overlay step layer stack."""
         if not self._overlay_fs:
             raise RuntimeError("filesystem is not mounted")
 
+        self._stop_chroot_worker()
         self._overlay_fs.unmount()
         self._overlay_fs = None
+        self._mount_key = None
+        self._keep_mounted = False
+
+    def close(self) -> None:
+        """Unmount the overlay stack kept mounted for reuse, if any."""
+        if self._overlay_fs:
+            self.unmount()
+
+    def _mount(
+        self, lower_dirs: List[Path], upper_dir: Path, *, keep_mounted: bool
+    ) -> None:
+        key = (tuple(lower_dirs), upper_dir)
+        if self._overlay_fs and self._mount_key == key:
+            logger.debug("reuse overlay mount")
+            self._keep_mounted = keep_mounted
+            return
+
+        if self._overlay_fs:
+            self.unmount()
+
+        self._overlay_fs = OverlayFS(
+            lower_dirs=lower_dirs,
+            upper_dir=upper_dir,
+            work_dir=self._project_info.overlay_work_dir,
+        )
+
+        self._overlay_fs.mount(self._project_info.overlay_mount_dir)
+        self._mount_key = key
+        self._keep_mounted = keep_mounted
 
     def mkdirs(self) -> None:
         """Create overlay directories and mountpoints."""
@@ -125,10 +179,7 @@ class OverlayManager:
         if not self._overlay_fs:
             raise RuntimeError("overlay filesystem not mounted")
 
-        mount_dir = self._project_info.overlay_mount_dir
-        # Ensure we always run refresh_packages_list by resetting the cache
-        packages.Repository.refresh_packages_list.cache_clear()
-        chroot.chroot(mount_dir, packages.Repository.refresh_packages_list)
+        self._chroot_execute(_refresh_packages_list)
 
     def download_packages(self, package_names: List[str]) -> None:
         """Download packages and populate the overlay package cache.
@@ -138,8 +189,7 @@ class OverlayManager:
         if not self._overlay_fs:
             raise RuntimeError("overlay filesystem not mounted")
 
-        mount_dir = self._project_info.overlay_mount_dir
-        chroot.chroot(mount_dir, packages.Repository.download_packages, package_names)
+        self._chroot_execute(packages.Repository.download_packages, package_names)
 
     def install_packages(self, package_names: List[str]) -> None:
         """Install packages on the overlay area using chroot.
@@ -149,14 +199,38 @@ class OverlayManager:
         if not self._overlay_fs:
             raise RuntimeError("overlay filesystem not mounted")
 
-        mount_dir = self._project_info.overlay_mount_dir
-        chroot.chroot(
-            mount_dir,
+        self._chroot_execute(
             packages.Repository.install_packages,
             package_names,
             refresh_package_cache=False,
         )
 
+    def _chroot_execute(self, target: Callable, *args, **kwargs) -> Any:
+        if not self._chroot_worker:
+            self._chroot_worker = chroot.ChrootWorker(
+                self._project_info.overlay_mount_dir
+            )
+
+        try:
+            return self._chroot_worker.execute(target, *args, **kwargs)
+        finally:
+            # Overlay scripts run on layer stacks, and must not see the host
+            # filesystems mounted in the chroot environment.
+            if not self._keep_mounted:
+                self._stop_chroot_worker()
+
+    def _stop_chroot_worker(self) -> None:
+        if self._chroot_worker:
+            self._chroot_worker.close()
+            self._chroot_worker = None
+
+
+def _refresh_packages_list() -> None:
+    """Update the list of available packages in the chroot worker."""
+    # Ensure we always run refresh_packages_list by resetting the cache
+    packages.Repository.refresh_packages_list.cache_clear()
+    packages.Repository.refresh_packages_list()
+
 
 class LayerMount:
     """Mount the overlay layer stack for step processing.
@@ -189,7 +263,10 @@ class LayerMount:
         # prevent pychroot process leak
         if os.getpid() != self._pid:
             sys.exit()
-        self._overlay_manager.unmount()
+        if exc[0] is None:
+            self._overlay_manager.release()
+        else:
+            self._overlay_manager.close()
         return False
 
     def install_packages(self, package_names: List[str]) -> None:
@@ -219,7 +296,10 @@ class PackageCacheMount:
         # prevent pychroot process leak
         if os.getpid() != self._pid:
             sys.exit()
-        self._overlay_manager.unmount()
+        if exc[0] is None:
+            self._overlay_manager.release()
+        else:
+            self._overlay_manager.close()
         return False
 
     def refresh_packages_list(self) -> None:
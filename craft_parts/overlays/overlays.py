@@ -20,10 +20,15 @@ Relevant OCI documentation available at:
 https://github.com/opencontainers/image-spec/blob/main/layer.md
 """
 
+import contextlib
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Set, Tuple
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from . import overlay_fs
 
 logger = logging.getLogger(__name__)
 
@@ -42,60 +47,174 @@ def visible_in_layer(lower_dir: Path, upper_dir: Path) -> Tuple[Set[str], Set[st
 
     :returns: A tuple containing the sets of files and directories that are visible.
     """
-    visible_files: Set[str] = set()
-    visible_dirs: Set[str] = set()
+    return visible_in_layers([lower_dir], upper_dir)[0]
+
+
+def visible_in_layers(
+    lower_dirs: Sequence[Path], upper_dir: Path, *, max_workers: int = 1
+) -> List[Tuple[Set[str], Set[str]]]:
+    """Determine the files and directories that are visible in a stack of layers.
+
+    Layers are listed from top to bottom, and the entries of each layer can be
+    blocked by the upper directory or by the visible entries of the layers above
+    it, as if the visible entries of each layer were migrated to the upper
+    directory before processing the next layer.
+
+    Each layer is scanned only once, in parallel, and visibility is determined
+    in a single walk of each layer merged with the upper directory entries.
+    Subtrees blocked by a whiteout, an opaque directory or a file in the upper
+    directory are not visited.
+
+    :param lower_dirs: The layer directories, from top to bottom.
+    :param upper_dir: The upper directory.
+    :param max_workers: The maximum number of layers to scan concurrently.
+
+    :returns: A list containing a tuple with the sets of files and directories
+        that are visible in each layer.
+    """
+    if max_workers <= 1 or len(lower_dirs) <= 1:
+        layers = [_scan_layer(lower_dir) for lower_dir in lower_dirs]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            layers = list(executor.map(_scan_layer, lower_dirs))
+
+    upper = _UpperDir(str(upper_dir))
+    visibility: List[Tuple[Set[str], Set[str]]] = []
+
+    for lower_dir, layer in zip(lower_dirs, layers):
+        visible_files, visible_dirs = _merge_layer(layer, upper)
+        logger.debug(
+            "layer %s visibility files=%r, dirs=%r",
+            lower_dir,
+            visible_files,
+            visible_dirs,
+        )
+        visibility.append((visible_files, visible_dirs))
+
+    return visibility
+
+
+@dataclass
+class _LayerDir:
+    """A directory in a layer.
+
+    :param opaque: Whether the directory is an overlayfs opaque directory.
+    :param entries: The directory entries, mapping subdirectory names to their
+        contents and other entry names to None.
+    """
 
+    opaque: bool = False
+    entries: Dict[str, Optional["_LayerDir"]] = field(default_factory=dict)
+
+
+def _scan_layer(lower_dir: Path) -> _LayerDir:
+    """Read the directory tree of a layer."""
     logger.debug("check layer visibility in %s", lower_dir)
-    for (root, directories, files) in os.walk(lower_dir, topdown=True):
-        for file_name in files:
-            path = Path(root, file_name)
-            relpath = path.relative_to(lower_dir)
-            if not _is_path_visible(upper_dir, relpath):
-                continue
+    root = _LayerDir()
+    pending = [(str(lower_dir), root)]
 
-            upper_path = upper_dir / relpath
-            if not upper_path.exists() and not oci_whiteout(upper_path).exists():
-                visible_files.add(str(relpath))
+    while pending:
+        path, layer_dir = pending.pop()
+        with contextlib.suppress(FileNotFoundError), os.scandir(path) as entries:
+            for entry in entries:
+                if not entry.is_dir(follow_symlinks=False):
+                    layer_dir.entries[entry.name] = None
+                    continue
 
-        for directory in directories:
-            path = Path(root, directory)
-            relpath = path.relative_to(lower_dir)
-            if not _is_path_visible(upper_dir, relpath):
-                continue
+                subdir = _LayerDir(opaque=overlay_fs.is_opaque_dir(Path(entry.path)))
+                layer_dir.entries[entry.name] = subdir
+                pending.append((entry.path, subdir))
 
-            upper_path = upper_dir / relpath
-            if not upper_path.exists():
-                if path.is_symlink():
-                    visible_files.add(str(relpath))
+    return root
+
+
+class _UpperDir:
+    """A directory in the upper directory, read when its entries are first needed.
+
+    :param path: The directory path, or None if the directory only contains
+        entries added from a layer.
+    :param opaque: Whether the directory is opaque.
+    """
+
+    def __init__(self, path: Optional[str], *, opaque: bool = False):
+        self._path = path
+        self._opaque = opaque
+        self._entries: Optional[Dict[str, Optional[_UpperDir]]] = None
+
+    @property
+    def entries(self) -> Dict[str, Optional["_UpperDir"]]:
+        """Return the directory entries, with whited out names mapped to None."""
+        if self._entries is None:
+            self._entries = self._read()
+        return self._entries
+
+    @property
+    def opaque(self) -> bool:
+        """Return whether the directory is an OCI opaque directory."""
+        if self._entries is None:
+            self._entries = self._read()
+        return self._opaque
+
+    def _read(self) -> Dict[str, Optional["_UpperDir"]]:
+        entries: Dict[str, Optional[_UpperDir]] = {}
+        if self._path is None:
+            return entries
+
+        whited_out: List[str] = []
+        with contextlib.suppress(FileNotFoundError), os.scandir(self._path) as it:
+            for entry in it:
+                if entry.name == ".wh..wh..opq":
+                    self._opaque = True
+                elif entry.name.startswith(".wh."):
+                    whited_out.append(entry.name[4:])
+                elif entry.is_dir(follow_symlinks=False):
+                    entries[entry.name] = _UpperDir(entry.path)
                 else:
-                    visible_dirs.add(str(relpath))
-            elif is_oci_opaque_dir(upper_path):
-                logger.debug("is opaque dir: %s", relpath)
-                # Don't descend into this directory, overridden by opaque
-                directories.remove(directory)
+                    entries[entry.name] = None
 
-    logger.debug("layer visibility files=%r, dirs=%r", visible_files, visible_dirs)
-    return visible_files, visible_dirs
+        for name in whited_out:
+            entries[name] = None
 
+        return entries
 
-def _is_path_visible(root: Path, relpath: Path) -> bool:
-    """Verify if any element of the given path is not whited out.
 
-    :param root: The root directory, not included in the verification.
-    :param relpath: The relative path to verify.
+def _merge_layer(layer: _LayerDir, upper: _UpperDir) -> Tuple[Set[str], Set[str]]:
+    """Find the visible entries of a layer and add them to the upper directory.
 
-    :returns: Whether the final element of the path is visible.
+    :param layer: The layer directory tree.
+    :param upper: The upper directory tree.
+
+    :returns: A tuple containing the sets of files and directories that are visible.
     """
-    logger.debug("check if path is visible: root=%s, relpath=%s", root, relpath)
-    levels = len(relpath.parts)
+    visible_files: Set[str] = set()
+    visible_dirs: Set[str] = set()
+    pending: List[Tuple[str, _LayerDir, _UpperDir]] = [("", layer, upper)]
 
-    for level in range(levels):
-        path = Path(root, os.path.join(*relpath.parts[: level + 1]))
-        if oci_whiteout(path).exists() or is_oci_opaque_dir(path):
-            logger.debug("is whiteout or opaque: %s", path)
-            return False
+    while pending:
+        relpath, layer_dir, upper_dir = pending.pop()
+        upper_entries = upper_dir.entries
 
-    return True
+        for name, layer_entry in layer_dir.entries.items():
+            path = os.path.join(relpath, name)
+
+            if name in upper_entries:
+                # Only directories are merged, any other entry (including
+                # whiteouts) hides the lower entry and its contents.
+                upper_entry = upper_entries[name]
+                if layer_entry and upper_entry and not upper_entry.opaque:
+                    pending.append((path, layer_entry, upper_entry))
+                continue
+
+            if layer_entry is None:
+                visible_files.add(path)
+                upper_entries[name] = None
+            else:
+                visible_dirs.add(path)
+                upper_entry = _UpperDir(None, opaque=layer_entry.opaque)
+                upper_entries[name] = upper_entry
+                pending.append((path, layer_entry, upper_entry))
+
+    return visible_files, visible_dirs
 
 
 def is_oci_opaque_dir(path: Path) -> bool:
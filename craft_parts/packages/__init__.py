@@ -18,6 +18,13 @@
 
 from . import errors  # noqa: F401
 from . import snaps  # noqa: F401
+from .base import (  # noqa: F401
+    get_origin_index_path,
+    get_origin_stage_packages,
+    read_origin_index,
+    relocate_origin_index,
+    write_origin_index,
+)
 from .normalize import fix_pkg_config  # noqa: F401
 from .platform import is_deb_based
 
@@ -18,12 +18,14 @@
 
 import abc
 import contextlib
+import functools
+import json
 import logging
 import os
 from pathlib import Path
-from typing import List, Optional, Set, Tuple, Type
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, Type
 
-from craft_parts import xattrs
+from craft_parts import errors, xattrs
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +50,22 @@ class BaseRepository(abc.ABC):
         :return: A list of libraries that package_name provides, with paths.
         """
 
+    @classmethod
+    @functools.lru_cache(maxsize=16)
+    def get_package_libraries_index(cls, package_name: str) -> FrozenSet[str]:
+        """Return an immutable, memoized set of libraries in package_name.
+
+        The index is computed once per repository and package name, and
+        reused for the rest of the session. This is the preferred way to
+        query library membership in hot paths, such as when normalizing
+        every symlink in a set of unpacked packages. Repositories can
+        override this method to supply a precomputed index.
+
+        :param package_name: The package name to get library contents from.
+        :return: A frozen set of libraries that package_name provides, with paths.
+        """
+        return frozenset(cls.get_package_libraries(package_name))
+
     @classmethod
     @abc.abstractmethod
     def get_packages_for_source_type(cls, source_type: str) -> Set[str]:
@@ -247,17 +265,131 @@ def get_pkg_name_parts(pkg_name: str) -> Tuple[str, Optional[str]]:
     return name, version
 
 
-def mark_origin_stage_package(sources_dir: str, stage_package: str) -> Set[str]:
-    """Mark all files in sources_dir as coming from stage_package."""
+def mark_origin_stage_package(
+    sources_dir: str, stage_package: str, *, mirror_xattrs: bool = True
+) -> Set[str]:
+    """Mark all files in sources_dir as coming from stage_package.
+
+    Origin information is mirrored to extended attributes if possible. If
+    the filesystem doesn't support extended attributes, the returned file
+    list should be recorded in an origin index instead.
+
+    :param sources_dir: The directory containing the files to mark.
+    :param stage_package: The stage package the files come from.
+    :param mirror_xattrs: Whether origin information should also be
+        written to extended attributes.
+
+    :return: The paths of the marked files, relative to sources_dir.
+    """
     file_list = set()
     for (root, _, files) in os.walk(sources_dir):
         for file_name in files:
             file_path = os.path.join(root, file_name)
 
+            # Origin information does not apply to symlinks.
+            if os.path.islink(file_path):
+                continue
+
             # Mark source.
-            xattrs.write_origin_stage_package(file_path, stage_package)
+            if mirror_xattrs:
+                try:
+                    xattrs.write_origin_stage_package(file_path, stage_package)
+                except (errors.XAttributeError, errors.XAttributeTooLong) as err:
+                    logger.debug("not mirroring origin to xattrs: %s", err)
+                    mirror_xattrs = False
 
-            file_path = os.path.relpath(root, sources_dir)
-            file_list.add(file_path)
+            file_list.add(os.path.relpath(file_path, sources_dir))
 
     return file_list
+
+
+_ORIGIN_INDEX_FILE = "origin_index.json"
+
+
+def get_origin_index_path(stage_packages_path: Path) -> Path:
+    """Return the path to the origin index of unpacked stage packages.
+
+    :param stage_packages_path: The directory containing the stage packages.
+
+    :return: The origin index file path.
+    """
+    return stage_packages_path / _ORIGIN_INDEX_FILE
+
+
+def write_origin_index(index_path: Path, origins: Dict[str, str]) -> None:
+    """Write the stage package origin of unpacked files.
+
+    Entries are grouped by package to keep the index compact.
+
+    :param index_path: The origin index file path.
+    :param origins: A mapping of file paths to the stage package they come from.
+    """
+    index: Dict[str, List[str]] = {}
+    for file_path, stage_package in origins.items():
+        index.setdefault(stage_package, []).append(file_path)
+
+    for file_list in index.values():
+        file_list.sort()
+
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    with index_path.open("w") as index_file:
+        json.dump(index, index_file, separators=(",", ":"), sort_keys=True)
+
+
+def read_origin_index(index_path: Path) -> Optional[Dict[str, Set[str]]]:
+    """Read the stage package origin of unpacked files.
+
+    :param index_path: The origin index file path.
+
+    :return: A mapping of stage packages to the set of files they provide,
+        or None if there is no index.
+    """
+    try:
+        with index_path.open() as index_file:
+            index = json.load(index_file)
+    except FileNotFoundError:
+        return None
+
+    return {stage_package: set(files) for stage_package, files in index.items()}
+
+
+def get_origin_stage_packages(index: Dict[str, Set[str]], files: Set[str]) -> Set[str]:
+    """Obtain the stage packages that provided any of the given files.
+
+    :param index: A mapping of stage packages to the files they provide.
+    :param files: The files to look up.
+
+    :return: The set of stage packages providing the files.
+    """
+    return {
+        stage_package
+        for stage_package, file_list in index.items()
+        if not file_list.isdisjoint(files)
+    }
+
+
+def relocate_origin_index(
+    index_path: Path, relocations: Iterable[Tuple[str, str]]
+) -> None:
+    """Update the origin index after files were moved.
+
+    :param index_path: The origin index file path.
+    :param relocations: A sequence of (source, destination) pairs. If the
+        source is a directory, all files under it are relocated.
+    """
+    index = read_origin_index(index_path)
+    if index is None:
+        return
+
+    origins = {
+        file_path: stage_package
+        for stage_package, file_list in index.items()
+        for file_path in file_list
+    }
+
+    for src, dst in relocations:
+        prefix = src + os.sep
+        for file_path in [p for p in origins if p == src or p.startswith(prefix)]:
+            origins[dst + file_path[len(src) :]] = origins.pop(file_path)
+
+    write_origin_index(index_path, origins)
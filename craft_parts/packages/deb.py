@@ -31,7 +31,13 @@ from typing import Dict, List, Optional, Sequence, Set, Tuple
 from craft_parts.utils import deb_utils, file_utils, os_utils
 
 from . import errors
-from .base import BaseRepository, get_pkg_name_parts, mark_origin_stage_package
+from .base import (
+    BaseRepository,
+    get_origin_index_path,
+    get_pkg_name_parts,
+    mark_origin_stage_package,
+    write_origin_index,
+)
 from .deb_package import DebPackage
 from .normalize import normalize
 
@@ -671,6 +677,7 @@ class Ubuntu(BaseRepository):
         install_path: pathlib.Path,
     ) -> None:
         pkg_path = None
+        origins: Dict[str, str] = {}
 
         for pkg_path in stage_packages_path.glob("*.deb"):
             with tempfile.TemporaryDirectory(
@@ -680,11 +687,13 @@ class Ubuntu(BaseRepository):
                 deb_utils.extract_deb(pkg_path, Path(extract_dir), logger.debug)
                 # Mark source of files.
                 marked_name = cls._extract_deb_name_version(pkg_path)
-                mark_origin_stage_package(extract_dir, marked_name)
+                marked_files = mark_origin_stage_package(extract_dir, marked_name)
+                origins.update(dict.fromkeys(marked_files, marked_name))
                 # Stage files to install_dir.
                 file_utils.link_or_copy_tree(extract_dir, install_path.as_posix())
 
         if pkg_path:
+            write_origin_index(get_origin_index_path(stage_packages_path), origins)
             normalize(install_path, repository=cls)
 
     @classmethod
@@ -18,14 +18,16 @@
 
 import contextlib
 import fileinput
-import itertools
 import logging
 import os
 import re
 import shutil
 import stat
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import TYPE_CHECKING, Optional, Pattern
+from typing import TYPE_CHECKING, List, Optional, Pattern
+
+from craft_parts import instrumentation
 
 if TYPE_CHECKING:
     from .base import RepositoryType
@@ -33,6 +35,10 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# Scripts are only candidates for shebang rewriting if their first line
+# is an interpreter line, so we only need to peek at the file header.
+_SHEBANG_MAGIC = b"#!"
+
 
 def normalize(unpack_dir: Path, *, repository: "RepositoryType") -> None:
     """Normalize unpacked artifacts.
@@ -44,10 +50,11 @@ def normalize(unpack_dir: Path, *, repository: "RepositoryType") -> None:
     :param unpack_dir: Directory containing unpacked files to normalize.
     :param repository: The package format handler.
     """
-    _remove_useless_files(unpack_dir)
-    _fix_artifacts(unpack_dir, repository)
-    _fix_xml_tools(unpack_dir)
-    _fix_shebangs(unpack_dir)
+    with instrumentation.span("normalize"):
+        _remove_useless_files(unpack_dir)
+        scripts = _fix_artifacts(unpack_dir, repository)
+        _fix_xml_tools(unpack_dir)
+        _fix_shebangs(scripts)
 
 
 def _remove_useless_files(unpack_dir: Path) -> None:
@@ -63,7 +70,7 @@ def _remove_useless_files(unpack_dir: Path) -> None:
         sitecustomize_file.unlink()
 
 
-def _fix_artifacts(unpack_dir: Path, repository: "RepositoryType") -> None:
+def _fix_artifacts(unpack_dir: Path, repository: "RepositoryType") -> List[Path]:
     """Perform various modifications to unpacked artifacts.
 
     Sometimes distro packages will contain absolute symlinks (e.g. if the
@@ -73,22 +80,62 @@ def _fix_artifacts(unpack_dir: Path, repository: "RepositoryType") -> None:
     Some unpacked items will also contain suid binaries which we do not
     want in the resulting environment.
 
+    The tree is traversed only once, and each entry is classified from a
+    single ``lstat`` call. Regular files starting with an interpreter line
+    are collected so their shebangs can be fixed later without walking the
+    tree again.
+
     :param unpack_dir: Directory containing unpacked files to normalize.
+
+    :return: The list of regular files that are candidates for shebang fixing.
     """
     logger.debug("fix artifacts: unpack_dir=%r", str(unpack_dir))
 
-    for root, dirs, files in os.walk(unpack_dir):
-        # Symlinks to directories will be in dirs, while symlinks to
-        # non-directories will be in files.
-        for entry in itertools.chain(files, dirs):
-            path = Path(root, entry)
-            if path.is_symlink() and Path(os.readlink(path)).is_absolute():
-                _fix_symlink(path, unpack_dir, Path(root), repository)
-            elif path.exists():
-                _fix_filemode(path)
+    scripts: List[Path] = []
+    dirs = [str(unpack_dir)]
+
+    while dirs:
+        root = dirs.pop()
+        with os.scandir(root) as entries:
+            for entry in entries:
+                path = Path(entry.path)
+                mode = entry.stat(follow_symlinks=False).st_mode
+
+                if stat.S_ISLNK(mode):
+                    if Path(os.readlink(path)).is_absolute():
+                        copied = _fix_symlink(path, unpack_dir, Path(root), repository)
+                        if copied and _is_script(copied):
+                            scripts.append(copied)
+                    continue
 
-            if path.name.endswith(".pc") and path.is_file() and not path.is_symlink():
-                fix_pkg_config(unpack_dir, path)
+                _fix_filemode(path, mode)
+
+                if stat.S_ISDIR(mode):
+                    dirs.append(entry.path)
+                elif stat.S_ISREG(mode):
+                    if entry.name.endswith(".pc"):
+                        fix_pkg_config(unpack_dir, path)
+                    if _is_script(path):
+                        scripts.append(path)
+
+    return scripts
+
+
+def _is_script(path: Path) -> bool:
+    """Verify if a file starts with an interpreter line.
+
+    Only the file header is read, so binary files are skipped without
+    being decoded.
+
+    :param path: The file to verify.
+
+    :return: Whether the file starts with ``#!``.
+    """
+    try:
+        with open(path, "rb") as file:
+            return file.read(len(_SHEBANG_MAGIC)) == _SHEBANG_MAGIC
+    except OSError:
+        return False
 
 
 def _fix_xml_tools(unpack_dir: Path) -> None:
@@ -115,7 +162,11 @@ def _fix_xml_tools(unpack_dir: Path) -> None:
 
 def _fix_symlink(
     path: Path, unpack_dir: Path, root: Path, repository: "RepositoryType"
-) -> None:
+) -> Optional[Path]:
+    """Make an absolute symlink relative to the unpack directory.
+
+    :return: The symlink target if it was copied from the host system.
+    """
     logger.debug(
         "fix symlink: path=%r, unpack_dir=%r, root=%r",
         str(path),
@@ -123,25 +174,43 @@ def _fix_symlink(
         str(root),
     )
     host_target = os.readlink(path)
-    if host_target in repository.get_package_libraries("libc6"):
+    if host_target in repository.get_package_libraries_index("libc6"):
         logger.debug("Not fixing symlink %s: it's pointing to libc", host_target)
-        return
+        return None
 
-    target = unpack_dir / os.readlink(path)[1:]
+    target = unpack_dir / host_target[1:]
     logger.debug("fix symlink: target=%r", str(target))
 
-    if not target.exists() and not _try_copy_local(path, target):
-        return
+    copied = None
+    if not target.exists():
+        if not _try_copy_local(path, target):
+            return None
+        copied = target
+
     path.unlink()
 
     # Path.relative_to() requires self to be the subpath of the argument,
     # but os.path.relpath() does not.
     path.symlink_to(os.path.relpath(target, start=root))
 
+    return copied
 
-def _fix_shebangs(unpack_dir: Path) -> None:
-    """Change hard-coded shebangs in unpacked files to use env."""
-    _rewrite_python_shebangs(unpack_dir)
+
+def _fix_shebangs(scripts: List[Path]) -> None:
+    """Change hard-coded shebangs in unpacked files to use env.
+
+    :param scripts: The files to fix.
+    """
+    if not scripts:
+        return
+
+    # Fixups are independent from each other, dispatch them to a pool so
+    # file I/O can overlap. A file copied from the host while fixing symlinks
+    # can also be found later in the walk, make sure it's only handled once.
+    with ThreadPoolExecutor() as executor:
+        # Consume results to propagate exceptions raised in workers.
+        for _ in executor.map(_rewrite_python_shebang, dict.fromkeys(scripts)):
+            pass
 
 
 def _try_copy_local(path: Path, target: Path) -> bool:
@@ -211,63 +280,62 @@ def fix_pkg_config(
                 )
 
 
-def _fix_filemode(path: Path) -> None:
-    mode = stat.S_IMODE(path.lstat().st_mode)
+def _fix_filemode(path: Path, mode: Optional[int] = None) -> None:
+    if mode is None:
+        mode = path.lstat().st_mode
+    mode = stat.S_IMODE(mode)
     if mode & 0o4000 or mode & 0o2000:
         logger.warning("Removing suid/guid from %s", path)
         path.chmod(mode & 0o1777)
 
 
-def _rewrite_python_shebangs(root_dir: Path):
-    """Recursively change #!/usr/bin/pythonX shebangs to #!/usr/bin/env pythonX.
+_ARGLESS_SHEBANG_PATTERN = re.compile(r"\A#!.*(python\S*)$", re.MULTILINE)
+_SHEBANG_PATTERN_WITH_ARGS = re.compile(
+    r"\A#!.*(python\S*)[ \t\f\v]+(\S+)$", re.MULTILINE
+)
 
-    :param str root_dir: Directory that will be crawled for shebangs.
-    """
-    file_pattern = re.compile(r"")
-    argless_shebang_pattern = re.compile(r"\A#!.*(python\S*)$", re.MULTILINE)
-    shebang_pattern_with_args = re.compile(
-        r"\A#!.*(python\S*)[ \t\f\v]+(\S+)$", re.MULTILINE
-    )
 
-    _replace_in_file(
-        root_dir, file_pattern, argless_shebang_pattern, r"#!/usr/bin/env \1"
-    )
+def _rewrite_python_shebang(file_path: Path) -> None:
+    """Change a #!/usr/bin/pythonX shebang to #!/usr/bin/env pythonX.
 
-    # The above rewrite will barf if the shebang includes any args to python.
-    # For example, if the shebang was `#!/usr/bin/python3 -Es`, just replacing
-    # that with `#!/usr/bin/env python3 -Es` isn't going to work as `env`
-    # doesn't support arguments like that.
-    #
-    # The solution is to replace the shebang with one pointing to /bin/sh, and
-    # then exec the original shebang with included arguments. This requires
-    # some quoting hacks to ensure the file can be interpreted by both sh as
-    # well as python, but it's better than shipping our own `env`.
-    _replace_in_file(
-        root_dir,
-        file_pattern,
-        shebang_pattern_with_args,
-        r"""#!/bin/sh\n''''exec \1 \2 -- "$0" "$@" # '''""",
-    )
+    :param file_path: The script to fix.
+    """
+    try:
+        with open(file_path, "r+") as fil:
+            try:
+                shebang = fil.readline()
+            except UnicodeDecodeError:
+                return
 
+            replaced = _ARGLESS_SHEBANG_PATTERN.sub(r"#!/usr/bin/env \1", shebang)
+
+            # The above rewrite will barf if the shebang includes any args to
+            # python. For example, if the shebang was `#!/usr/bin/python3 -Es`,
+            # just replacing that with `#!/usr/bin/env python3 -Es` isn't going
+            # to work as `env` doesn't support arguments like that.
+            #
+            # The solution is to replace the shebang with one pointing to
+            # /bin/sh, and then exec the original shebang with included
+            # arguments. This requires some quoting hacks to ensure the file
+            # can be interpreted by both sh as well as python, but it's better
+            # than shipping our own `env`.
+            replaced = _SHEBANG_PATTERN_WITH_ARGS.sub(
+                r"""#!/bin/sh\n''''exec \1 \2 -- "$0" "$@" # '''""", replaced
+            )
+            if replaced == shebang:
+                return
 
-def _replace_in_file(
-    directory: Path, file_pattern: Pattern, search_pattern: Pattern, replacement: str
-) -> None:
-    """Search and replaces patterns that match a file pattern.
+            try:
+                contents = fil.read()
+            except UnicodeDecodeError:
+                # This was probably a binary file. Skip it.
+                return
 
-    :param directory: The directory to look for files.
-    :param file_pattern: The file pattern to match inside directory.
-    :param search_pattern: A re.compile'd pattern to search for within matching files.
-    :param replacement: The string to replace the matching search_pattern with.
-    """
-    for root, _, files in os.walk(directory):
-        for file_name in files:
-            if file_pattern.match(file_name):
-                file_path = Path(root, file_name)
-                # Don't bother trying to rewrite a symlink. It's either invalid
-                # or the linked file will be rewritten on its own.
-                if not file_path.is_symlink():
-                    _search_and_replace_contents(file_path, search_pattern, replacement)
+            fil.seek(0)
+            fil.truncate()
+            fil.write(replaced + contents)
+    except PermissionError as err:
+        logger.warning("Unable to open %s for writing: %s", file_path, err)
 
 
 def _search_and_replace_contents(
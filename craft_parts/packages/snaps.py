@@ -17,16 +17,21 @@
 """Helpers to install snap packages."""
 
 import contextlib
+import glob
 import logging
 import os
 import subprocess
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union
 from urllib import parse
 
 import requests_unixsocket  # type: ignore
 from requests import exceptions
 
+from craft_parts.utils import file_utils
+
 from . import errors
 
 # pylint: disable=line-too-long
@@ -39,6 +44,10 @@ _STORE_ASSERTION = [
 _CHANNEL_RISKS = ["stable", "candidate", "beta", "edge"]
 logger = logging.getLogger(__name__)
 
+# Files downloaded in this session, indexed by snap name and channel. The
+# snap revision is part of the downloaded file names.
+_download_cache: Dict[Tuple[str, str], List[str]] = {}
+
 
 # TODO https://bugs.launchpad.net/snapcraft/+bug/1786868
 
@@ -109,8 +118,7 @@ class SnapPackage:
         Validity of the results are determined by checking self.installed.
         """
         if self._is_installed is None:
-            with contextlib.suppress(exceptions.HTTPError):
-                self._local_snap_info = _get_local_snap_info(self.name)
+            self._local_snap_info = get_snapd_client().get_local_snap_info(self.name)
 
         return self._local_snap_info
 
@@ -123,7 +131,9 @@ class SnapPackage:
             retry_count = 5
             while retry_count > 0:
                 try:
-                    self._store_snap_info = _get_store_snap_info(self.name)
+                    self._store_snap_info = get_snapd_client().get_store_snap_info(
+                        self.name
+                    )
                     break
                 except exceptions.HTTPError as http_error:
                     logger.debug(
@@ -243,6 +253,7 @@ class SnapPackage:
 
         # Now that the snap is installed, invalidate the data we had on it.
         self._is_installed = None
+        get_snapd_client().invalidate(self.name)
 
     def refresh(self):
         """Refresh a snap onto a channel on the system."""
@@ -269,22 +280,71 @@ class SnapPackage:
 
         # Now that the snap is refreshed, invalidate the data we had on it.
         self._is_installed = None
+        get_snapd_client().invalidate(self.name)
 
 
-def download_snaps(*, snaps_list: Sequence[str], directory: str) -> None:
+def download_snaps(
+    *, snaps_list: Sequence[str], directory: str, max_workers: int = 1
+) -> None:
     """Download snaps of the format <snap-name>/<channel> into directory.
 
-    The target directory is created if it does not exist.
+    The target directory is created if it does not exist. Snaps already
+    downloaded in this session are copied from the previous download
+    instead of being downloaded again.
+
+    :param snaps_list: The snaps to download.
+    :param directory: The directory to download snaps to.
+    :param max_workers: The maximum number of concurrent downloads.
     """
     # TODO manifest.yaml with snap revision from future machine output
     # for `snap download`.
     os.makedirs(directory, exist_ok=True)
-    for snap in snaps_list:
-        snap_pkg = SnapPackage(snap)
+    snap_pkgs = [SnapPackage(snap) for snap in snaps_list]
+
+    if max_workers <= 1 or len(snap_pkgs) <= 1:
+        for snap_pkg in snap_pkgs:
+            _download_snap(snap_pkg, directory=directory)
+        return
 
-        # TODO: use dependency injected echoer
-        logger.debug("Downloading snap %s", snap_pkg.name)
-        snap_pkg.download(directory=directory)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_download_snap, snap_pkg, directory=directory)
+            for snap_pkg in snap_pkgs
+        ]
+        # Raise the first error in list order.
+        for future in futures:
+            future.result()
+
+
+def _download_snap(snap_pkg: SnapPackage, *, directory: str) -> None:
+    """Download a snap, reusing a previous download in this session if possible.
+
+    :param snap_pkg: The snap to download.
+    :param directory: The directory to download the snap to.
+    """
+    key = (snap_pkg.name, snap_pkg.channel)
+    cached_files = _download_cache.get(key)
+    if cached_files and all(os.path.exists(f) for f in cached_files):
+        logger.debug("Using previously downloaded snap %s", snap_pkg.name)
+        for cached_file in cached_files:
+            dest = os.path.join(directory, os.path.basename(cached_file))
+            if not os.path.exists(dest):
+                file_utils.link_or_copy(cached_file, dest)
+        return
+
+    # TODO: use dependency injected echoer
+    logger.debug("Downloading snap %s", snap_pkg.name)
+    snap_pkg.download(directory=directory)
+
+    # `snap download` creates <name>_<revision>.snap and .assert files.
+    pattern = os.path.join(glob.escape(directory), f"{glob.escape(snap_pkg.name)}_*")
+    downloaded = [
+        os.path.abspath(f)
+        for f in glob.glob(pattern)
+        if f.endswith((".snap", ".assert"))
+    ]
+    if downloaded:
+        _download_cache[key] = downloaded
 
 
 def install_snaps(snaps_list: Union[Sequence[str], Set[str]]) -> List[str]:
@@ -292,6 +352,10 @@ def install_snaps(snaps_list: Union[Sequence[str], Set[str]]) -> List[str]:
 
     :return: a list of "name=revision" for the snaps installed.
     """
+    # Obtain information on all local snaps with a single request.
+    with contextlib.suppress(errors.SnapdConnectionError):
+        get_snapd_client().get_local_snaps()
+
     snaps_installed = []
     for snap in snaps_list:
         snap_pkg = SnapPackage(snap)
@@ -355,25 +419,128 @@ def _get_local_snap_file_iter(snap_name: str, *, chunk_size: int):
     return snap_file.iter_content(chunk_size)
 
 
-def _get_local_snap_info(snap_name: str) -> Dict[str, Any]:
-    slug = f'snaps/{parse.quote(snap_name, safe="")}'
-    url = get_snapd_socket_path_template().format(slug)
-    try:
-        snap_info = requests_unixsocket.get(url)
-    except exceptions.ConnectionError as err:
-        raise errors.SnapdConnectionError(snap_name=snap_name, url=url) from err
-    snap_info.raise_for_status()
-    return snap_info.json()["result"]
+class SnapdClient:
+    """A session client for the snapd REST API.
 
+    Requests share a pooled connection to the snapd socket, and information
+    on local and store snaps is cached for a limited time.
 
-def _get_store_snap_info(snap_name: str) -> Dict[str, Any]:
-    # This logic uses /v2/find returns an array of results, given that
-    # we do a strict search either 1 result or a 404 will be returned.
-    slug = f"find?{parse.urlencode(dict(name=snap_name))}"
-    url = get_snapd_socket_path_template().format(slug)
-    snap_info = requests_unixsocket.get(url)
-    snap_info.raise_for_status()
-    return snap_info.json()["result"][0]
+    :param ttl: How long cached information remains valid, in seconds.
+    """
+
+    def __init__(self, *, ttl: float = 60.0):
+        self._ttl = ttl
+        self._url_template = get_snapd_socket_path_template()
+        self._session = requests_unixsocket.Session()
+        self._local_snaps: Dict[str, Tuple[float, Optional[Dict[str, Any]]]] = {}
+        self._local_snaps_listed: Optional[float] = None
+        self._store_snaps: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    @property
+    def url_template(self) -> str:
+        """The template for snapd API URLs used by this client."""
+        return self._url_template
+
+    def _is_fresh(self, timestamp: Optional[float]) -> bool:
+        return timestamp is not None and time.monotonic() - timestamp < self._ttl
+
+    def _get(self, slug: str, *, snap_name: str = "") -> Any:
+        url = self._url_template.format(slug)
+        try:
+            response = self._session.get(url)
+        except exceptions.ConnectionError as err:
+            raise errors.SnapdConnectionError(snap_name=snap_name, url=url) from err
+        response.raise_for_status()
+        return response.json()["result"]
+
+    def get_local_snaps(self) -> List[Dict[str, Any]]:
+        """Obtain information on all snaps installed in the system.
+
+        :return: A list of snap information payloads.
+        """
+        if self._is_fresh(self._local_snaps_listed):
+            return [info for _, info in self._local_snaps.values() if info]
+
+        local_snaps = self._get("snaps")
+        now = time.monotonic()
+        self._local_snaps = {snap["name"]: (now, snap) for snap in local_snaps}
+        self._local_snaps_listed = now
+        return local_snaps
+
+    def get_local_snap_info(self, snap_name: str) -> Optional[Dict[str, Any]]:
+        """Obtain information on an installed snap.
+
+        :param snap_name: The snap name.
+
+        :return: The snap information payload, or None if not installed.
+        """
+        cached = self._local_snaps.get(snap_name)
+        if cached and self._is_fresh(cached[0]):
+            return cached[1]
+
+        # A recent listing of all local snaps doesn't contain this snap.
+        if not cached and self._is_fresh(self._local_snaps_listed):
+            return None
+
+        slug = f'snaps/{parse.quote(snap_name, safe="")}'
+        try:
+            snap_info = self._get(slug, snap_name=snap_name)
+        except exceptions.HTTPError:
+            snap_info = None
+
+        self._local_snaps[snap_name] = (time.monotonic(), snap_info)
+        return snap_info
+
+    def get_store_snap_info(self, snap_name: str) -> Dict[str, Any]:
+        """Obtain information on a snap available in the store.
+
+        :param snap_name: The snap name.
+
+        :return: The snap information payload.
+
+        :raise HTTPError: If the store request failed.
+        """
+        cached = self._store_snaps.get(snap_name)
+        if cached and self._is_fresh(cached[0]):
+            return cached[1]
+
+        # This logic uses /v2/find returns an array of results, given that
+        # we do a strict search either 1 result or a 404 will be returned.
+        slug = f"find?{parse.urlencode(dict(name=snap_name))}"
+        url = self._url_template.format(slug)
+        response = self._session.get(url)
+        response.raise_for_status()
+        snap_info = response.json()["result"][0]
+
+        self._store_snaps[snap_name] = (time.monotonic(), snap_info)
+        return snap_info
+
+    def invalidate(self, snap_name: str) -> None:
+        """Discard cached local information on a snap.
+
+        :param snap_name: The snap whose local state changed.
+        """
+        self._local_snaps.pop(snap_name, None)
+        self._local_snaps_listed = None
+
+
+_snapd_client: Optional[SnapdClient] = None
+
+
+def get_snapd_client() -> SnapdClient:
+    """Return the snapd client for this session.
+
+    A new client is created if the snapd socket location changed.
+    """
+    global _snapd_client  # pylint: disable=global-statement
+
+    if (
+        _snapd_client is None
+        or _snapd_client.url_template != get_snapd_socket_path_template()
+    ):
+        _snapd_client = SnapdClient()
+
+    return _snapd_client
 
 
 def get_installed_snaps() -> List[str]:
@@ -381,12 +548,8 @@ def get_installed_snaps() -> List[str]:
 
     :return: a list of "name=revision" for the snaps installed.
     """
-    slug = "snaps"
-    url = get_snapd_socket_path_template().format(slug)
     try:
-        snap_info = requests_unixsocket.get(url)
-        snap_info.raise_for_status()
-        local_snaps = snap_info.json()["result"]
-    except exceptions.ConnectionError:
+        local_snaps = get_snapd_client().get_local_snaps()
+    except errors.SnapdConnectionError:
         local_snaps = []
     return [f'{snap["name"]}={snap["revision"]}' for snap in local_snaps]
@@ -16,10 +16,12 @@
 
 """Specify and apply permissions and ownership to part-owned files."""
 
+import functools
 import os
-from fnmatch import fnmatch
+import re
+from fnmatch import fnmatch, translate
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
 from pydantic import BaseModel, root_validator
 
@@ -89,6 +91,77 @@ class Permissions(BaseModel):
             os.chown(target, self.owner, self.group)
 
 
+class PermissionsTable:
+    """A list of permissions definitions compiled for matching many paths.
+
+    The path patterns of all definitions are translated into a single regular
+    expression with one group per definition, so that matching a path against
+    the whole table takes a single regex match. The filtered and squashed
+    permissions are memoized per set of matching definitions.
+
+    :param permissions: The permissions definitions, in the order they apply.
+    """
+
+    def __init__(self, permissions: Optional[Sequence[Permissions]] = None):
+        self._permissions = list(permissions or [])
+        self._filtered: Dict[Tuple[int, ...], List[Permissions]] = {}
+
+        # Each pattern is an optional lookahead, so all of them are tried
+        # and every matching definition captures its group.
+        self._regex = re.compile(
+            "".join(
+                f"(?:(?=(?P<p{i}>{translate(p.path)})))?"
+                if p.path != "*"
+                else f"(?P<p{i}>)"
+                for i, p in enumerate(self._permissions)
+            )
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self._permissions)
+
+    def _signature(self, path: Union[Path, str]) -> Tuple[int, ...]:
+        match = self._regex.match(str(path))
+        if match is None:
+            return ()
+        # Groups are looked up by name, because the translated patterns may
+        # contain groups of their own (e.g. "*a*b" on Python 3.9 and 3.10).
+        return tuple(
+            i for i in range(len(self._permissions)) if match.start(f"p{i}") >= 0
+        )
+
+    def filter(self, path: Union[Path, str]) -> List[Permissions]:
+        """Get the permissions definitions that apply to ``path``.
+
+        This is equivalent to :func:`filter_permissions`. The returned list
+        is shared between paths with the same matches and must not be modified.
+
+        :param path: The path to match.
+        """
+        if not self._permissions:
+            return []
+
+        signature = self._signature(path)
+        filtered = self._filtered.get(signature)
+        if filtered is None:
+            filtered = [self._permissions[i] for i in signature]
+            self._filtered[signature] = filtered
+        return filtered
+
+    def squash(self, path: Union[Path, str]) -> Optional[Permissions]:
+        """Get the squashed permissions definition that applies to ``path``.
+
+        :param path: The path to match.
+
+        :return: A single ``Permissions`` equivalent to applying all matching
+            definitions, or None if no definitions apply.
+        """
+        filtered = self.filter(path)
+        if not filtered:
+            return None
+        return _squash_permissions(filtered)
+
+
 def filter_permissions(
     target: Union[Path, str], permissions: List[Permissions]
 ) -> List[Permissions]:
@@ -163,18 +236,30 @@ def _squash_permissions(permissions: List[Permissions]) -> Permissions:
     :param permissions: A series of Permissions objects to be "squashed" into a single
         one.
     """
-    attributes = {
+    return _squash_attributes(tuple((p.owner, p.group, p.mode) for p in permissions))
+
+
+@functools.lru_cache(maxsize=None)
+def _squash_attributes(
+    attributes: Tuple[Tuple[Optional[int], Optional[int], Optional[str]], ...]
+) -> Permissions:
+    """Squash the owner, group and mode of a sequence of Permissions.
+
+    Squashed results are memoized, so they must not be modified.
+
+    :param attributes: The owner, group and mode of each Permissions object.
+    """
+    squashed: Dict[str, Optional[Union[int, str]]] = {
         "path": "*",
         "owner": None,
         "group": None,
         "mode": None,
     }
 
-    keys = tuple(attributes.keys())
-    for permission in permissions:
-        for key in keys:
-            permission_value = getattr(permission, key)
-            if permission_value is not None:
-                attributes[key] = permission_value
+    keys = ("owner", "group", "mode")
+    for values in attributes:
+        for key, value in zip(keys, values):
+            if value is not None:
+                squashed[key] = value
 
-    return Permissions(**attributes)
+    return Permissions(**squashed)
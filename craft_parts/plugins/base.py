@@ -64,6 +64,15 @@ class Plugin(abc.ABC):
     def get_build_environment(self) -> Dict[str, str]:
         """Return a dictionary with the environment to use in the build step."""
 
+    def get_build_caches(self) -> Dict[str, str]:
+        """Return the caches to keep across builds, if build caches are enabled.
+
+        :return: A dictionary mapping the environment variables used by build
+            tools to locate their caches to cache names. Parts using the same
+            cache name share the cache.
+        """
+        return {}
+
     @classmethod
     def get_out_of_source_build(cls) -> bool:
         """Return whether the plugin performs out-of-source-tree builds."""
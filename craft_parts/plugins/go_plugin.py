@@ -120,6 +120,10 @@ class GoPlugin(Plugin):
             "GOBIN": f"{self._part_info.part_install_dir}/bin",
         }
 
+    def get_build_caches(self) -> Dict[str, str]:
+        """Return the caches to keep across builds, if build caches are enabled."""
+        return {"GOMODCACHE": "go-mod", "GOCACHE": "go-build"}
+
     def get_build_commands(self) -> List[str]:
         """Return a list of commands to run during the build step."""
         options = cast(GoPluginProperties, self._options)
@@ -161,6 +161,10 @@ class NpmPlugin(Plugin):
             return dict(PATH="${CRAFT_PART_INSTALL}/bin:${PATH}")
         return {}
 
+    def get_build_caches(self) -> Dict[str, str]:
+        """Return the caches to keep across builds, if build caches are enabled."""
+        return {"npm_config_cache": "npm"}
+
     def get_build_commands(self) -> List[str]:
         """Return a list of commands to run during the build step."""
         options = cast(NpmPluginProperties, self._options)
@@ -116,6 +116,10 @@ class PythonPlugin(Plugin):
             "PARTS_PYTHON_VENV_ARGS": "",
         }
 
+    def get_build_caches(self) -> Dict[str, str]:
+        """Return the caches to keep across builds, if build caches are enabled."""
+        return {"PIP_CACHE_DIR": "pip"}
+
     # pylint: disable=line-too-long
 
     def get_build_commands(self) -> List[str]:
@@ -110,6 +110,14 @@ class RustPlugin(Plugin):
         """Return a dictionary with the environment to use in the build step."""
         return {"PATH": "${HOME}/.cargo/bin:${PATH}"}
 
+    def get_build_caches(self) -> Dict[str, str]:
+        """Return the caches to keep across builds, if build caches are enabled."""
+        return {
+            "CARGO_HOME": "cargo",
+            # build artifacts are specific to each part
+            "CARGO_TARGET_DIR": f"cargo-target-{self._part_info.part_name}",
+        }
+
     def get_build_commands(self) -> List[str]:
         """Return a list of commands to run during the build step."""
         options = cast(RustPluginProperties, self._options)
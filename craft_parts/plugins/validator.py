@@ -17,14 +17,21 @@
 """Definitions and helpers for plugin environment validation."""
 
 import logging
+import os
+import re
 import subprocess
 import tempfile
-from typing import List, Optional
+import threading
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
 
 from craft_parts import errors
 
 from .properties import PluginProperties
 
+if TYPE_CHECKING:
+    from craft_parts.executor.shell_pool import ShellPool
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,6 +39,52 @@ COMMAND_NOT_FOUND = 127
 """The shell error code for command not found."""
 
 
+_EXPORT_RE = re.compile(r'^export (\w+)="(.*)"$')
+_VARIABLE_RE = re.compile(r"\$(?:\{(\w+)\}|(\w+))")
+
+
+class ProbeCache:
+    """Outputs of commands executed to validate plugin environments.
+
+    Commands executed during a validation session are run only once for
+    environments that differ only in part-specific variables, such as the
+    part directories or the Go plugin's ``GOBIN``. Concurrent requests for
+    the same command wait for the first execution to finish, and errors are
+    raised to all callers.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._probes: Dict[Tuple[Tuple[str, ...], str], "Future[str]"] = {}
+
+    def get(self, env: str, cmd: str, execute: Callable[[], str]) -> str:
+        """Obtain the output of a command, executing it if not yet executed.
+
+        :param env: The environment in which the command is executed.
+        :param cmd: The command to execute.
+        :param execute: The function that executes the command.
+
+        :return: The command output.
+        """
+        key = (_probe_environment(env), cmd)
+
+        with self._lock:
+            probe = self._probes.get(key)
+            is_new = probe is None
+            if probe is None:
+                probe = self._probes[key] = Future()
+
+        if is_new:
+            try:
+                probe.set_result(execute())
+            except Exception as err:  # pylint: disable=broad-except
+                probe.set_exception(err)
+        else:
+            logger.debug("reuse plugin validation command: %r", cmd)
+
+        return probe.result()
+
+
 class PluginEnvironmentValidator:
     """Base class for plugin environment validators.
 
@@ -44,12 +97,25 @@ class PluginEnvironmentValidator:
 
     :param part_name: The part whose build environment is being validated.
     :param env: A string containing the build step environment setup.
+    :param probe_cache: The cache of commands executed during the validation
+        session, if any.
+    :param shell_pool: The persistent shells to execute commands in, if any.
     """
 
-    def __init__(self, *, part_name: str, env: str, properties: PluginProperties):
+    def __init__(
+        self,
+        *,
+        part_name: str,
+        env: str,
+        properties: PluginProperties,
+        probe_cache: Optional[ProbeCache] = None,
+        shell_pool: Optional["ShellPool"] = None,
+    ):
         self._part_name = part_name
         self._env = env
         self._options = properties
+        self._probe_cache = probe_cache
+        self._shell_pool = shell_pool
 
     def validate_environment(
         self, *, part_dependencies: Optional[List[str]] = None
@@ -132,9 +198,25 @@ class PluginEnvironmentValidator:
 
         :return: The command output or error message.
         """
+        if self._probe_cache is not None:
+            return self._probe_cache.get(self._env, cmd, lambda: self._run_command(cmd))
+
+        return self._run_command(cmd)
+
+    def _run_command(self, cmd: str) -> str:
         logger.debug("plugin validation environment: %s", self._env)
         logger.debug("plugin validation command: %r", cmd)
 
+        if self._shell_pool:
+            result = self._shell_pool.run(cmd, env=self._env)
+            stdout = result.stdout.decode(errors="replace")
+            stderr = result.stderr.decode(errors="replace")
+            if result.returncode != 0:
+                raise subprocess.CalledProcessError(
+                    result.returncode, cmd, output=stdout, stderr=stderr
+                )
+            return stderr if stderr else stdout
+
         with tempfile.NamedTemporaryFile(mode="w+") as env_file:
             print(self._env, file=env_file)
             print(cmd, file=env_file)
@@ -148,3 +230,56 @@ class PluginEnvironmentValidator:
             )
 
         return proc.stderr if proc.stderr else proc.stdout
+
+
+def _probe_environment(env: str) -> Tuple[str, ...]:
+    """Obtain the part of a build environment that can change a probe output.
+
+    Exported variables are expanded in order. The ``CRAFT_PART_*`` variables
+    and the variables pointing to the part directories are left out, except
+    for ``PATH``, which selects the executables being probed.
+
+    :param env: A string containing the build step environment setup.
+
+    :return: The resolved variables and the statements that are not plain
+        variable exports, in a canonical form.
+    """
+    variables: Dict[str, str] = {}
+    statements: List[str] = []
+
+    for line in env.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        match = _EXPORT_RE.match(line)
+        if not match:
+            statements.append(line)
+            continue
+
+        name, value = match.groups()
+        variables[name] = _VARIABLE_RE.sub(
+            lambda m: variables.get(m.group(1) or m.group(2), m.group(0)), value
+        )
+
+    part_dirs = [
+        variables[name]
+        for name in ["CRAFT_PART_SRC", "CRAFT_PART_BUILD", "CRAFT_PART_INSTALL"]
+        if name in variables
+    ]
+    part_dir = os.path.commonpath(part_dirs) if part_dirs else None
+
+    resolved = [
+        f"{name}={value}"
+        for name, value in sorted(variables.items())
+        if not name.startswith("CRAFT_PART_")
+        and (name == "PATH" or not _refers_to(value, part_dir))
+    ]
+    return tuple(resolved + statements)
+
+
+def _refers_to(value: str, path: Optional[str]) -> bool:
+    """Verify whether a variable value refers to a path or its contents."""
+    if path is None:
+        return False
+    return re.search(re.escape(path) + r"(?=$|[/:\s])", value) is not None
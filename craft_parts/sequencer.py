@@ -19,7 +19,7 @@
 import logging
 from typing import Dict, List, Optional, Sequence, Set
 
-from craft_parts import parts, steps
+from craft_parts import instrumentation, parts, steps
 from craft_parts.actions import Action, ActionProperties, ActionType
 from craft_parts.infos import ProjectInfo, ProjectVar
 from craft_parts.overlays import LayerHash, LayerStateManager
@@ -79,8 +79,9 @@ class Sequencer:
 
         :returns: The list of actions that should be executed.
         """
-        self._actions = []
-        self._add_all_actions(target_step, part_names)
+        with instrumentation.span("plan"):
+            self._actions = []
+            self._add_all_actions(target_step, part_names)
         return self._actions
 
     def reload_state(self) -> None:
@@ -384,7 +385,16 @@ class Sequencer:
 
         :return: This topmost layer's verification hash.
         """
-        for part in self._part_list:
+        try:
+            top_index = self._layer_state.get_index(top_part)
+        except ValueError:
+            raise RuntimeError(f"part {top_part!r} not in parts list") from None
+
+        # Layers below the first layer not known to be consistent were already
+        # verified and haven't changed since then.
+        start = min(self._layer_state.consistent_layers, top_index)
+
+        for part in self._part_list[start : top_index + 1]:
             layer_hash = self._layer_state.compute_layer_hash(part)
 
             # run the overlay step if the layer hash doesn't match the existing
@@ -400,11 +410,9 @@ class Sequencer:
                     )
                     self._layer_state.set_layer_hash(part, layer_hash)
 
-            if part.name == top_part.name:
-                return layer_hash
+                self._layer_state.set_consistent(part)
 
-        # execution should never reach this line
-        raise RuntimeError(f"part {top_part!r} not in parts list")
+        return layer_hash
 
     def _check_overlay_dependencies(self, part: Part, step: Step) -> bool:
         """Verify whether the step is dirty because the overlay changed."""
@@ -48,6 +48,9 @@ class LocalSource(SourceHandler):
             self._ignore_patterns.append(self._dirs.parts_dir.name)
             self._ignore_patterns.append(self._dirs.stage_dir.name)
             self._ignore_patterns.append(self._dirs.prime_dir.name)
+            self._ignore_patterns.append(self._dirs.trash_dir.name)
+            self._ignore_patterns.append(self._dirs.log_dir.name)
+            self._ignore_patterns.append(self._dirs.profile_dir.name)
         else:
             # otherwise check if work_dir inside source dir
             with contextlib.suppress(ValueError):
@@ -20,7 +20,7 @@ import os
 import shutil
 import tempfile
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Union
 
 import yaml
 from overrides import overrides
@@ -52,6 +52,7 @@ class SnapSource(FileSourceHandler):
         source_depth: Optional[int] = None,
         source_checksum: Optional[str] = None,
         project_dirs: Optional[ProjectDirs] = None,
+        processors: Optional[int] = None,
     ) -> None:
         super().__init__(
             source,
@@ -78,6 +79,8 @@ class SnapSource(FileSourceHandler):
         if source_depth:
             raise errors.InvalidSourceOption(source_type="snap", option="source-depth")
 
+        self._processors = processors
+
     @overrides
     def provision(
         self,
@@ -99,31 +102,58 @@ class SnapSource(FileSourceHandler):
             snap_file = self.part_src_dir / os.path.basename(self.source)
         snap_file = snap_file.resolve()
 
+        # Extract straight to the destination only if it's empty. Otherwise
+        # unsquashfs would write over existing files, which may be hard links
+        # to files in other directories.
+        if _is_empty(dst, ignore=snap_file):
+            self._extract(snap_file, dst)
+        else:
+            with tempfile.TemporaryDirectory(prefix=str(snap_file.parent)) as temp_dir:
+                self._extract(snap_file, Path(temp_dir))
+                file_utils.link_or_copy_tree(
+                    source_tree=temp_dir, destination_tree=str(dst)
+                )
+
+        if not keep:
+            os.remove(snap_file)
+
+    def _extract(self, snap_file: Path, dst: Path) -> None:
+        """Unsquash the snap and rename its meta and snap directories.
+
+        :param snap_file: The snap package file.
+        :param dst: The directory to extract the snap contents to.
+        """
         # unsquashfs [options] filesystem [directories or files to extract]
         # options:
         # -force: if file already exists then overwrite
+        # -processors <number>: use <number> processors
         # -dest <pathname>: unsquash to <pathname>
-        with tempfile.TemporaryDirectory(prefix=str(snap_file.parent)) as temp_dir:
-            extract_command = [
-                "unsquashfs",
-                "-force",
-                "-dest",
-                temp_dir,
-                snap_file,
-            ]
-            self._run_output(extract_command)
-            snap_name = _get_snap_name(snap_file.name, temp_dir)
-            # Rename meta and snap dirs from the snap
-            rename_paths = (os.path.join(temp_dir, d) for d in ["meta", "snap"])
-            rename_paths = (d for d in rename_paths if os.path.exists(d))
-            for rename in rename_paths:
-                shutil.move(rename, f"{rename}.{snap_name}")
-            file_utils.link_or_copy_tree(
-                source_tree=temp_dir, destination_tree=str(dst)
-            )
-
-        if not keep:
-            os.remove(snap_file)
+        extract_command: List[Union[str, Path]] = ["unsquashfs", "-force"]
+        if self._processors:
+            extract_command.extend(["-processors", str(self._processors)])
+        extract_command.extend(["-dest", str(dst), snap_file])
+        self._run_output(extract_command)
+        snap_name = _get_snap_name(snap_file.name, str(dst))
+        # Rename meta and snap dirs from the snap
+        rename_paths = (os.path.join(dst, d) for d in ["meta", "snap"])
+        rename_paths = (d for d in rename_paths if os.path.exists(d))
+        for rename in rename_paths:
+            shutil.move(rename, f"{rename}.{snap_name}")
+
+
+def _is_empty(path: Path, *, ignore: Path) -> bool:
+    """Verify whether a directory is missing or has no entries.
+
+    :param path: The directory to verify.
+    :param ignore: An entry to disregard, such as the snap file itself.
+
+    :return: Whether the directory has no entries other than the ignored one.
+    """
+    try:
+        with os.scandir(path) as entries:
+            return all(Path(entry.path).resolve() == ignore for entry in entries)
+    except FileNotFoundError:
+        return True
 
 
 def _get_snap_name(snap: str, snap_dir: str) -> str:
@@ -16,6 +16,7 @@
 
 """Part state management."""
 
+from .shared_index import SharedAreaIndex  # noqa: F401
 from .state_manager import StateManager  # noqa: F401
 from .step_state import MigrationState  # noqa: F401
 from .step_state import StepState  # noqa: F401
@@ -0,0 +1,212 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2022 Canonical Ltd.
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License version 3 as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Index of the entries owned by each part in a shared area."""
+
+import contextlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SUFFIX = ".json"
+
+
+class SharedAreaIndex:
+    """Reference counts of entries migrated by parts to a shared area.
+
+    The index maps each file and directory migrated to the stage or prime
+    directory to the names of the parts that migrated it. Each part entry
+    records the modification time of the step state it was created from,
+    so that an index which is out of sync with the part states can be
+    detected and rebuilt.
+
+    The entries of each part are stored in a separate file in the index
+    directory, and the entries owned by each part are kept along with the
+    owners of each entry. Updating or removing the entries of a part only
+    reads and writes the entries of that part.
+
+    :param path: The path to the index directory.
+    """
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._part_files: Dict[str, Set[str]] = {}
+        self._part_dirs: Dict[str, Set[str]] = {}
+        self._file_owners: Dict[str, Set[str]] = {}
+        self._dir_owners: Dict[str, Set[str]] = {}
+        self._state_times: Dict[str, int] = {}
+        self._modified: Set[str] = set()
+
+    @classmethod
+    def load(cls, path: Path) -> "SharedAreaIndex":
+        """Load the entries of all parts from disk.
+
+        :param path: The path to the index directory.
+
+        :return: The loaded index. Parts whose index file can't be read are
+            not included.
+        """
+        index = cls(path)
+        try:
+            entries = list(os.scandir(path))
+        except FileNotFoundError:
+            return index
+        except OSError as err:
+            logger.debug("ignoring shared area index %s: %s", path, err)
+            return index
+
+        for entry in entries:
+            if not entry.name.endswith(_SUFFIX):
+                continue
+            try:
+                data = json.loads(Path(entry.path).read_text())
+            except (OSError, ValueError) as err:
+                logger.debug("ignoring shared area index %s: %s", entry.path, err)
+                continue
+
+            part_name = entry.name[: -len(_SUFFIX)]
+            index._insert(
+                part_name,
+                files=data.get("files", []),
+                directories=data.get("directories", []),
+            )
+            index._state_times[part_name] = data.get("state-time")
+
+        index._modified.clear()
+        return index
+
+    def write(self) -> None:
+        """Write the entries of the parts added or removed to disk."""
+        if not self._modified:
+            return
+
+        self._path.mkdir(parents=True, exist_ok=True)
+        for part_name in sorted(self._modified):
+            part_path = self._path / f"{part_name}{_SUFFIX}"
+            if part_name not in self._state_times:
+                with contextlib.suppress(FileNotFoundError):
+                    part_path.unlink()
+                continue
+
+            data = {
+                "files": sorted(self._part_files[part_name]),
+                "directories": sorted(self._part_dirs[part_name]),
+                "state-time": self._state_times[part_name],
+            }
+            tmp_path = part_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(data))
+            tmp_path.replace(part_path)
+
+        self._modified.clear()
+
+    def add(
+        self,
+        part_name: str,
+        *,
+        files: Iterable[str],
+        directories: Iterable[str],
+        state_path: Path,
+    ) -> None:
+        """Set the entries owned by a part, replacing any previous entries.
+
+        :param part_name: The name of the part owning the entries.
+        :param files: The files migrated by the part.
+        :param directories: The directories migrated by the part.
+        :param state_path: The path to the step state containing the entries.
+        """
+        self.remove(part_name)
+        self._insert(part_name, files=files, directories=directories)
+        self._state_times[part_name] = state_path.stat().st_mtime_ns
+
+    def remove(self, part_name: str) -> None:
+        """Remove all entries owned by a part.
+
+        :param part_name: The name of the part owning the entries.
+        """
+        self._modified.add(part_name)
+        self._state_times.pop(part_name, None)
+
+        for part_entries, owners in (
+            (self._part_files, self._file_owners),
+            (self._part_dirs, self._dir_owners),
+        ):
+            for entry in part_entries.pop(part_name, set()):
+                entry_owners = owners[entry]
+                entry_owners.discard(part_name)
+                if not entry_owners:
+                    del owners[entry]
+
+    def is_current(self, state_paths: Dict[str, Path]) -> bool:
+        """Verify if the index matches the step states of the given parts.
+
+        :param state_paths: A dictionary mapping part names to the path of
+            the step state for the shared area.
+
+        :return: Whether the index contains all parts with a step state, and
+            was updated from the current version of each state.
+        """
+        for part_name, state_path in state_paths.items():
+            try:
+                state_time: Optional[int] = state_path.stat().st_mtime_ns
+            except FileNotFoundError:
+                state_time = None
+
+            if self._state_times.get(part_name) != state_time:
+                return False
+
+        return True
+
+    def get_exclusive_entries(
+        self, part_name: str, *, part_names: Iterable[str]
+    ) -> Tuple[Set[str], Set[str]]:
+        """Obtain the entries owned by a part and not by any other part.
+
+        :param part_name: The name of the part owning the entries.
+        :param part_names: The names of all parts to consider as owners.
+
+        :return: A tuple containing the sets of files and directories owned
+            only by the given part.
+        """
+        others = set(part_names) - {part_name}
+
+        def exclusive(
+            part_entries: Dict[str, Set[str]], owners: Dict[str, Set[str]]
+        ) -> Set[str]:
+            return {
+                k for k in part_entries.get(part_name, set()) if not owners[k] & others
+            }
+
+        return (
+            exclusive(self._part_files, self._file_owners),
+            exclusive(self._part_dirs, self._dir_owners),
+        )
+
+    def _insert(
+        self, part_name: str, *, files: Iterable[str], directories: Iterable[str]
+    ) -> None:
+        self._modified.add(part_name)
+        for part_entries, owners, entries in (
+            (self._part_files, self._file_owners, files),
+            (self._part_dirs, self._dir_owners, directories),
+        ):
+            part_set = part_entries.setdefault(part_name, set())
+            for entry in entries:
+                part_set.add(entry)
+                owners.setdefault(entry, set()).add(part_name)
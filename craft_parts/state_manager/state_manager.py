@@ -22,7 +22,7 @@ import logging
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple, cast
 
-from craft_parts import parts, sources, steps
+from craft_parts import instrumentation, parts, sources, steps
 from craft_parts.infos import ProjectInfo, ProjectVar
 from craft_parts.parts import Part
 from craft_parts.sources import SourceHandler
@@ -184,12 +184,13 @@ class StateManager:
         self._source_handler_cache: Dict[str, Optional[SourceHandler]] = {}
         self._dirty_report_cache: Dict[Tuple[str, Step], Optional[DirtyReport]] = {}
 
-        part_step_list = _sort_steps_by_state_timestamp(part_list)
+        with instrumentation.span("load state"):
+            part_step_list = _sort_steps_by_state_timestamp(part_list)
 
-        for part, step, _ in part_step_list:
-            state = load_step_state(part, step)
-            if state:
-                self.set_state(part, step, state=state)
+            for part, step, _ in part_step_list:
+                state = load_step_state(part, step)
+                if state:
+                    self.set_state(part, step, state=state)
 
     def set_state(self, part: Part, step: Step, *, state: StepState) -> None:
         """Set the state of the given part and step.
@@ -119,6 +119,17 @@ def get_step_state_path(part: Part, step: Step) -> Path:
     return part.part_state_dir / step.name.lower()
 
 
+def get_shared_index_path(parts_dir: Path, step: Step) -> Path:
+    """Return the path to the shared area index file for the given step."""
+    if step == Step.STAGE:
+        return parts_dir / ".shared" / "stage"
+
+    if step == Step.PRIME:
+        return parts_dir / ".shared" / "prime"
+
+    raise RuntimeError(f"no shared area index in step {step!r}")
+
+
 def get_overlay_migration_state_path(state_dir: Path, step: Step) -> Path:
     """Return the path to the overlay migration state file for the given step."""
     if step == Step.STAGE:
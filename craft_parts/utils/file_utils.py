@@ -19,18 +19,23 @@
 import contextlib
 import errno
 import hashlib
+import json
 import logging
 import os
 import shutil
+import stat
 import sys
 from pathlib import Path
-from typing import Callable, Generator, List, Optional, Set
+from typing import Callable, Dict, Generator, List, Optional, Set
 
 from craft_parts import errors
 from craft_parts.permissions import Permissions, apply_permissions
 
 logger = logging.getLogger(__name__)
 
+# The ioctl request to clone a file (FICLONE in linux/fs.h).
+_FICLONE = 0x40049409
+
 
 class NonBlockingRWFifo:
     """A non-blocking FIFO for reading and writing."""
@@ -49,15 +54,19 @@ class NonBlockingRWFifo:
         """Return the path to the FIFO file."""
         return self._path
 
+    def fileno(self) -> int:
+        """Return the file descriptor of the FIFO."""
+        return self._fd
+
     def read(self) -> str:
-        """Read from the FIFO."""
-        total_read = ""
+        """Read all data available in the FIFO without blocking."""
+        chunks: List[bytes] = []
         with contextlib.suppress(BlockingIOError):
-            value = os.read(self._fd, 1024)
+            value = os.read(self._fd, 65536)
             while value:
-                total_read += value.decode(sys.getfilesystemencoding())
-                value = os.read(self._fd, 1024)
-        return total_read
+                chunks.append(value)
+                value = os.read(self._fd, 65536)
+        return b"".join(chunks).decode(sys.getfilesystemencoding())
 
     def write(self, data: str) -> int:
         """Write to the FIFO.
@@ -254,6 +263,131 @@ def link_or_copy_tree(
             copy_function(source, destination)
 
 
+def clone_or_copy(source: str, destination: str) -> None:
+    """Copy a file, sharing its data blocks with the source if possible.
+
+    On filesystems supporting reflinks (e.g. btrfs or xfs), the copy is a
+    clone of the source file which doesn't duplicate its contents. Otherwise,
+    or if the source is not a regular file, it's copied with :func:`copy`.
+
+    :param source: The source to be copied to destination.
+    :param destination: Where to put the copy.
+    """
+    if sys.platform == "linux" and stat.S_ISREG(os.lstat(source).st_mode):
+        import fcntl  # pylint: disable=import-outside-toplevel
+
+        try:
+            with open(source, "rb") as src, open(destination, "xb") as dst:
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        except OSError:
+            pass
+        else:
+            shutil.copystat(source, destination)
+            return
+
+    copy(source, destination)
+
+
+def sync_tree(source_tree: str, destination_tree: str, *, manifest: Path) -> None:
+    """Synchronize a destination tree with a source tree.
+
+    Only entries added or changed since the previous synchronization, as
+    recorded in the manifest file, are copied again. Entries which were
+    synchronized previously but no longer exist in the source tree are
+    removed. Other entries created in the destination tree (such as build
+    artifacts) are kept.
+
+    Files are copied rather than hard-linked, sharing data blocks with the
+    source if the filesystem supports it, so that writing to a file in the
+    destination tree never modifies the source tree.
+
+    :param source_tree: Source directory to be synchronized.
+    :param destination_tree: Destination directory.
+    :param manifest: The file to record the synchronized entries.
+    """
+    if not os.path.isdir(source_tree):
+        raise errors.CopyTreeError(f"{source_tree!r} is not a directory")
+
+    previous: Dict[str, List[int]] = {}
+    if os.path.isdir(destination_tree):
+        with contextlib.suppress(OSError, ValueError):
+            previous = json.loads(manifest.read_text())
+    else:
+        _remove_entry(destination_tree)
+
+    create_similar_directory(source_tree, destination_tree)
+
+    # Directories are recorded with an empty signature, other entries with
+    # the source mode, size and mtime followed by the destination inode,
+    # size and mtime.
+    current: Dict[str, List[int]] = {}
+    pending = [""]
+    while pending:
+        reldir = pending.pop()
+        with os.scandir(os.path.join(source_tree, reldir)) as entries:
+            for entry in entries:
+                relpath = os.path.join(reldir, entry.name)
+                destination = os.path.join(destination_tree, relpath)
+
+                if entry.is_dir(follow_symlinks=False):
+                    if os.path.islink(destination) or not os.path.isdir(destination):
+                        _remove_entry(destination)
+                        create_similar_directory(entry.path, destination)
+                    current[relpath] = []
+                    pending.append(relpath)
+                    continue
+
+                src_stat = entry.stat(follow_symlinks=False)
+                signature = [src_stat.st_mode, src_stat.st_size, src_stat.st_mtime_ns]
+                try:
+                    dst_stat: Optional[os.stat_result] = os.lstat(destination)
+                except FileNotFoundError:
+                    dst_stat = None
+
+                # Destinations still linked to the source must be copied.
+                if dst_stat and not os.path.samestat(src_stat, dst_stat):
+                    dst_signature = [
+                        dst_stat.st_ino,
+                        dst_stat.st_size,
+                        dst_stat.st_mtime_ns,
+                    ]
+                    if previous.get(relpath) == signature + dst_signature:
+                        current[relpath] = previous[relpath]
+                        continue
+
+                if dst_stat:
+                    _remove_entry(destination)
+                clone_or_copy(entry.path, destination)
+                dst_stat = os.lstat(destination)
+                current[relpath] = signature + [
+                    dst_stat.st_ino,
+                    dst_stat.st_size,
+                    dst_stat.st_mtime_ns,
+                ]
+
+    # Remove entries that are gone from the source tree, children first.
+    # Directories still containing other entries are kept.
+    for relpath in sorted(set(previous) - set(current), reverse=True):
+        destination = os.path.join(destination_tree, relpath)
+        if previous[relpath]:
+            with contextlib.suppress(OSError):
+                os.unlink(destination)
+        else:
+            with contextlib.suppress(OSError):
+                os.rmdir(destination)
+
+    manifest.parent.mkdir(parents=True, exist_ok=True)
+    manifest.write_text(json.dumps(current))
+
+
+def _remove_entry(path: str) -> None:
+    """Remove a file, symlink or directory tree, if it exists."""
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.unlink(path)
+
+
 def create_similar_directory(
     source: str, destination: str, permissions: Optional[List[Permissions]] = None
 ) -> None:
@@ -267,9 +401,9 @@ def create_similar_directory(
         If omitted, the new directory will have the same permissions and ownership
         of ``source``.
     """
-    stat = os.stat(source, follow_symlinks=False)
-    uid = stat.st_uid
-    gid = stat.st_gid
+    source_stat = os.stat(source, follow_symlinks=False)
+    uid = source_stat.st_uid
+    gid = source_stat.st_gid
     os.makedirs(destination, exist_ok=True)
 
     # Windows does not have "os.chown" implementation and copystat
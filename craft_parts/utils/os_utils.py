@@ -16,14 +16,17 @@
 
 """Utilities related to the operating system."""
 
+import codecs
 import contextlib
+import locale
 import logging
 import os
+import re
 import subprocess
 import sys
 import time
 from pathlib import Path
-from typing import Callable, Dict, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Set
 
 from craft_parts import errors
 
@@ -80,6 +83,7 @@ def get_bin_paths(*, root: Path, existing_only=True) -> List[str]:
 
     :return: The list of executable paths.
     """
+    root = Path(root)
     paths = [
         root / "usr" / "sbin",
         root / "usr" / "bin",
@@ -87,17 +91,21 @@ def get_bin_paths(*, root: Path, existing_only=True) -> List[str]:
         root / "bin",
     ]
 
-    return [str(p) for p in paths if not existing_only or p.exists()]
+    return _filter_paths(paths, root=root, existing_only=existing_only)
 
 
-def get_include_paths(*, root: Path, arch_triplet: str) -> List[str]:
+def get_include_paths(
+    *, root: Path, arch_triplet: str, existing_only=True
+) -> List[str]:
     """List common include paths.
 
     :param root: A path to prepend to each entry in the list.
     :arch_triplet: The machine-vendor-os platform triplet definition.
+    :param existing_only: Only list paths that are present in the system.
 
     :return: The list of include paths.
     """
+    root = Path(root)
     paths = [
         root / "include",
         root / "usr" / "include",
@@ -105,7 +113,7 @@ def get_include_paths(*, root: Path, arch_triplet: str) -> List[str]:
         root / "usr" / "include" / arch_triplet,
     ]
 
-    return [str(p) for p in paths if p.exists()]
+    return _filter_paths(paths, root=root, existing_only=existing_only)
 
 
 def get_library_paths(
@@ -119,6 +127,7 @@ def get_library_paths(
 
     :return: The list of library paths.
     """
+    root = Path(root)
     paths = [
         root / "lib",
         root / "usr" / "lib",
@@ -126,17 +135,21 @@ def get_library_paths(
         root / "usr" / "lib" / arch_triplet,
     ]
 
-    return [str(p) for p in paths if not existing_only or p.exists()]
+    return _filter_paths(paths, root=root, existing_only=existing_only)
 
 
-def get_pkg_config_paths(*, root: Path, arch_triplet: str) -> List[str]:
+def get_pkg_config_paths(
+    *, root: Path, arch_triplet: str, existing_only=True
+) -> List[str]:
     """List common pkg-config paths.
 
     :param root: A path to prepend to each entry in the list.
     :arch_triplet: The machine-vendor-os platform triplet definition.
+    :param existing_only: Only list paths that are present in the system.
 
     :return: The list of pkg-config paths.
     """
+    root = Path(root)
     paths = [
         root / "lib" / "pkgconfig",
         root / "lib" / arch_triplet / "pkgconfig",
@@ -148,7 +161,52 @@ def get_pkg_config_paths(*, root: Path, arch_triplet: str) -> List[str]:
         root / "usr" / "local" / "share" / "pkgconfig",
     ]
 
-    return [str(p) for p in paths if p.exists()]
+    return _filter_paths(paths, root=root, existing_only=existing_only)
+
+
+def find_existing_paths(paths: Iterable[Path], *, root: Path) -> Set[Path]:
+    """Verify which of the given paths under a root directory exist.
+
+    Instead of probing each path, the directories leading to the paths are
+    listed once each, and directories under a missing directory are not
+    listed at all.
+
+    :param paths: The paths to verify, located under the root directory.
+    :param root: The root directory containing the paths.
+
+    :return: The set of paths that exist.
+    """
+    listings: Dict[Path, Dict[str, os.DirEntry]] = {}
+
+    def _list(directory: Path) -> Dict[str, os.DirEntry]:
+        if directory in listings:
+            return listings[directory]
+
+        listings[directory] = {}
+        if directory not in (root, directory.parent):
+            parent_entry = _list(directory.parent).get(directory.name)
+            if not parent_entry or not parent_entry.is_dir():
+                return listings[directory]
+
+        with contextlib.suppress(OSError), os.scandir(directory) as entries:
+            listings[directory] = {entry.name: entry for entry in entries}
+        return listings[directory]
+
+    existing: Set[Path] = set()
+    for path in paths:
+        entry = _list(path.parent).get(path.name)
+        # dangling symlinks are listed but don't exist
+        if entry and (not entry.is_symlink() or os.path.exists(entry.path)):
+            existing.add(path)
+
+    return existing
+
+
+def _filter_paths(paths: List[Path], *, root: Path, existing_only: bool) -> List[str]:
+    if existing_only:
+        existing = find_existing_paths(paths, root=root)
+        paths = [p for p in paths if p in existing]
+    return [str(p) for p in paths]
 
 
 def is_dumb_terminal() -> bool:
@@ -249,6 +307,23 @@ def mount_overlayfs(mountpoint: str, *args) -> None:
     subprocess.check_call(["fuse-overlayfs", *args, mountpoint])
 
 
+def mount_kernel_overlayfs(mountpoint: str, *args) -> None:
+    """Mount an overlay filesystem using the kernel overlayfs.
+
+    :param mountpoint: Where the device will be mounted.
+    :param *args: Additional arguments to ``mount(8)``.
+
+    :raises subprocess.CalledProcessError: on error, with the error output.
+    """
+    logger.debug("overlayfs mountpoint=%r, args=%r", mountpoint, args)
+    subprocess.run(
+        ["/bin/mount", "-toverlay", *args, "overlay", mountpoint],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+
+
 _UMOUNT_RETRIES = 5
 
 
@@ -351,18 +426,39 @@ class OsRelease:
         raise errors.OsReleaseCodenameError()
 
 
+# Line boundaries in universal newlines mode, unlike str.splitlines().
+_NEWLINE_RE = re.compile(r"\r\n|\r|\n")
+
+
 def process_run(command: List[str], log_func: Callable[[str], None], **kwargs) -> None:
     """Run a command and handle its output."""
+    decoder = codecs.getincrementaldecoder(locale.getpreferredencoding(False))()
+
     with subprocess.Popen(
         command,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
-        universal_newlines=True,
         **kwargs,
     ) as proc:
         if not proc.stdout:
             return
-        for line in iter(proc.stdout.readline, ""):
+
+        # Read the output in large chunks and split lines in bulk, keeping
+        # the last incomplete line until the next chunk is read. A trailing
+        # carriage return is also kept, it may be followed by a line feed.
+        partial = ""
+        for chunk in iter(lambda: proc.stdout.read1(65536), b""):  # type: ignore
+            text = partial + decoder.decode(chunk)
+            end = len(text) - 1 if text.endswith("\r") else len(text)
+            lines = _NEWLINE_RE.split(text[:end])
+            partial = lines.pop() + text[end:]
+            for line in lines:
+                log_func(":: " + line.strip())
+
+        lines = _NEWLINE_RE.split(partial + decoder.decode(b"", final=True))
+        if not lines[-1]:
+            lines.pop()
+        for line in lines:
             log_func(":: " + line.strip())
         ret = proc.wait()
 
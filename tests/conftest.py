@@ -87,6 +87,18 @@ def http_server(request):
     server_thread.join()
 
 
+@pytest.fixture(autouse=True)
+def snapd_client(mocker):
+    """Don't reuse snap information cached by the snapd client in other tests."""
+    mocker.patch("craft_parts.packages.snaps._snapd_client", None)
+
+
+@pytest.fixture(autouse=True)
+def fuse_overlayfs(mocker):
+    """Mount overlays with fuse-overlayfs, even if running as root."""
+    mocker.patch("craft_parts.overlays.overlay_fs._kernel_overlay_usable", False)
+
+
 # XXX: check windows compatibility, explore if fixture setup can skip itself
 
 
@@ -14,6 +14,7 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import json
 import os
 import runpy
 import sys
@@ -201,6 +202,23 @@ def test_main_alternative_work_dir(mocker, capfd):
     assert sorted(os.listdir(".")) == [".cache", "parts.yaml", "work_dir"]
 
 
+def test_main_profile(mocker, capfd):
+    Path("parts.yaml").write_text(parts_yaml)
+
+    mocker.patch.object(sys, "argv", ["cmd", "--profile", "build"])
+    main.main()
+
+    out, err = capfd.readouterr()
+    assert err == ""
+    assert out.startswith(execute_result[2])
+    assert "foo:build" in out
+    assert "Trace written to" in out
+
+    trace = json.loads(Path("craft-parts-trace.json").read_text())
+    names = {event["name"] for event in trace["traceEvents"]}
+    assert {"plan", "prologue", "foo:pull", "foo:build", "bar:build"} <= names
+
+
 @pytest.mark.parametrize("opt", ["--f", "--file"])
 def test_main_alternative_parts_file(mocker, capfd, opt):
     Path("other.yaml").write_text(parts_yaml)
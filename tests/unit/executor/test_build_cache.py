@@ -0,0 +1,157 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2022 Canonical Ltd.
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License version 3 as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from craft_parts.executor import build_cache
+from craft_parts.executor.build_cache import BuildCache, CacheStats
+
+
+@pytest.mark.usefixtures("new_dir")
+class TestBuildCache:
+    """Verify build cache management."""
+
+    def test_get_environment(self, new_dir):
+        cache = BuildCache(Path(new_dir))
+
+        assert cache.get_environment({"GOCACHE": "go-build"}) == {
+            "GOCACHE": f"{new_dir}/build-cache/go-build"
+        }
+
+    def test_track_stats(self, new_dir, mocker):
+        mocker.patch("craft_parts.executor.build_cache._SCAN_INTERVAL", 0)
+        cache = BuildCache(Path(new_dir))
+
+        with cache.track(["foo"]) as stats:
+            assert Path("build-cache/foo").is_dir()
+            Path("build-cache/foo/a").write_text("aaa")
+            Path("build-cache/foo/sub").mkdir()
+            Path("build-cache/foo/sub/b").write_text("bb")
+
+        assert stats == [CacheStats(name="foo", reused=0, added=2, size=5)]
+
+        with cache.track(["foo"]) as stats:
+            Path("build-cache/foo/c").write_text("c")
+
+        assert stats == [CacheStats(name="foo", reused=2, added=1, size=6)]
+
+        index = json.loads(Path("build-cache/index.json").read_text())
+        assert index["foo"]["size"] == 6
+        assert index["foo"]["entries"] == 3
+
+    def test_track_skips_recent_scan(self, new_dir, mocker):
+        scan = mocker.spy(build_cache, "_scan")
+        cache = BuildCache(Path(new_dir))
+
+        with cache.track(["foo"]) as stats:
+            Path("build-cache/foo/a").write_text("aaa")
+
+        assert stats == [CacheStats(name="foo", reused=0, added=1, size=3)]
+
+        with cache.track(["foo"]) as stats:
+            Path("build-cache/foo/b").write_text("bb")
+
+        # the cache was scanned less than a scan interval ago
+        assert stats == []
+        assert scan.call_count == 1
+
+        index = json.loads(Path("build-cache/index.json").read_text())
+        assert index["foo"]["size"] == 3
+
+    def test_track_no_caches(self, new_dir):
+        cache = BuildCache(Path(new_dir))
+
+        with cache.track([]) as stats:
+            pass
+
+        assert stats == []
+        assert Path("build-cache").exists() is False
+
+    def test_track_stats_on_error(self, new_dir):
+        cache = BuildCache(Path(new_dir))
+
+        with pytest.raises(RuntimeError), cache.track(["foo"]) as stats:
+            Path("build-cache/foo/a").write_text("a")
+            raise RuntimeError("build failed")
+
+        assert stats == [CacheStats(name="foo", reused=0, added=1, size=1)]
+
+    def test_evict_least_recently_used(self, new_dir):
+        cache = BuildCache(Path(new_dir), max_size=10)
+
+        for name in ["foo", "bar", "baz"]:
+            with cache.track([name]):
+                Path("build-cache", name, "data").write_text("x" * 4)
+
+        # the total size exceeded the limit when adding baz
+        assert Path("build-cache/foo").exists() is False
+        assert Path("build-cache/bar/data").exists()
+        assert Path("build-cache/baz/data").exists()
+
+        index = json.loads(Path("build-cache/index.json").read_text())
+        assert sorted(index) == ["bar", "baz"]
+
+    def test_evict_keeps_current_caches(self, new_dir):
+        cache = BuildCache(Path(new_dir), max_size=2)
+
+        with cache.track(["foo"]):
+            Path("build-cache/foo/data").write_text("x" * 4)
+
+        assert Path("build-cache/foo/data").exists()
+
+    def test_evict_read_only_cache(self, new_dir):
+        cache = BuildCache(Path(new_dir), max_size=2)
+
+        with cache.track(["foo"]):
+            module = Path("build-cache/foo/mod@v1")
+            module.mkdir()
+            Path(module, "data").write_text("x" * 4)
+            module.chmod(0o555)
+
+        with cache.track(["bar"]):
+            pass
+
+        assert Path("build-cache/foo").exists() is False
+
+    def test_corrupted_index(self, new_dir):
+        Path("build-cache").mkdir()
+        Path("build-cache/index.json").write_text("{")
+        cache = BuildCache(Path(new_dir))
+
+        with cache.track(["foo"]):
+            pass
+
+        index = json.loads(Path("build-cache/index.json").read_text())
+        assert list(index) == ["foo"]
+
+    def test_track_concurrent(self, new_dir):
+        names = [f"cache{i}" for i in range(8)]
+
+        def build(name: str) -> None:
+            with BuildCache(Path(new_dir)).track([name]):
+                Path("build-cache", name, "data").write_text(name)
+
+        with ThreadPoolExecutor(max_workers=len(names)) as pool:
+            list(pool.map(build, names))
+
+        # index updates are not lost and temporary files are not left behind
+        index = json.loads(Path("build-cache/index.json").read_text())
+        assert sorted(index) == names
+        assert list(Path("build-cache").glob("*.tmp")) == []
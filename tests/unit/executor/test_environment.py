@@ -128,6 +128,63 @@ def test_generate_step_environment_build(new_dir):
     )
 
 
+def test_generate_step_environment_build_caches(new_dir):
+    class CachePlugin(FooPlugin):
+        def get_build_caches(self) -> Dict[str, str]:
+            return {"FOO_CACHE": "foo", "BAR_CACHE": "bar"}
+
+    p1 = Part("p1", {})
+    info = ProjectInfo(
+        application_name="xyz",
+        cache_dir=new_dir,
+        build_caches=True,
+        build_cache_size=2 * 10**9,
+    )
+    part_info = PartInfo(project_info=info, part=p1)
+    props = plugins.PluginProperties()
+    plugin = CachePlugin(properties=props, part_info=part_info)
+
+    env = environment.generate_step_environment(
+        part=p1, plugin=plugin, step_info=StepInfo(part_info, Step.BUILD)
+    )
+
+    assert (
+        textwrap.dedent(
+            f"""\
+        ## Build cache environment
+        export FOO_CACHE="{new_dir}/build-cache/foo"
+        export BAR_CACHE="{new_dir}/build-cache/bar"
+        ## Plugin environment
+        """
+        )
+        in env
+    )
+
+    # caches are only used in the build step
+    env = environment.generate_step_environment(
+        part=p1, plugin=plugin, step_info=StepInfo(part_info, Step.STAGE)
+    )
+    assert "Build cache" not in env
+
+
+def test_generate_step_environment_no_build_caches(new_dir):
+    class CachePlugin(FooPlugin):
+        def get_build_caches(self) -> Dict[str, str]:
+            return {"FOO_CACHE": "foo"}
+
+    p1 = Part("p1", {})
+    info = ProjectInfo(application_name="xyz", cache_dir=new_dir)
+    part_info = PartInfo(project_info=info, part=p1)
+    props = plugins.PluginProperties()
+    plugin = CachePlugin(properties=props, part_info=part_info)
+
+    env = environment.generate_step_environment(
+        part=p1, plugin=plugin, step_info=StepInfo(part_info, Step.BUILD)
+    )
+
+    assert "FOO_CACHE" not in env
+
+
 def test_generate_step_environment_no_project_name(new_dir):
     p1 = Part("p1", {"build-environment": [{"PART_ENVVAR": "from_part"}]})
     info = ProjectInfo(
@@ -326,3 +383,64 @@ def test_expand_variables_skip(new_dir):
         "foo": "$CRAFT_PROJECT_NAME",  # this key was skipped
         "bar": "test-project",
     }
+
+
+class TestEnvironmentCache:
+    """Verify memoization of the part environment."""
+
+    def test_get_part_environment(self, new_dir):
+        p1 = Part("p1", {})
+        info = ProjectInfo(arch="aarch64", application_name="xyz", cache_dir=new_dir)
+        step_info = StepInfo(PartInfo(project_info=info, part=p1), Step.BUILD)
+        cache = environment.EnvironmentCache()
+
+        env = cache.get_part_environment(p1, step_info=step_info)
+        assert env == environment._basic_environment_for_part(p1, step_info=step_info)
+
+        # the environment is reused until the stage tree is invalidated
+        Path(new_dir, "stage/usr/include").mkdir(parents=True)
+        assert cache.get_part_environment(p1, step_info=step_info) == env
+
+        cache.invalidate(p1.stage_dir)
+        new_env = cache.get_part_environment(p1, step_info=step_info)
+        assert new_env["CFLAGS"] == (
+            f"-isystem {new_dir}/parts/p1/install/usr/include "
+            f"-isystem {new_dir}/stage/usr/include"
+        )
+
+    def test_get_part_environment_copy(self, new_dir):
+        p1 = Part("p1", {})
+        info = ProjectInfo(application_name="xyz", cache_dir=new_dir)
+        step_info = StepInfo(PartInfo(project_info=info, part=p1), Step.BUILD)
+        cache = environment.EnvironmentCache()
+
+        cache.get_part_environment(p1, step_info=step_info)["FOO"] = "bar"
+        assert "FOO" not in cache.get_part_environment(p1, step_info=step_info)
+
+    def test_get_paths_shared(self, mocker, new_dir):
+        p1 = Part("p1", {})
+        p2 = Part("p2", {})
+        info = ProjectInfo(application_name="xyz", cache_dir=new_dir)
+        cache = environment.EnvironmentCache()
+        find = mocker.spy(environment.os_utils, "find_existing_paths")
+
+        for part in (p1, p2):
+            for step in (Step.BUILD, Step.STAGE):
+                part_info = PartInfo(project_info=info, part=part)
+                plugin = FooPlugin(
+                    properties=plugins.PluginProperties(), part_info=part_info
+                )
+                environment.generate_step_environment(
+                    part=part,
+                    plugin=plugin,
+                    step_info=StepInfo(part_info, step),
+                    cache=cache,
+                )
+
+        # install dirs of p1 and p2, and the stage dir shared by both parts
+        assert find.call_count == 3
+
+        cache.clear()
+        step_info = StepInfo(PartInfo(project_info=info, part=p1), Step.BUILD)
+        cache.get_part_environment(p1, step_info=step_info)
+        assert find.call_count == 5
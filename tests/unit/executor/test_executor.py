@@ -18,11 +18,13 @@ from pathlib import Path
 
 import pytest
 
-from craft_parts import callbacks, overlays
+from craft_parts import callbacks, errors, overlays
 from craft_parts.actions import Action
 from craft_parts.executor import ExecutionContext, Executor
+from craft_parts.executor.shell_pool import ShellPool
 from craft_parts.infos import ProjectInfo
 from craft_parts.parts import Part
+from craft_parts.plugins import PluginEnvironmentValidator
 from craft_parts.steps import Step
 
 
@@ -77,6 +79,49 @@ class TestExecutor:
         assert file1.exists() is False
         assert file2.exists() is False
 
+    def test_clean_fast(self, new_dir):
+        p1 = Part("p1", {"plugin": "nil"})
+        file1 = Path("parts/p1/src/foo.txt")
+        file1.parent.mkdir(parents=True)
+        file1.touch()
+        Path("stage").mkdir()
+        Path("prime").mkdir()
+
+        info = ProjectInfo(application_name="test", cache_dir=new_dir)
+        e = Executor(project_info=info, part_list=[p1], fast_clean=True)
+        e.clean(Step.PULL)
+
+        assert file1.exists() is False
+        assert Path("parts").exists() is False
+        assert Path("stage").exists() is False
+        assert Path("prime").exists() is False
+
+        assert e.wait_for_removals(timeout=10)
+        assert e.pending_removals() == []
+        assert list(Path(".trash").iterdir()) == []
+
+    def test_clean_fast_part(self, new_dir):
+        p1 = Part("p1", {"plugin": "nil"})
+        file1 = Path("parts/p1/src/foo.txt")
+        file1.parent.mkdir(parents=True)
+        file1.touch()
+
+        info = ProjectInfo(application_name="test", cache_dir=new_dir)
+        e = Executor(project_info=info, part_list=[p1], fast_clean=True)
+        e.clean(Step.PULL, part_names=["p1"])
+
+        assert file1.exists() is False
+        assert Path("parts/p1/src").exists() is False
+        assert e.wait_for_removals(timeout=10)
+        assert list(Path(".trash").iterdir()) == []
+
+    def test_no_pending_removals(self, new_dir):
+        info = ProjectInfo(application_name="test", cache_dir=new_dir)
+        e = Executor(project_info=info, part_list=[])
+
+        assert e.pending_removals() == []
+        assert e.wait_for_removals(timeout=0)
+
 
 class TestPackages:
     """Verify package installation during the execution phase."""
@@ -180,6 +225,110 @@ class TestExecutionContext:
         captured = capfd.readouterr()
         assert captured.out == "build\nepilogue custom\n"
 
+    def test_persistent_shells(self, mocker, new_dir):
+        mock_run = mocker.spy(ShellPool, "run")
+        mock_close = mocker.spy(ShellPool, "close")
+
+        p1 = Part("p1", {"plugin": "nil"})
+        info = ProjectInfo(application_name="test", cache_dir=new_dir)
+        e = Executor(project_info=info, part_list=[p1], persistent_shells=True)
+
+        with ExecutionContext(executor=e) as ctx:
+            ctx.execute(Action("p1", Step.BUILD))
+            assert mock_run.call_count == 1
+            mock_close.assert_not_called()
+
+        mock_close.assert_called_once()
+
+    def test_epilogue_unmounts_overlay(self, mocker, new_dir):
+        mock_close = mocker.patch.object(overlays.OverlayManager, "close")
+
+        p1 = Part("p1", {"plugin": "nil"})
+        info = ProjectInfo(application_name="test", cache_dir=new_dir)
+        e = Executor(project_info=info, part_list=[p1])
+
+        with ExecutionContext(executor=e):
+            mock_close.assert_not_called()
+
+        mock_close.assert_called_once_with()
+
+    def test_prologue_error_unmounts_overlay(self, mocker, new_dir):
+        def cbf(info):
+            raise RuntimeError("prologue failed")
+
+        callbacks.register_prologue(cbf)
+        mock_close = mocker.patch.object(overlays.OverlayManager, "close")
+
+        p1 = Part("p1", {"plugin": "nil"})
+        info = ProjectInfo(application_name="test", cache_dir=new_dir)
+        e = Executor(project_info=info, part_list=[p1])
+
+        with pytest.raises(RuntimeError), ExecutionContext(executor=e):
+            pass
+
+        mock_close.assert_called_once_with()
+
+    def test_epilogue_error_unmounts_overlay(self, mocker, new_dir):
+        def cbf(info):
+            raise RuntimeError("epilogue failed")
+
+        callbacks.register_epilogue(cbf)
+        mock_close = mocker.patch.object(overlays.OverlayManager, "close")
+
+        p1 = Part("p1", {"plugin": "nil"})
+        info = ProjectInfo(application_name="test", cache_dir=new_dir)
+        e = Executor(project_info=info, part_list=[p1])
+
+        with pytest.raises(RuntimeError), ExecutionContext(executor=e):
+            mock_close.assert_not_called()
+
+        mock_close.assert_called_once_with()
+
+    @pytest.mark.parametrize("cpu_count", [1, 4])
+    def test_verify_plugin_environment(self, mocker, new_dir, cpu_count):
+        def validate_environment(self, *, part_dependencies):
+            if self._part_name in ["p2", "p3"]:
+                raise errors.PluginEnvironmentValidationError(
+                    part_name=self._part_name, reason="invalid"
+                )
+
+        mocker.patch("os.cpu_count", return_value=cpu_count)
+        mock_validate = mocker.patch.object(
+            PluginEnvironmentValidator,
+            "validate_environment",
+            autospec=True,
+            side_effect=validate_environment,
+        )
+
+        part_list = [Part(name, {"plugin": "nil"}) for name in ["p1", "p2", "p3"]]
+        info = ProjectInfo(application_name="test", cache_dir=new_dir)
+        e = Executor(project_info=info, part_list=part_list)
+
+        with pytest.raises(errors.PluginEnvironmentValidationError) as raised:
+            e._verify_plugin_environment()
+
+        # the first error in part order is raised
+        assert raised.value.part_name == "p2"
+        assert mock_validate.call_count == (3 if cpu_count > 1 else 2)
+
+    def test_verify_plugin_environment_probe_once(self, mocker, new_dir):
+        mocker.patch("os.cpu_count", return_value=4)
+        mock_run = mocker.patch.object(
+            PluginEnvironmentValidator,
+            "_run_command",
+            return_value="go version go1.17 linux/amd64",
+        )
+
+        part_list = [
+            Part(name, {"plugin": "go", "source": "."})
+            for name in ["p1", "p2", "p3", "p4"]
+        ]
+        info = ProjectInfo(application_name="test", cache_dir=new_dir)
+        e = Executor(project_info=info, part_list=part_list)
+        e._verify_plugin_environment()
+
+        mock_run.assert_called_once_with("go version")
+
     def test_prologue_overlay_packages(self, new_dir, mocker):
         """Check that the overlay package cache is not touched if the part doesn't have overlay packages"""
         mock_mount = mocker.patch.object(overlays, "PackageCacheMount")
@@ -211,3 +360,32 @@ class TestExecutionContext:
         assert captured.out == "prologue custom\n"
         assert output_path.read_text() == "out\n"
         assert error_path.read_text() == "+ echo out\n+ echo err\nerr\n"
+
+    def test_part_logs(self, new_dir):
+        p1 = Part("p1", {"plugin": "nil", "override-build": "echo out; echo err >&2"})
+        info = ProjectInfo(application_name="test", cache_dir=new_dir)
+        e = Executor(project_info=info, part_list=[p1], part_logs=True)
+
+        output_path = Path("output.txt")
+        error_path = Path("error.txt")
+
+        with output_path.open("w") as output, error_path.open("w") as error:
+            with ExecutionContext(executor=e) as ctx:
+                ctx.execute(Action("p1", Step.BUILD), stdout=output, stderr=error)
+
+        assert output_path.read_text() == "out\n"
+        assert error_path.read_text() == "+ echo out\n+ echo err\nerr\n"
+        assert e.part_log_path("p1") == Path(new_dir, ".logs/p1.log")
+        assert "out\n" in e.part_log_tail("p1")
+
+        log = Path(".logs/p1.log").read_text()
+        assert "p1 BUILD stdout\nout\n" in log
+        assert "p1 BUILD stderr\n" in log
+
+    def test_no_part_logs(self, new_dir):
+        p1 = Part("p1", {"plugin": "nil"})
+        info = ProjectInfo(application_name="test", cache_dir=new_dir)
+        e = Executor(project_info=info, part_list=[p1])
+
+        assert e.part_log_path("p1") is None
+        assert e.part_log_tail("p1") == ""
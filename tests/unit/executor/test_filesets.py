@@ -14,6 +14,10 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
+from glob import iglob
+from pathlib import Path
+
 import pytest
 
 from craft_parts import errors
@@ -128,4 +132,105 @@ def test_filesets_excludes_without_relative_paths():
     assert raised.value.message == "path '/abs/exclude' must be relative."
 
 
-# migratable_filesets tested in tests/unit/executor/test_step_handler.py
+# migratable_filesets is also tested in tests/unit/executor/test_step_handler.py
+
+
+def test_fileset_matcher_cached():
+    fs = Fileset(["*", "-etc"])
+    matcher = fs.matcher
+    assert fs.matcher is matcher
+
+    fs.remove("-etc")
+    assert fs.matcher is not matcher
+
+
+@pytest.fixture
+def tree(new_dir):
+    for directory in ["usr/lib/.hidden", "usr/bin", ".cache", "opt"]:
+        os.makedirs(directory)
+    for filename in [
+        "usr/lib/libfoo.so",
+        "usr/lib/libfoo.a",
+        "usr/lib/.hidden/libbar.so",
+        "usr/bin/foo",
+        ".cache/data",
+        ".profile",
+    ]:
+        Path(filename).touch()
+    os.symlink("usr/lib", "lib")
+    os.symlink("nonexistent", "dangling")
+    return str(new_dir)
+
+
+@pytest.mark.parametrize(
+    "entries",
+    [
+        ["*"],
+        ["**"],
+        ["**/*.so"],
+        ["*/"],
+        ["*/lib/**"],
+        [".*"],
+        ["usr/lib/.*"],
+        ["lib/*.so"],
+        ["usr", "-usr/lib/*.a"],
+        ["usr/lib", "-*/*/.hidden"],
+        ["*", "-**/*.so", "-dangling"],
+        ["nonexistent/**", "usr/*/"],
+        ["usr/l?b/*", "-usr/lib/"],
+        ["./usr/*", "-usr/../opt"],
+    ],
+)
+def test_migratable_filesets_glob_semantics(tree, entries):
+    expected = _legacy_migratable_filesets(Fileset(entries), tree)
+    assert filesets.migratable_filesets(Fileset(entries), tree) == expected
+
+
+def _legacy_migratable_filesets(fileset, srcdir):
+    """The original glob-based implementation."""
+    includes, excludes = filesets._get_file_list(fileset)
+
+    include_files = set()
+    for include in includes:
+        if "*" in include:
+            include_files |= set(iglob(os.path.join(srcdir, include), recursive=True))
+        else:
+            include_files.add(os.path.join(srcdir, include))
+    include_dirs = [
+        x for x in include_files if os.path.isdir(x) and not os.path.islink(x)
+    ]
+    include_files = {os.path.relpath(x, srcdir) for x in include_files}
+    for include_dir in include_dirs:
+        for root, dirs, files in os.walk(include_dir):
+            for name in dirs + files:
+                include_files.add(os.path.relpath(os.path.join(root, name), srcdir))
+
+    matches = set()
+    for exclude in excludes:
+        matches |= set(iglob(os.path.join(srcdir, exclude), recursive=True))
+    exclude_dirs = {os.path.relpath(x, srcdir) for x in matches if os.path.isdir(x)}
+    exclude_files = {os.path.relpath(x, srcdir) for x in matches}
+
+    files = include_files - exclude_files
+    for exclude_dir in exclude_dirs:
+        files = {x for x in files if not x.startswith(exclude_dir + "/")}
+
+    dirs = {
+        x
+        for x in files
+        if os.path.isdir(os.path.join(srcdir, x))
+        and not os.path.islink(os.path.join(srcdir, x))
+    }
+    files = files - dirs
+    for filename in files:
+        dirname = os.path.dirname(
+            filesets._get_resolved_relative_path(filename, srcdir)
+        )
+        while dirname:
+            dirs.add(dirname)
+            dirname = os.path.dirname(dirname)
+
+    return (
+        {filesets._get_resolved_relative_path(x, srcdir) for x in files},
+        {filesets._get_resolved_relative_path(x, srcdir) for x in dirs},
+    )
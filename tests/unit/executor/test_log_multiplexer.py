@@ -0,0 +1,134 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2022 Canonical Ltd.
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License version 3 as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import re
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from craft_parts.executor.log_multiplexer import LogMultiplexer
+from craft_parts.steps import Step
+
+_HEADER = re.compile(r"^@@ \S+ (\S+) (\S+) (\S+)$")
+
+
+def _read_log(path: Path):
+    """Parse a log file into a list of (part, step, stream, data) tuples."""
+    entries = []
+    for line in path.read_text().splitlines(keepends=True):
+        match = _HEADER.match(line.rstrip("\n"))
+        if match:
+            entries.append([*match.groups(), ""])
+        else:
+            entries[-1][3] += line
+    return [tuple(entry) for entry in entries]
+
+
+@pytest.fixture
+def mux(new_dir):
+    log_multiplexer = LogMultiplexer(Path(new_dir, "logs"))
+    yield log_multiplexer
+    log_multiplexer.close()
+
+
+class TestLogMultiplexer:
+    """Verify the capture of step command output."""
+
+    def test_capture(self, new_dir, mux):
+        out = io.StringIO()
+        err = io.StringIO()
+        with mux.capture("p1", Step.BUILD, stdout=out, stderr=err) as (out_fd, err_fd):
+            subprocess.run(
+                ["bash", "-c", "echo out; echo err >&2; printf partial"],
+                stdout=out_fd,
+                stderr=err_fd,
+                check=True,
+            )
+
+        assert out.getvalue() == "out\npartial"
+        assert err.getvalue() == "err\n"
+        assert mux.log_path("p1") == Path(new_dir, "logs/p1.log")
+
+        entries = _read_log(mux.log_path("p1"))
+        assert sorted(entries) == [
+            ("p1", "BUILD", "stderr", "err\n"),
+            ("p1", "BUILD", "stdout", "out\n"),
+            ("p1", "BUILD", "stdout", "partial\n"),
+        ]
+
+    def test_capture_parts(self, mux):
+        for part_name in ["p1", "p2"]:
+            with mux.capture(part_name, Step.PULL, stdout=io.StringIO()) as (out_fd, _):
+                subprocess.run(["echo", part_name], stdout=out_fd, check=True)
+
+        assert _read_log(mux.log_path("p1")) == [("p1", "PULL", "stdout", "p1\n")]
+        assert _read_log(mux.log_path("p2")) == [("p2", "PULL", "stdout", "p2\n")]
+
+    def test_capture_large_output(self, mux):
+        out = io.StringIO()
+        with mux.capture("p1", Step.BUILD, stdout=out) as (out_fd, _):
+            subprocess.run(
+                ["bash", "-c", "for i in $(seq 100000); do echo line $i; done"],
+                stdout=out_fd,
+                check=True,
+            )
+
+        expected = "".join(f"line {i}\n" for i in range(1, 100001))
+        assert out.getvalue() == expected
+
+        entries = _read_log(mux.log_path("p1"))
+        assert "".join(entry[3] for entry in entries) == expected
+
+    def test_tail(self, new_dir):
+        mux = LogMultiplexer(Path(new_dir, "logs"), tail_size=10)
+        try:
+            assert mux.tail("p1") == ""
+            with mux.capture("p1", Step.BUILD, stdout=io.StringIO()) as (out_fd, _):
+                subprocess.run(["echo", "0123456789abcdef"], stdout=out_fd, check=True)
+                subprocess.run(["echo", "xyz"], stdout=out_fd, check=True)
+            assert mux.tail("p1") == "bcdef\nxyz\n"
+        finally:
+            mux.close()
+
+    def test_rotate(self, new_dir):
+        mux = LogMultiplexer(Path(new_dir, "logs"), max_size=100)
+        try:
+            for i in range(3):
+                with mux.capture("p1", Step.BUILD, stdout=io.StringIO()) as (fd, _):
+                    subprocess.run(["echo", str(i) * 100], stdout=fd, check=True)
+        finally:
+            mux.close()
+
+        assert Path("logs/p1.log").read_text() == ""
+        assert _read_log(Path("logs/p1.log.1")) == [
+            ("p1", "BUILD", "stdout", "2" * 100 + "\n")
+        ]
+
+    def test_close_and_reuse(self, mux):
+        with mux.capture("p1", Step.BUILD, stdout=io.StringIO()) as (out_fd, _):
+            subprocess.run(["echo", "first"], stdout=out_fd, check=True)
+        mux.close()
+
+        with mux.capture("p1", Step.STAGE, stdout=io.StringIO()) as (out_fd, _):
+            subprocess.run(["echo", "second"], stdout=out_fd, check=True)
+        mux.close()
+
+        assert _read_log(mux.log_path("p1")) == [
+            ("p1", "BUILD", "stdout", "first\n"),
+            ("p1", "STAGE", "stdout", "second\n"),
+        ]
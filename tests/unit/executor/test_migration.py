@@ -20,6 +20,7 @@ from pathlib import Path
 
 import pytest
 
+from craft_parts import errors, packages
 from craft_parts.actions import Action
 from craft_parts.executor import filesets, migration, part_handler
 from craft_parts.executor.filesets import Fileset
@@ -381,6 +382,116 @@ class TestFileMigration:
             assert call.owner == 1111
             assert call.group == 2222
 
+    def test_migrate_files_parallel(self):
+        install_dir = Path("install")
+        stage_dir = Path("stage")
+
+        for i in range(10):
+            Path(install_dir, f"dir{i}").mkdir(parents=True)
+            Path(install_dir, f"dir{i}", "foo").write_text(f"foo{i}")
+        Path(install_dir, "link").symlink_to("dir0/foo")
+        stage_dir.mkdir()
+        Path(stage_dir, "link").symlink_to("staged")
+        Path(stage_dir, "dir1").mkdir()
+        Path(stage_dir, "dir1", "foo").write_text("staged")
+
+        fixed_up = []
+        files, dirs = filesets.migratable_filesets(Fileset(["*"]), "install")
+        migrated_files, migrated_dirs = migration.migrate_files(
+            files=files,
+            dirs=dirs,
+            srcdir=install_dir,
+            destdir=stage_dir,
+            fixup_func=fixed_up.append,
+            max_workers=4,
+        )
+
+        assert migrated_files == files - {"link"}
+        assert migrated_dirs == dirs
+        # fixups run serially, in migration order
+        assert fixed_up == [f"stage/dir{i}/foo" for i in range(10)]
+        for i in range(10):
+            assert Path(stage_dir, f"dir{i}", "foo").read_text() == f"foo{i}"
+            assert Path(stage_dir, f"dir{i}", "foo").stat().st_nlink == 2
+        assert os.readlink(Path(stage_dir, "link")) == "staged"
+
+    def test_migrate_files_parallel_pkg_config_fixup(self):
+        install_dir = Path("install")
+        stage_dir = Path("stage")
+        Path(install_dir, "lib/pkgconfig").mkdir(parents=True)
+        stage_dir.mkdir()
+
+        for i in range(400):
+            Path(install_dir, f"lib/pkgconfig/lib{i}.pc").write_text(
+                f"prefix=/usr\nName: lib{i}\n"
+            )
+
+        def pkgconfig_fixup(file_path):
+            packages.fix_pkg_config(
+                prefix_prepend=stage_dir.absolute(),
+                pkg_config_file=Path(file_path),
+                prefix_trim=install_dir.absolute(),
+            )
+
+        files, dirs = filesets.migratable_filesets(Fileset(["*"]), "install")
+        migrated_files, _ = migration.migrate_files(
+            files=files,
+            dirs=dirs,
+            srcdir=install_dir,
+            destdir=stage_dir,
+            fixup_func=pkgconfig_fixup,
+            max_workers=8,
+        )
+
+        assert migrated_files == files
+        for i in range(400):
+            assert Path(stage_dir, f"lib/pkgconfig/lib{i}.pc").read_text() == (
+                f"prefix={stage_dir.absolute()}/usr\nName: lib{i}\n"
+            )
+            # the installed file is not modified
+            assert Path(install_dir, f"lib/pkgconfig/lib{i}.pc").read_text() == (
+                f"prefix=/usr\nName: lib{i}\n"
+            )
+
+    def test_migrate_files_keeps_linked_files(self):
+        install_dir = Path("install")
+        stage_dir = Path("stage")
+        install_dir.mkdir()
+        stage_dir.mkdir()
+
+        Path(install_dir, "foo").write_text("installed")
+        Path(install_dir, "bar").write_text("installed")
+        os.link(Path(install_dir, "foo"), Path(stage_dir, "foo"))
+        Path(stage_dir, "bar").write_text("staged")
+
+        fixed_up = []
+        migrated_files, _ = migration.migrate_files(
+            files={"foo", "bar"},
+            dirs=set(),
+            srcdir=install_dir,
+            destdir=stage_dir,
+            fixup_func=fixed_up.append,
+        )
+
+        assert migrated_files == {"foo", "bar"}
+        assert fixed_up == ["stage/bar"]
+        assert Path(stage_dir, "bar").read_text() == "installed"
+
+    def test_migrate_files_parallel_error(self):
+        install_dir = Path("install")
+        install_dir.mkdir()
+        Path(install_dir, "foo").touch()
+
+        with pytest.raises(errors.CopyFileNotFound) as raised:
+            migration.migrate_files(
+                files={"foo", "bar", "baz"},
+                dirs=set(),
+                srcdir=install_dir,
+                destdir=Path("stage"),
+                max_workers=2,
+            )
+        assert raised.value.name == "install/bar"
+
 
 @pytest.mark.usefixtures("new_dir")
 class TestHelpers:
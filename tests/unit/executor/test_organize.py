@@ -225,3 +225,25 @@ def _organize_and_assert(
             dir_contents = os.listdir(dir_path)
             dir_contents.sort()
             assert dir_contents == expect[0]
+
+
+def test_organize_relocations(tmp_path):
+    base_dir = Path(tmp_path / "install")
+    (base_dir / "foodir").mkdir(parents=True)
+    (base_dir / "foodir" / "a").touch()
+    (base_dir / "bardir").mkdir()
+    (base_dir / "foo").touch()
+    (base_dir / "baz").touch()
+
+    relocations = organize_files(
+        part_name="part-name",
+        mapping={"foodir": "dir/foodir", "foo": "bar", "baz": "bardir"},
+        base_dir=base_dir,
+        overwrite=False,
+    )
+
+    assert sorted(relocations) == [
+        ("baz", "bardir/baz"),
+        ("foo", "bar"),
+        ("foodir", "dir/foodir"),
+    ]
@@ -16,6 +16,7 @@
 
 import logging
 import os
+import shutil
 from pathlib import Path
 from typing import cast
 from unittest.mock import call
@@ -30,7 +31,7 @@ from craft_parts.executor.step_handler import StepContents
 from craft_parts.infos import PartInfo, ProjectInfo, StepInfo
 from craft_parts.overlays import OverlayManager
 from craft_parts.parts import Part
-from craft_parts.state_manager import states
+from craft_parts.state_manager import SharedAreaIndex, states
 from craft_parts.steps import Step
 from craft_parts.utils import os_utils
 
@@ -256,6 +257,25 @@ class TestPartHandling:
             primed_stage_packages={"pkg"},
         )
 
+    def test_run_prime_origin_index(self, mocker):
+        mocker.patch(
+            "craft_parts.executor.step_handler.StepHandler._builtin_prime",
+            return_value=StepContents({"file", "other"}, {"dir"}),
+        )
+        getxattr = mocker.patch("os.getxattr")
+
+        self._part.part_packages_dir.mkdir(parents=True)
+        packages.write_origin_index(
+            packages.get_origin_index_path(self._part.part_packages_dir),
+            {"file": "pkg=1.0", "unprimed": "other-pkg=2.0"},
+        )
+
+        state = self._handler._run_prime(
+            StepInfo(self._part_info, Step.PRIME), stdout=None, stderr=None
+        )
+        assert state.primed_stage_packages == {"pkg=1.0"}
+        getxattr.assert_not_called()
+
     @pytest.mark.parametrize(
         "step,scriptlet",
         [
@@ -692,9 +712,8 @@ class TestOverlayMigration:
         self, mocker, new_dir, step, step_dir
     ):
         opaque = Path("parts/p2/layer/dir1")
-        mocker.patch(
-            "craft_parts.overlays.is_opaque_dir", new=lambda x: x == new_dir / opaque
-        )
+        for target in ["overlays.is_opaque_dir", "overlays.overlay_fs.is_opaque_dir"]:
+            mocker.patch(f"craft_parts.{target}", new=lambda x: x == new_dir / opaque)
 
         _run_step_migration(self._p1_handler, step)
         assert Path(f"{step_dir}/dir1/.wh..wh..opq").exists()
@@ -887,6 +906,226 @@ class TestPartCleanHandler:
         assert Path(test_dir, "bar").is_dir() is False
         assert Path(f"parts/foo/state/{state_file}").is_file() is False
 
+    @pytest.mark.parametrize(
+        "step,test_dir", [(Step.STAGE, "stage"), (Step.PRIME, "prime")]
+    )
+    def test_clean_step_shared_index(self, mocker, step, test_dir):
+        self._handler._make_dirs()
+        for each_step in step.previous_steps() + [step]:
+            self._handler.run_action(Action("foo", each_step))
+
+        index_path = states.get_shared_index_path(Path("parts"), step)
+        state_paths = {"foo": states.get_step_state_path(self._part, step)}
+        index = SharedAreaIndex.load(index_path)
+        assert index.is_current(state_paths)
+        assert index.get_exclusive_entries("foo", part_names=["foo"]) == (
+            {"foo.txt"},
+            {"bar"},
+        )
+
+        load_states = mocker.spy(part_handler, "_load_part_states")
+        self._handler.clean_step(step)
+
+        load_states.assert_not_called()
+        assert Path(test_dir, "foo.txt").exists() is False
+        index = SharedAreaIndex.load(index_path)
+        assert index.is_current(state_paths)
+        assert index.get_exclusive_entries("foo", part_names=["foo"]) == (set(), set())
+
+    def test_clean_step_rebuilds_shared_index(self, mocker):
+        self._handler._make_dirs()
+        for each_step in [Step.PULL, Step.OVERLAY, Step.BUILD, Step.STAGE]:
+            self._handler.run_action(Action("foo", each_step))
+        shutil.rmtree(states.get_shared_index_path(Path("parts"), Step.STAGE))
+
+        load_states = mocker.spy(part_handler, "_load_part_states")
+        self._handler.clean_step(Step.STAGE)
+
+        load_states.assert_called_once()
+        assert Path("stage", "foo.txt").exists() is False
+
+    def test_clean_step_rebuild_removes_stale_parts(self, mocker):
+        self._handler._make_dirs()
+        index_path = states.get_shared_index_path(Path("parts"), Step.STAGE)
+        Path("state").mkdir()
+        Path("state/stale").touch()
+        index = SharedAreaIndex(index_path)
+        index.add(
+            "bar", files={"baz"}, directories=set(), state_path=Path("state/stale")
+        )
+        index.write()
+
+        part_list = [self._part, Part("bar", {"plugin": "nil"})]
+        handler = PartHandler(
+            self._part,
+            part_info=self._part_info,
+            part_list=part_list,
+            overlay_manager=self._handler._overlay_manager,
+        )
+        for each_step in [Step.PULL, Step.OVERLAY, Step.BUILD, Step.STAGE]:
+            handler.run_action(Action("foo", each_step))
+
+        # the index has an entry for a part without a stage state
+        handler.clean_step(Step.STAGE)
+
+        assert os.listdir(index_path) == []
+
+
+@pytest.mark.usefixtures("new_dir")
+class TestIncrementalPrime:
+    """Verify incremental prime on prime step reruns."""
+
+    def _handler(self, new_dir, part):
+        info = ProjectInfo(application_name="test", cache_dir=new_dir)
+        ovmgr = OverlayManager(project_info=info, part_list=[part], base_layer_dir=None)
+        return PartHandler(
+            part,
+            part_info=PartInfo(info, part),
+            part_list=[part],
+            overlay_manager=ovmgr,
+        )
+
+    def test_rerun_prime_incremental(self, new_dir):
+        Path("subdir/bar").mkdir(parents=True)
+        Path("subdir/bar/baz.txt").write_text("baz")
+        Path("subdir/foo.txt").write_text("content")
+
+        part = Part("foo", {"plugin": "dump", "source": "subdir"})
+        handler = self._handler(new_dir, part)
+        for step in list(Step):
+            handler.run_action(Action("foo", step))
+
+        primed_inode = Path("prime/foo.txt").stat().st_ino
+
+        part = Part("foo", {"plugin": "dump", "source": "subdir", "prime": ["foo.txt"]})
+        handler = self._handler(new_dir, part)
+        handler.run_action(Action("foo", Step.PRIME, ActionType.RERUN))
+
+        assert Path("prime/foo.txt").stat().st_ino == primed_inode
+        assert Path("prime/bar").exists() is False
+
+        state = states.load_step_state(part, Step.PRIME)
+        assert state is not None
+        assert state.files == {"foo.txt"}
+        assert state.directories == set()
+
+    def test_rerun_prime_override(self, mocker, new_dir):
+        part = Part("foo", {"plugin": "nil", "override-prime": "true"})
+        handler = self._handler(new_dir, part)
+        handler.run_action(Action("foo", Step.PRIME))
+
+        mock_clean = mocker.patch(
+            "craft_parts.executor.part_handler.PartHandler.clean_step"
+        )
+        handler.run_action(Action("foo", Step.PRIME, ActionType.RERUN))
+        mock_clean.assert_called_once_with(step=Step.PRIME)
+
+
+@pytest.mark.usefixtures("new_dir")
+class TestIncrementalSync:
+    """Verify build directory synchronization on build step reruns."""
+
+    def _handler(self, new_dir, part):
+        info = ProjectInfo(application_name="test", cache_dir=new_dir)
+        ovmgr = OverlayManager(project_info=info, part_list=[part], base_layer_dir=None)
+        return PartHandler(
+            part,
+            part_info=PartInfo(info, part),
+            part_list=[part],
+            overlay_manager=ovmgr,
+        )
+
+    def test_rerun_build_keeps_artifacts(self, new_dir):
+        Path("subdir").mkdir()
+        Path("subdir/foo.c").write_text("foo")
+
+        part = Part(
+            "foo",
+            {
+                "plugin": "nil",
+                "source": "subdir",
+                "build-attributes": ["incremental-sync"],
+                "override-build": "touch foo.o",
+            },
+        )
+        handler = self._handler(new_dir, part)
+        handler.run_action(Action("foo", Step.PULL))
+        handler.run_action(Action("foo", Step.BUILD))
+
+        build_dir = Path("parts/foo/build")
+        (build_dir / "foo.o").write_text("object")
+
+        # writing to a synchronized file doesn't modify the source
+        (build_dir / "foo.c").write_text("generated")
+        assert Path("parts/foo/src/foo.c").read_text() == "foo"
+        assert Path("subdir/foo.c").read_text() == "foo"
+
+        Path("subdir/bar.c").write_text("bar")
+        handler.run_action(Action("foo", Step.PULL, ActionType.UPDATE))
+        handler.run_action(Action("foo", Step.BUILD, ActionType.RERUN))
+
+        assert (build_dir / "bar.c").read_text() == "bar"
+        assert (build_dir / "foo.c").read_text() == "foo"
+        assert Path("parts/foo/state/build_manifest").exists()
+
+        # the build artifact was touched but not removed
+        assert (build_dir / "foo.o").read_text() == "object"
+
+        handler.clean_step(Step.BUILD)
+        assert build_dir.exists() is False
+        assert Path("parts/foo/state/build_manifest").exists() is False
+
+    def test_rerun_build_without_sync(self, new_dir):
+        part = Part("foo", {"plugin": "nil", "override-build": "touch foo.o"})
+        handler = self._handler(new_dir, part)
+        handler.run_action(Action("foo", Step.PULL))
+        handler.run_action(Action("foo", Step.BUILD))
+
+        build_dir = Path("parts/foo/build")
+        (build_dir / "foo.o").write_text("object")
+        handler.run_action(Action("foo", Step.BUILD, ActionType.RERUN))
+
+        assert (build_dir / "foo.o").read_text() == ""
+
+
+@pytest.mark.usefixtures("new_dir")
+class TestEnvironmentInvalidation:
+    """Verify invalidation of cached environment trees."""
+
+    def _handler(self, mocker, new_dir):
+        part = Part("foo", {"plugin": "nil"})
+        info = ProjectInfo(application_name="test", cache_dir=new_dir)
+        ovmgr = OverlayManager(project_info=info, part_list=[part], base_layer_dir=None)
+        env_cache = mocker.Mock()
+        handler = PartHandler(
+            part,
+            part_info=PartInfo(info, part),
+            part_list=[part],
+            overlay_manager=ovmgr,
+            env_cache=env_cache,
+        )
+        return part, handler, env_cache
+
+    def test_run_action(self, mocker, new_dir):
+        part, handler, env_cache = self._handler(mocker, new_dir)
+        mocker.patch.object(handler, "_run_action", side_effect=RuntimeError)
+
+        with pytest.raises(RuntimeError):
+            handler.run_action(Action("foo", Step.BUILD))
+
+        assert env_cache.invalidate.mock_calls == [
+            call(part.part_install_dir),
+            call(part.part_install_dir),
+        ]
+
+    def test_clean_step(self, mocker, new_dir):
+        part, handler, env_cache = self._handler(mocker, new_dir)
+
+        handler.clean_step(Step.STAGE)
+        handler.clean_step(Step.PRIME)
+
+        assert env_cache.invalidate.mock_calls == [call(part.stage_dir), call()]
+
 
 @pytest.mark.usefixtures("new_dir")
 class TestRerunStep:
@@ -1013,6 +1252,7 @@ class TestPackages:
         mock_download_snaps.assert_called_once_with(
             snaps_list=["word-salad"],
             directory=os.path.join(new_dir, "parts/p1/stage_snaps"),
+            max_workers=part_info.parallel_build_count,
         )
 
     def test_fetch_stage_snaps_none(self, mocker, new_dir):
@@ -0,0 +1,147 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2022 Canonical Ltd.
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License version 3 as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import os
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from craft_parts import plugins
+from craft_parts.executor.environment import generate_step_environment
+from craft_parts.executor.shell_pool import ShellPool, ShellResult
+from craft_parts.infos import PartInfo, ProjectInfo, StepInfo
+from craft_parts.parts import Part
+from craft_parts.steps import Step
+
+
+@pytest.fixture
+def pool():
+    shell_pool = ShellPool()
+    yield shell_pool
+    shell_pool.close()
+
+
+class TestShellPool:
+    """Verify running commands in persistent shells."""
+
+    def test_run(self, new_dir, pool):
+        result = pool.run(
+            "echo $FOO; pwd; echo error >&2; exit 3",
+            env='export FOO="bar"',
+            cwd=Path(new_dir),
+        )
+        assert result == ShellResult(
+            returncode=3, stdout=f"bar\n{new_dir}\n".encode(), stderr=b"error\n"
+        )
+
+    def test_run_large_output(self, pool):
+        result = pool.run("head -c 200000 /dev/zero", env="")
+        assert result == ShellResult(returncode=0, stdout=bytes(200000))
+
+    def test_run_reuses_shell(self, pool):
+        env = 'export FOO="bar"'
+        first = pool.run("echo $$", env=env)
+        second = pool.run("echo $$", env=env)
+        other = pool.run("echo $$", env='export FOO="baz"')
+
+        assert first.stdout == second.stdout
+        assert first.stdout != other.stdout
+
+    def test_run_reuses_shell_across_parts(self, new_dir, pool):
+        info = ProjectInfo(application_name="test", cache_dir=new_dir)
+        info.global_environment.update({"APP_VAR": "app"})
+
+        def step_environment(name: str) -> str:
+            part = Part(name, {"build-environment": [{"USER_VAR": f"user-{name}"}]})
+            part_info = PartInfo(info, part)
+            plugin = plugins.get_plugin_class("nil")(
+                properties=plugins.PluginProperties(), part_info=part_info
+            )
+            return generate_step_environment(
+                part=part, plugin=plugin, step_info=StepInfo(part_info, Step.BUILD)
+            )
+
+        command = "echo $$ $APP_VAR $CRAFT_PART_NAME $USER_VAR"
+        outputs = [
+            pool.run(command, env=step_environment(name)).stdout.decode().split()
+            for name in ["p1", "p2", "p3"]
+        ]
+
+        assert len({output[0] for output in outputs}) == 1
+        assert [output[1:] for output in outputs] == [
+            ["app", "p1", "user-p1"],
+            ["app", "p2", "user-p2"],
+            ["app", "p3", "user-p3"],
+        ]
+
+        # a different application environment needs a different shell
+        info.global_environment.update({"APP_VAR": "other"})
+        output = pool.run(command, env=step_environment("p1")).stdout.decode().split()
+        assert output[1:] == ["other", "p1", "user-p1"]
+        assert output[0] != outputs[0][0]
+
+    def test_run_isolation(self, new_dir, pool):
+        env = 'export FOO="bar"'
+        pool.run("set -e; export FOO=changed; cd /; BAR=1", env=env, cwd=Path(new_dir))
+        result = pool.run("echo $FOO ${BAR:-unset} $-; pwd", env=env, cwd=Path(new_dir))
+
+        assert result.stdout.decode().split()[:2] == ["bar", "unset"]
+        assert "e" not in result.stdout.decode().split()[2]
+        assert result.stdout.decode().split()[3] == str(new_dir)
+
+    def test_run_process_environment(self, mocker, pool):
+        assert pool.run("echo ${PARTS_TEST:-unset}", env="").stdout == b"unset\n"
+
+        mocker.patch.dict(os.environ, {"PARTS_TEST": "set"})
+        assert pool.run("echo ${PARTS_TEST:-unset}", env="").stdout == b"set\n"
+
+    def test_run_streams(self, new_dir, pool):
+        out = io.StringIO()
+        with open("err.txt", "w") as err:
+            result = pool.run("echo out; echo err >&2", env="", stdout=out, stderr=err)
+
+        assert result == ShellResult(returncode=0)
+        assert out.getvalue() == "out\n"
+        assert Path("err.txt").read_text() == "err\n"
+
+    def test_run_stderr_to_stdout(self, pool):
+        result = pool.run("echo out; echo err >&2", env="", stderr=subprocess.STDOUT)
+        assert result == ShellResult(returncode=0, stdout=b"out\nerr\n")
+
+    def test_run_shell_killed(self, pool):
+        result = pool.run("kill -9 $$", env="")
+        assert result.returncode == -9
+
+        # a new shell is started for the next command
+        assert pool.run("echo ok", env="").stdout == b"ok\n"
+
+    def test_max_idle(self):
+        pool = ShellPool(max_idle=1)
+        try:
+            first = pool.run("echo $$", env="export A=1")
+            pool.run("echo $$", env="export A=2")
+            assert pool.run("echo $$", env="export A=1").stdout != first.stdout
+        finally:
+            pool.close()
+
+    def test_close(self, pool):
+        first = pool.run("echo $$", env="")
+        pool.close()
+
+        # the pool can still be used after closing idle shells
+        assert pool.run("echo $$", env="").stdout != first.stdout
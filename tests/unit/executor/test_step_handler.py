@@ -17,14 +17,19 @@
 import os
 from pathlib import Path
 from textwrap import dedent
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set
 
 import pytest
 
-from craft_parts import plugins, sources
+from craft_parts import errors, plugins, sources
 from craft_parts.dirs import ProjectDirs
 from craft_parts.executor.environment import generate_step_environment
-from craft_parts.executor.step_handler import StepContents, StepHandler
+from craft_parts.executor.shell_pool import ShellPool, ShellResult
+from craft_parts.executor.step_handler import (
+    StepContents,
+    StepHandler,
+    _split_control_calls,
+)
 from craft_parts.infos import (
     _ARCH_TRANSLATIONS,
     PartInfo,
@@ -54,7 +59,9 @@ class FooPlugin(plugins.Plugin):
         return ["hello"]
 
 
-def _step_handler_for_step(step: Step, cache_dir: Path) -> StepHandler:
+def _step_handler_for_step(
+    step: Step, cache_dir: Path, shell_pool: Optional[ShellPool] = None
+) -> StepHandler:
     p1 = Part("p1", {"source": "."})
     dirs = ProjectDirs()
     info = ProjectInfo(project_dirs=dirs, application_name="test", cache_dir=cache_dir)
@@ -75,6 +82,7 @@ def _step_handler_for_step(step: Step, cache_dir: Path) -> StepHandler:
         plugin=plugin,
         source_handler=source_handler,
         env=step_env,
+        shell_pool=shell_pool,
     )
 
 
@@ -159,6 +167,41 @@ class TestStepHandlerBuiltins:
         )
         assert result == StepContents()
 
+    def test_run_builtin_build_shell_pool(self, new_dir, mocker):
+        mock_run = mocker.patch("subprocess.run")
+        shell_pool = ShellPool()
+        mocker.patch.object(shell_pool, "run", return_value=ShellResult(returncode=0))
+
+        Path("parts/p1/run").mkdir(parents=True)
+        sh = _step_handler_for_step(
+            Step.BUILD, cache_dir=new_dir, shell_pool=shell_pool
+        )
+        result = sh.run_builtin()
+
+        assert Path("parts/p1/run/build.sh").is_file()
+        assert Path("parts/p1/run/environment.sh").is_file()
+        mock_run.assert_not_called()
+        shell_pool.run.assert_called_once_with(
+            "set -euo pipefail\nset -x\nhello",
+            env=Path("parts/p1/run/environment.sh").read_text(),
+            cwd=Path(new_dir / "parts/p1/build"),
+            stdout=None,
+            stderr=None,
+        )
+        assert result == StepContents()
+
+    def test_run_builtin_build_shell_pool_error(self, new_dir, mocker):
+        shell_pool = ShellPool()
+        mocker.patch.object(shell_pool, "run", return_value=ShellResult(returncode=1))
+
+        Path("parts/p1/run").mkdir(parents=True)
+        sh = _step_handler_for_step(
+            Step.BUILD, cache_dir=new_dir, shell_pool=shell_pool
+        )
+        with pytest.raises(errors.PluginBuildError) as raised:
+            sh.run_builtin()
+        assert raised.value.part_name == "p1"
+
     def test_run_builtin_stage(self, new_dir, mocker):
         Path("parts/p1/install").mkdir(parents=True)
         Path("parts/p1/install/subdir").mkdir(parents=True)
@@ -203,4 +246,70 @@ class TestStepHandlerRunScriptlet:
         captured = capfd.readouterr()
         assert captured.out == "hello world\n"
 
-    # TODO: test ctl api server
+    def test_run_scriptlet_error(self, new_dir):
+        sh = _step_handler_for_step(Step.PULL, cache_dir=new_dir)
+        with pytest.raises(errors.ScriptletRunError) as raised:
+            sh.run_scriptlet(
+                "exit 3", scriptlet_name="name", step=Step.BUILD, work_dir=new_dir
+            )
+        assert raised.value.exit_code == 3
+
+    @pytest.mark.parametrize("pidfd", [True, False])
+    def test_run_scriptlet_control_calls(
+        self, new_dir, capfd, mocker, monkeypatch, pidfd
+    ):
+        if not pidfd:
+            monkeypatch.delattr(os, "pidfd_open", raising=False)
+
+        sh = _step_handler_for_step(Step.PULL, cache_dir=new_dir)
+        mocker.patch.object(
+            sh._step_info,
+            "get_project_var",
+            side_effect=lambda name, raw_read: name.upper(),
+            create=True,
+        )
+        scriptlet = dedent(
+            """\
+            for var in a b c; do
+              echo -n "{\\"function\\": \\"get\\", \\"args\\": [\\"$var\\"]}" \\
+                > "$PARTS_CALL_FIFO"
+              read -r reply < "$PARTS_FEEDBACK_FIFO"
+              echo "$reply"
+            done
+            """
+        )
+        sh.run_scriptlet(
+            scriptlet, scriptlet_name="name", step=Step.BUILD, work_dir=new_dir
+        )
+        captured = capfd.readouterr()
+        assert captured.out.splitlines() == ["OK A", "OK B", "OK C"]
+
+
+@pytest.mark.parametrize(
+    "data,calls,remaining",
+    [
+        ("", [], ""),
+        (
+            '{"function": "default", "args": []}',
+            ['{"function": "default", "args": []}'],
+            "",
+        ),
+        (
+            '{"function": "default", "args": []}\n{"function": "get", "args": ["a"]}',
+            [
+                '{"function": "default", "args": []}',
+                '{"function": "get", "args": ["a"]}',
+            ],
+            "",
+        ),
+        (
+            '{"function": "default", "args": []}{"function": "g',
+            ['{"function": "default", "args": []}'],
+            '{"function": "g',
+        ),
+        ('{"function": "get", "args": [', [], '{"function": "get", "args": ['),
+        ("not json", ["not json"], ""),
+    ],
+)
+def test_split_control_calls(data, calls, remaining):
+    assert _split_control_calls(data) == (calls, remaining)
@@ -0,0 +1,115 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2022 Canonical Ltd.
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License version 3 as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from craft_parts.executor.trash import Trash
+
+
+def _make_tree(path: Path) -> None:
+    for subdir in ("a", "a/b", "c", "empty"):
+        Path(path, subdir).mkdir(parents=True)
+    for name in ("a/foo", "a/b/bar", "c/baz", "qux"):
+        Path(path, name).write_text(name)
+    Path(path, "link").symlink_to("a")
+
+
+@pytest.mark.usefixtures("new_dir")
+class TestTrash:
+    """Verify background removal of trashed directories."""
+
+    @pytest.mark.parametrize("max_workers", [1, 4])
+    def test_discard_dir(self, max_workers):
+        _make_tree(Path("work"))
+        trash = Trash(Path(".trash"), max_workers=max_workers)
+
+        trash.discard(Path("work"))
+
+        assert Path("work").exists() is False
+        assert trash.wait(timeout=10)
+        assert trash.pending() == []
+        assert list(Path(".trash").iterdir()) == []
+
+    def test_discard_empty_dir(self):
+        Path("work").mkdir()
+        trash = Trash(Path(".trash"))
+
+        trash.discard(Path("work"))
+
+        assert Path("work").exists() is False
+        assert trash.wait(timeout=10)
+        assert list(Path(".trash").iterdir()) == []
+
+    def test_discard_file(self):
+        Path("foo").touch()
+        Path("link").symlink_to("dir")
+        Path("dir").mkdir()
+        trash = Trash(Path(".trash"))
+
+        trash.discard(Path("foo"))
+        trash.discard(Path("link"))
+
+        assert Path("foo").exists() is False
+        assert Path("link").is_symlink() is False
+        assert Path("dir").is_dir()
+        assert Path(".trash").exists() is False
+
+    def test_discard_missing(self):
+        trash = Trash(Path(".trash"))
+        trash.discard(Path("missing"))
+
+        assert trash.pending() == []
+
+    def test_discard_rename_error(self, mocker):
+        _make_tree(Path("work"))
+        mocker.patch("os.rename", side_effect=OSError(18, "Invalid cross-device link"))
+        trash = Trash(Path(".trash"))
+
+        trash.discard(Path("work"))
+
+        assert Path("work").exists() is False
+        assert trash.pending() == []
+        assert list(Path(".trash").iterdir()) == []
+
+    def test_pending(self, mocker):
+        _make_tree(Path("work"))
+        trash = Trash(Path(".trash"))
+        event = threading.Event()
+        mocker.patch.object(trash, "_start_workers", new=event.set)
+
+        trash.discard(Path("work"))
+
+        assert event.is_set()
+        pending = trash.pending()
+        assert len(pending) == 1
+        assert pending[0].parent == Path(".trash")
+        assert Path(pending[0], "work/a/foo").exists()
+        assert trash.wait(timeout=0) is False
+
+    def test_remove_stale_entries(self):
+        # simulate an execution interrupted before removing trashed entries
+        _make_tree(Path(".trash/work-1234/work"))
+        Path(".trash/work-5678").mkdir()
+        Path(".trash/stray").touch()
+
+        trash = Trash(Path(".trash"), max_workers=2)
+
+        assert trash.wait(timeout=10)
+        assert os.listdir(".trash") == []
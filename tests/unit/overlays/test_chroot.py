@@ -15,12 +15,14 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import multiprocessing
+import os
+import time
 from pathlib import Path
 from unittest.mock import ANY, call
 
 import pytest
 
-from craft_parts.overlays import chroot
+from craft_parts.overlays import chroot, errors
 
 
 def target_func(content: str) -> int:
@@ -190,3 +192,113 @@ class TestChroot:
         assert fake_conn.sent[0] is None
         assert isinstance(fake_conn.sent[1], str)
         assert str(fake_conn.sent[1]) == "bummer"
+
+
+def target_func_exit() -> None:
+    os._exit(1)
+
+
+class TestChrootWorker:
+    """Execute consecutive calls in a long-lived chroot process."""
+
+    @pytest.fixture(autouse=True)
+    def setup_method_fixture(self, mocker, new_dir):
+        # pylint: disable=attribute-defined-outside-init
+        self.mock_mount = mocker.patch("craft_parts.utils.os_utils.mount")
+        self.mock_umount = mocker.patch("craft_parts.utils.os_utils.umount")
+        self.spy_process = mocker.spy(multiprocessing, "Process")
+        self.new_root = Path(new_dir, "dir1")
+        # pylint: enable=attribute-defined-outside-init
+
+        # this runs in the child process
+        mocker.patch("os.chroot")
+
+        Path("dir1").mkdir()
+        Path("dir1/proc").mkdir()
+
+    def test_worker(self):
+        worker = chroot.ChrootWorker(self.new_root)
+        assert worker.running is False
+
+        assert worker.execute(target_func, "content") == 1337
+        assert worker.execute(target_func, content="other") == 1337
+        assert worker.running is True
+
+        assert Path("dir1/foo.txt").read_text() == "other"
+        assert self.spy_process.mock_calls == [
+            call(target=chroot._worker, args=(self.new_root, ANY, ANY), daemon=True)
+        ]
+        assert self.mock_mount.mock_calls == [
+            call("proc", f"{self.new_root}/proc", "-tproc"),
+        ]
+        self.mock_umount.assert_not_called()
+
+        worker.close()
+        worker.close()
+
+        assert worker.running is False
+        assert self.mock_umount.mock_calls == [call(f"{self.new_root}/proc")]
+
+    def test_worker_error(self):
+        worker = chroot.ChrootWorker(self.new_root)
+
+        with pytest.raises(errors.OverlayChrootExecutionError) as raised:
+            worker.execute(target_func_error, "content")
+
+        assert raised.value.message == "bummer"
+        assert raised.value.details is not None
+        assert "in target_func_error" in raised.value.details
+        assert raised.value.details.endswith("RuntimeError: bummer\n")
+        assert isinstance(raised.value.__cause__, RuntimeError)
+
+        # the worker is still usable after an error
+        assert worker.execute(target_func, "content") == 1337
+        assert self.spy_process.call_count == 1
+        worker.close()
+
+    def test_worker_exited(self):
+        worker = chroot.ChrootWorker(self.new_root)
+
+        with pytest.raises(errors.OverlayChrootExecutionError) as raised:
+            worker.execute(target_func_exit)
+
+        assert raised.value.message.startswith("chroot worker exited unexpectedly")
+        assert worker.running is False
+        assert self.mock_umount.mock_calls == [call(f"{self.new_root}/proc")]
+
+        # a new worker is started for the next call
+        assert worker.execute(target_func, "content") == 1337
+        assert self.spy_process.call_count == 2
+        worker.close()
+
+    def test_worker_close_busy(self, mocker):
+        mocker.patch("craft_parts.overlays.chroot._STOP_TIMEOUT", 0.5)
+        worker = chroot.ChrootWorker(self.new_root)
+        assert worker.execute(target_func, "content") == 1337
+
+        # a call still running when the worker is closed, e.g. if the caller
+        # was interrupted while waiting for the reply
+        worker._conn.send((time.sleep, (5,), {}))
+
+        start = time.monotonic()
+        worker.close()
+
+        assert time.monotonic() - start < 3
+        assert worker.running is False
+        assert self.mock_umount.mock_calls == [call(f"{self.new_root}/proc")]
+
+    def test_worker_closes_inherited_pipes(self):
+        read_fd, write_fd = os.pipe()
+        try:
+            worker = chroot.ChrootWorker(self.new_root)
+            assert worker.execute(target_func, "content") == 1337
+
+            # the worker doesn't keep the write end of the pipe open
+            os.close(write_fd)
+            write_fd = -1
+            assert os.read(read_fd, 1) == b""
+            worker.close()
+        finally:
+            os.close(read_fd)
+            if write_fd >= 0:
+                os.close(write_fd)
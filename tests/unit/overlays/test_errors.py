@@ -43,3 +43,11 @@ def test_overlay_chroot_execution_error():
     assert err.brief == "Overlay environment execution error: something wrong happened"
     assert err.details is None
     assert err.resolution is None
+
+
+def test_overlay_chroot_execution_error_details():
+    err = errors.OverlayChrootExecutionError("something wrong happened", "traceback")
+    assert err.message == "something wrong happened"
+    assert err.brief == "Overlay environment execution error: something wrong happened"
+    assert err.details == "traceback"
+    assert err.resolution is None
@@ -20,7 +20,7 @@ from pathlib import Path
 
 import pytest
 
-from craft_parts.overlays.layers import LayerHash, LayerStateManager
+from craft_parts.overlays.layers import LayerHash, LayerHashChain, LayerStateManager
 from craft_parts.parts import Part
 
 
@@ -97,6 +97,45 @@ class TestLayerHash:
         assert Path("parts/p1/state/layer_hash").read_text() == "736f6d652076616c7565"
 
 
+class TestLayerHashChain:
+    """Verify the layer hash computation for the overlay stack."""
+
+    def test_get_layer_hash(self):
+        p1 = Part("p1", {})
+        p2 = Part("p2", {})
+        base_layer_hash = LayerHash(b"base hash value")
+
+        chain = LayerHashChain([p1, p2], base_layer_hash)
+        assert chain.get_layer_hash(p2).hex() == (
+            "c6e659c5a430c093a120bb17868ade39e91e00b8"
+        )
+        assert chain.get_layer_hash(p1).hex() == (
+            "a42a1d8ac7fdcfc4752e28aba0b0ee905e7cf96f"
+        )
+        assert chain.get_overlay_hash() == chain.get_layer_hash(p2)
+
+    def test_get_layer_hash_computed_once(self, mocker):
+        p1 = Part("p1", {})
+        p2 = Part("p2", {})
+        spy = mocker.spy(LayerHash, "for_part")
+
+        chain = LayerHashChain([p1, p2], LayerHash(b"base hash value"))
+        chain.get_layer_hash(p1)
+        chain.get_overlay_hash()
+        chain.get_overlay_hash()
+        chain.get_layer_hash(p1)
+
+        assert spy.call_count == 2
+
+    def test_get_overlay_hash_no_parts(self):
+        base_layer_hash = LayerHash(b"base hash value")
+
+        assert LayerHashChain([], base_layer_hash).get_overlay_hash() == (
+            base_layer_hash
+        )
+        assert LayerHashChain([], None).get_overlay_hash() is None
+
+
 @pytest.mark.usefixtures("new_dir")
 class TestLayerStateManager:
     """Verify in-memory layer state management operations."""
@@ -215,3 +254,57 @@ class TestLayerStateManager:
         lsm.set_layer_hash(p2, p2_layer_hash)
 
         assert lsm.get_overlay_hash() == p2_layer_hash.digest
+
+    def test_get_index(self):
+        p1 = Part("p1", {})
+        p2 = Part("p2", {})
+
+        lsm = LayerStateManager([p1, p2], None)
+        assert lsm.get_index(p1) == 0
+        assert lsm.get_index(p2) == 1
+
+        with pytest.raises(ValueError) as raised:
+            lsm.get_index(Part("p3", {}))
+
+        assert str(raised.value) == "part 'p3' not in parts list"
+
+    def test_compute_layer_hash_memoized(self, mocker):
+        p1 = Part("p1", {})
+        p2 = Part("p2", {})
+        spy = mocker.spy(LayerHash, "for_part")
+
+        lsm = LayerStateManager([p1, p2], LayerHash(b"base hash value"))
+        lsm.set_layer_hash(p1, lsm.compute_layer_hash(p1))
+        p2_layer_hash = lsm.compute_layer_hash(p2)
+        assert lsm.compute_layer_hash(p2) == p2_layer_hash
+        assert spy.call_count == 2
+
+        # the layer hash is computed again if the previous layer changes
+        lsm.set_layer_hash(p1, LayerHash(b"other hash value"))
+        assert lsm.compute_layer_hash(p2) != p2_layer_hash
+        assert spy.call_count == 3
+
+    def test_consistent_layers(self):
+        p1 = Part("p1", {})
+        p2 = Part("p2", {})
+        p3 = Part("p3", {})
+
+        lsm = LayerStateManager([p1, p2, p3], LayerHash(b"base hash value"))
+        assert lsm.consistent_layers == 0
+
+        # layers are only consistent if all layers below them are consistent
+        lsm.set_consistent(p2)
+        assert lsm.consistent_layers == 0
+
+        for part in [p1, p2, p3]:
+            lsm.set_layer_hash(part, lsm.compute_layer_hash(part))
+            lsm.set_consistent(part)
+        assert lsm.consistent_layers == 3
+
+        # setting the same hash doesn't change consistency
+        lsm.set_layer_hash(p2, lsm.get_layer_hash(p2))
+        assert lsm.consistent_layers == 3
+
+        # layers above a changed layer must be verified again
+        lsm.set_layer_hash(p2, LayerHash(b"other hash value"))
+        assert lsm.consistent_layers == 1
@@ -21,6 +21,7 @@ from typing import List
 
 import pytest
 
+from craft_parts import instrumentation
 from craft_parts.overlays import errors, overlay_fs
 
 
@@ -74,6 +75,96 @@ class TestOverlayFS:
             == "Command '['some', 'command']' returned non-zero exit status 42."
         )
 
+    def test_mount_fuse_strategy(self, mocker):
+        mocker.patch("craft_parts.utils.os_utils.mount_overlayfs")
+        mock_mount_kernel = mocker.patch(
+            "craft_parts.utils.os_utils.mount_kernel_overlayfs"
+        )
+
+        ovfs = self._make_overlay_fs([Path("/lower")])
+        assert ovfs.strategy is None
+        ovfs.mount(Path("/mountpoint"))
+        assert ovfs.strategy == overlay_fs.MountStrategy.FUSE
+        mock_mount_kernel.assert_not_called()
+
+    @pytest.mark.parametrize("euid,strategy", [(0, "KERNEL"), (1000, "FUSE")])
+    def test_mount_strategy_selection(self, mocker, euid, strategy):
+        mocker.patch("craft_parts.overlays.overlay_fs._kernel_overlay_usable", None)
+        mocker.patch("os.geteuid", return_value=euid)
+        mocker.patch("craft_parts.utils.os_utils.mount_overlayfs")
+        mocker.patch("craft_parts.utils.os_utils.mount_kernel_overlayfs")
+
+        ovfs = self._make_overlay_fs([Path("/lower")])
+        ovfs.mount(Path("/mountpoint"))
+        assert ovfs.strategy == overlay_fs.MountStrategy[strategy]
+
+    @pytest.mark.parametrize(
+        "metacopy,options",
+        [
+            (False, "-olowerdir=/lower1:/lower2,upperdir=/upper,workdir=/work"),
+            (
+                True,
+                "-olowerdir=/lower1:/lower2,upperdir=/upper,workdir=/work,"
+                "index=off,metacopy=on",
+            ),
+        ],
+    )
+    def test_mount_kernel(self, mocker, metacopy, options):
+        mocker.patch("craft_parts.overlays.overlay_fs._kernel_overlay_usable", True)
+        mock_mount_overlayfs = mocker.patch(
+            "craft_parts.utils.os_utils.mount_overlayfs"
+        )
+        mock_mount_kernel = mocker.patch(
+            "craft_parts.utils.os_utils.mount_kernel_overlayfs"
+        )
+
+        ovfs = overlay_fs.OverlayFS(
+            lower_dirs=[Path("/lower1"), Path("/lower2")],
+            upper_dir=Path("/upper"),
+            work_dir=Path("/work"),
+            metacopy=metacopy,
+        )
+        ovfs.mount(Path("/mountpoint"))
+        mock_mount_kernel.assert_called_once_with("/mountpoint", options)
+        mock_mount_overlayfs.assert_not_called()
+        assert ovfs.strategy == overlay_fs.MountStrategy.KERNEL
+
+    def test_mount_kernel_fallback(self, mocker):
+        mocker.patch("craft_parts.overlays.overlay_fs._kernel_overlay_usable", True)
+        mock_mount_overlayfs = mocker.patch(
+            "craft_parts.utils.os_utils.mount_overlayfs"
+        )
+        mock_mount_kernel = mocker.patch(
+            "craft_parts.utils.os_utils.mount_kernel_overlayfs",
+            side_effect=CalledProcessError(
+                cmd=["mount"], returncode=32, stderr=b"permission denied"
+            ),
+        )
+
+        ovfs = self._make_overlay_fs([Path("/lower")])
+        ovfs.mount(Path("/mountpoint"))
+        mock_mount_overlayfs.assert_called_once_with(
+            "/mountpoint",
+            "-olowerdir=/lower,upperdir=/upper,workdir=/work",
+        )
+        assert ovfs.strategy == overlay_fs.MountStrategy.FUSE
+
+        # don't try the kernel overlayfs again
+        ovfs.mount(Path("/mountpoint"))
+        assert mock_mount_kernel.call_count == 1
+        assert mock_mount_overlayfs.call_count == 2
+
+    def test_mount_recorded(self, mocker):
+        mocker.patch("craft_parts.utils.os_utils.mount_overlayfs")
+
+        ovfs = self._make_overlay_fs([Path("/lower")])
+        with instrumentation.recording() as recorder:
+            ovfs.mount(Path("/mountpoint"))
+
+        (span,) = recorder.spans
+        assert span.name == "mount overlay"
+        assert span.args == {"strategy": "fuse-overlayfs"}
+
     def test_unmount(self, mocker):
         mocker.patch("craft_parts.utils.os_utils.mount_overlayfs")
         mock_umount = mocker.patch("craft_parts.utils.os_utils.umount")
@@ -82,6 +173,7 @@ class TestOverlayFS:
         ovfs.mount(Path("/mountpoint"))
         ovfs.unmount()
         mock_umount.assert_called_once_with("/mountpoint")
+        assert ovfs.strategy is None
 
     def test_unmount_not_mounted(self, mocker):
         mock_umount = mocker.patch("craft_parts.utils.os_utils.umount")
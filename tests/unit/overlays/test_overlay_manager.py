@@ -20,6 +20,7 @@ import pytest
 
 from craft_parts.infos import ProjectInfo
 from craft_parts.overlays import LayerMount, OverlayManager, PackageCacheMount
+from craft_parts.overlays import overlay_manager
 from craft_parts.overlays.overlay_fs import OverlayFS
 from craft_parts.parts import Part
 
@@ -158,7 +159,10 @@ class TestPackageManagement:
             "craft_parts.utils.os_utils.mount_overlayfs"
         )
         self.mock_umount = mocker.patch("craft_parts.utils.os_utils.umount")
-        self.mock_chroot = mocker.patch("craft_parts.overlays.chroot.chroot")
+        self.mock_worker_class = mocker.patch(
+            "craft_parts.overlays.chroot.ChrootWorker"
+        )
+        self.mock_worker = self.mock_worker_class.return_value
         self.mock_refresh_packages_list = mocker.patch(
             "craft_parts.packages.Repository.refresh_packages_list"
         )
@@ -174,10 +178,10 @@ class TestPackageManagement:
             f"-olowerdir=base_dir,upperdir={new_dir}/overlay/packages,"
             f"workdir={new_dir}/overlay/work",
         )
-        self.mock_chroot.assert_called_once_with(
-            new_dir / "overlay/overlay", self.mock_refresh_packages_list
+        self.mock_worker_class.assert_called_once_with(new_dir / "overlay/overlay")
+        self.mock_worker.execute.assert_called_once_with(
+            overlay_manager._refresh_packages_list
         )
-        self.mock_refresh_packages_list.called_once_with()
 
     def test_download_packages(self, mocker, new_dir):
         mock_download_packages = mocker.patch(
@@ -193,8 +197,9 @@ class TestPackageManagement:
             f"-olowerdir=base_dir,upperdir={new_dir}/overlay/packages,"
             f"workdir={new_dir}/overlay/work",
         )
-        self.mock_chroot.assert_called_once_with(
-            new_dir / "overlay/overlay", mock_download_packages, ["pkg1", "pkg2"]
+        self.mock_worker_class.assert_called_once_with(new_dir / "overlay/overlay")
+        self.mock_worker.execute.assert_called_once_with(
+            mock_download_packages, ["pkg1", "pkg2"]
         )
         mock_download_packages.called_once_with(["pkg1", "pkg2"])
 
@@ -213,8 +218,8 @@ class TestPackageManagement:
             f"upperdir={new_dir}/parts/p1/layer,"
             f"workdir={new_dir}/overlay/work",
         )
-        self.mock_chroot.assert_called_once_with(
-            new_dir / "overlay/overlay",
+        self.mock_worker_class.assert_called_once_with(new_dir / "overlay/overlay")
+        self.mock_worker.execute.assert_called_once_with(
             mock_install_packages,
             ["pkg1", "pkg2"],
             refresh_package_cache=False,
@@ -237,10 +242,14 @@ class TestPackageManagement:
             f"-olowerdir=base_dir,upperdir={new_dir}/overlay/packages,"
             f"workdir={new_dir}/overlay/work",
         )
-        self.mock_chroot.assert_called_once_with(
-            new_dir / "overlay/overlay", self.mock_refresh_packages_list
+        self.mock_worker_class.assert_called_once_with(new_dir / "overlay/overlay")
+        self.mock_worker.execute.assert_called_once_with(
+            overlay_manager._refresh_packages_list
         )
-        self.mock_refresh_packages_list.called_once_with()
+
+        # the package cache stays mounted until the manager is closed
+        self.mock_umount.assert_not_called()
+        self.om.close()
         self.mock_umount.assert_called_once_with(new_dir / "overlay/overlay")
 
     def test_package_cache_mount_download(self, mocker, new_dir):
@@ -262,10 +271,13 @@ class TestPackageManagement:
             f"-olowerdir=base_dir,upperdir={new_dir}/overlay/packages,"
             f"workdir={new_dir}/overlay/work",
         )
-        self.mock_chroot.assert_called_once_with(
-            new_dir / "overlay/overlay", mock_download_packages, ["pkg1", "pkg2"]
+        self.mock_worker_class.assert_called_once_with(new_dir / "overlay/overlay")
+        self.mock_worker.execute.assert_called_once_with(
+            mock_download_packages, ["pkg1", "pkg2"]
         )
         mock_download_packages.called_once_with(["pkg1", "pkg2"])
+        self.mock_umount.assert_not_called()
+        self.om.close()
         self.mock_umount.assert_called_once_with(new_dir / "overlay/overlay")
 
     def test_layer_mount_install(self, mocker, new_dir):
@@ -289,11 +301,91 @@ class TestPackageManagement:
             f"upperdir={new_dir}/parts/p1/layer,"
             f"workdir={new_dir}/overlay/work",
         )
-        self.mock_chroot.assert_called_once_with(
-            new_dir / "overlay/overlay",
+        self.mock_worker_class.assert_called_once_with(new_dir / "overlay/overlay")
+        self.mock_worker.execute.assert_called_once_with(
             mock_install_packages,
             ["pkg1", "pkg2"],
             refresh_package_cache=False,
         )
         mock_install_packages.called_once_with(["pkg1", "pkg2"])
+        self.mock_worker.close.assert_called_once_with()
+        self.mock_umount.assert_called_once_with(new_dir / "overlay/overlay")
+
+    def test_package_cache_mount_reuse(self, mocker, new_dir):
+        mocker.patch("craft_parts.packages.Repository.download_packages")
+
+        self.om.mkdirs()
+        with PackageCacheMount(self.om) as ctx:
+            ctx.refresh_packages_list()
+        with PackageCacheMount(self.om) as ctx:
+            ctx.download_packages(["pkg1"])
+        with PackageCacheMount(self.om) as ctx:
+            ctx.download_packages(["pkg2"])
+
+        assert self.mock_mount_overlayfs.call_count == 1
+        # all operations run in the same chroot worker
+        self.mock_worker_class.assert_called_once_with(new_dir / "overlay/overlay")
+        assert self.mock_worker.execute.call_count == 3
+        self.mock_worker.close.assert_not_called()
+        self.mock_umount.assert_not_called()
+
+        self.om.close()
+        self.mock_worker.close.assert_called_once_with()
+        self.om.close()
+        self.mock_umount.assert_called_once_with(new_dir / "overlay/overlay")
+
+    def test_package_cache_mount_error(self, new_dir):
+        self.mock_worker.execute.side_effect = RuntimeError("refresh failed")
+
+        self.om.mkdirs()
+        with pytest.raises(RuntimeError), PackageCacheMount(self.om) as ctx:
+            ctx.refresh_packages_list()
+
+        # the package cache is not kept mounted after an error
+        self.mock_worker.close.assert_called_once_with()
+        self.mock_umount.assert_called_once_with(new_dir / "overlay/overlay")
+
+        self.om.close()
         self.mock_umount.assert_called_once_with(new_dir / "overlay/overlay")
+
+    def test_layer_mount_replaces_package_cache_mount(self, mocker, new_dir):
+        mocker.patch("craft_parts.packages.Repository.install_packages")
+
+        self.om.mkdirs()
+        with PackageCacheMount(self.om) as ctx:
+            ctx.refresh_packages_list()
+
+        with LayerMount(self.om, self.p1) as ctx:
+            # the package cache was unmounted before mounting the layer stack
+            self.mock_worker.close.assert_called_once_with()
+            self.mock_umount.assert_called_once_with(new_dir / "overlay/overlay")
+            ctx.install_packages(["pkg1"])
+
+            # the chroot environment is not kept for layer stacks
+            assert self.mock_worker.close.call_count == 2
+
+        assert self.mock_mount_overlayfs.call_count == 2
+        assert self.mock_umount.call_count == 2
+
+        # layer stacks are not kept mounted
+        self.om.close()
+        assert self.mock_umount.call_count == 2
+
+    def test_layer_mount_reuse(self, new_dir):
+        self.om.mkdirs()
+        self.om.mount_layer(self.p2, pkg_cache=True)
+        self.om.mount_layer(self.p2, pkg_cache=True)
+        assert self.mock_mount_overlayfs.call_count == 1
+
+        self.om.mount_layer(self.p1, pkg_cache=True)
+        assert self.mock_mount_overlayfs.call_count == 2
+        self.mock_umount.assert_called_once_with(new_dir / "overlay/overlay")
+
+        self.om.release()
+        assert self.mock_umount.call_count == 2
+
+    def test_refresh_packages_list_in_worker(self):
+        overlay_manager._refresh_packages_list()
+
+        self.mock_refresh_packages_list.cache_clear.assert_called_once_with()
+        self.mock_refresh_packages_list.assert_called_once_with()
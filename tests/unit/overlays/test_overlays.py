@@ -72,35 +72,6 @@ class TestHelpers:
     def test_oci_opaque_dir(self, name, oci_name):
         assert overlays.oci_opaque_dir(Path(name)) == Path(oci_name)
 
-    def test_is_path_visible(self, new_dir):
-        deepfile = Path("dir1/dir2/dir3/dir4/foo")
-        deepfile.parent.mkdir(parents=True)
-        deepfile.touch()
-        assert overlays._is_path_visible(new_dir, deepfile) is True
-
-    def test_is_path_visible_first_whited_out(self, new_dir):
-        deepfile = Path("dir1/dir2/dir3/dir4/foo")
-        Path(".wh.dir1").touch()
-        assert overlays._is_path_visible(new_dir, deepfile) is False
-
-    def test_is_path_visible_last_whited_out(self, new_dir):
-        deepfile = Path("dir1/dir2/dir3/dir4/foo")
-        Path("dir1/dir2/dir3").mkdir(parents=True)
-        Path("dir1/dir2/dir3/.wh.dir4").touch()
-        assert overlays._is_path_visible(new_dir, deepfile) is False
-
-    def test_is_path_visible_first_opaque(self, new_dir):
-        deepfile = Path("dir1/dir2/dir3/dir4/foo")
-        deepfile.parent.mkdir(parents=True)
-        Path("dir1/.wh..wh..opq").touch()
-        assert overlays._is_path_visible(new_dir, deepfile) is False
-
-    def test_is_path_visible_last_opaque(self, new_dir):
-        deepfile = Path("dir1/dir2/dir3/dir4/foo")
-        deepfile.parent.mkdir(parents=True)
-        Path("dir1/dir2/dir3/dir4/.wh..wh..opq").touch()
-        assert overlays._is_path_visible(new_dir, deepfile) is False
-
 
 class TestVisibility:
     """File visibility in a directory layer."""
@@ -190,3 +161,70 @@ class TestVisibility:
         files, dirs = overlays.visible_in_layer(Path("lower_dir"), Path("upper_dir"))
         assert files == {"a", "dir1/b", "dir1/c"}
         assert dirs == {"dir1"}
+
+    def test_visible_in_layer_file_blocks_dir(self, new_dir):
+        Path("upper_dir/dir1").touch()
+
+        files, dirs = overlays.visible_in_layer(Path("lower_dir"), Path("upper_dir"))
+        assert files == {"a"}
+        assert dirs == set()
+
+    def test_visible_in_layer_missing_lower_dir(self, new_dir):
+        files, dirs = overlays.visible_in_layer(Path("missing"), Path("upper_dir"))
+        assert files == set()
+        assert dirs == set()
+
+
+class TestStackedVisibility:
+    """File visibility in a stack of directory layers."""
+
+    @pytest.fixture(autouse=True)
+    def setup_method_fixture(self, new_dir):
+        Path("layer2/dir1").mkdir(parents=True)
+        Path("layer2/dir1/b").touch()
+        Path("layer2/dir3").mkdir()
+        Path("layer2/e").touch()
+
+        Path("layer1/dir1/dir2").mkdir(parents=True)
+        Path("layer1/dir1/b").touch()
+        Path("layer1/dir1/c").touch()
+        Path("layer1/dir1/dir2/d").touch()
+        Path("layer1/dir3/f").mkdir(parents=True)
+        Path("layer1/a").touch()
+        Path("layer1/e").touch()
+
+        Path("upper_dir/dir3").mkdir(parents=True)
+        Path("upper_dir/dir3/.wh..wh..opq").touch()
+        Path("upper_dir/.wh.a").touch()
+
+    @pytest.mark.parametrize("max_workers", [1, 2])
+    def test_visible_in_layers(self, new_dir, max_workers):
+        visibility = overlays.visible_in_layers(
+            [Path("layer2"), Path("layer1")],
+            Path("upper_dir"),
+            max_workers=max_workers,
+        )
+
+        assert visibility == [
+            ({"dir1/b", "e"}, {"dir1"}),
+            ({"dir1/c", "dir1/dir2/d"}, {"dir1/dir2"}),
+        ]
+
+    def test_visible_in_layers_migrated(self, new_dir):
+        """Visibility is the same as migrating each layer before the next."""
+        expected = []
+        for layer in ["layer2", "layer1"]:
+            files, dirs = overlays.visible_in_layer(Path(layer), Path("upper_dir"))
+            expected.append((files, dirs))
+            for name in sorted(dirs):
+                Path("upper_dir", name).mkdir()
+            for name in files:
+                Path("upper_dir", name).touch()
+
+        assert expected == [
+            ({"dir1/b", "e"}, {"dir1"}),
+            ({"dir1/c", "dir1/dir2/d"}, {"dir1/dir2"}),
+        ]
+
+    def test_visible_in_layers_empty(self, new_dir):
+        assert overlays.visible_in_layers([], Path("upper_dir")) == []
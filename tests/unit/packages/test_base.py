@@ -14,6 +14,9 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from pathlib import Path
+
+from craft_parts import errors
 from craft_parts.packages import base
 from craft_parts.packages.base import BaseRepository, DummyRepository
 
@@ -35,6 +38,22 @@ class TestBaseRepository:
             "unpack_stage_packages",
         }
 
+    def test_get_package_libraries_index(self, mocker):
+        class TestRepository(DummyRepository):
+            """A repository with libraries."""
+
+        mock_libraries = mocker.patch.object(
+            TestRepository, "get_package_libraries", return_value={"/lib/libc.so.6"}
+        )
+
+        index = TestRepository.get_package_libraries_index("libc6")
+        assert index == frozenset({"/lib/libc.so.6"})
+        assert isinstance(index, frozenset)
+
+        # the index is memoized
+        assert TestRepository.get_package_libraries_index("libc6") is index
+        mock_libraries.assert_called_once_with("libc6")
+
 
 class TestDummyRepository:
     """Verify the dummy repository implementation."""
@@ -44,6 +63,7 @@ class TestDummyRepository:
 
     def test_methods(self):
         assert DummyRepository.get_package_libraries("foo") == set()
+        assert DummyRepository.get_package_libraries_index("foo") == frozenset()
         assert DummyRepository.get_packages_for_source_type("bar") == set()
         assert DummyRepository.install_packages([]) == []
         assert DummyRepository.is_package_installed("baz") is False
@@ -70,4 +90,77 @@ class TestPkgNameParts:
         assert version == "2.10-1"
 
 
-# TODO: add tests for mark_origin_stage_package()
+class TestOriginStagePackage:
+    """Check the tracking of files origin."""
+
+    def test_mark_origin_stage_package(self, new_dir, mocker):
+        mock_write = mocker.patch("craft_parts.xattrs.write_origin_stage_package")
+        Path("usr/bin").mkdir(parents=True)
+        Path("usr/bin/foo").touch()
+        Path("usr/bin/bar").symlink_to("foo")
+
+        files = base.mark_origin_stage_package(".", "pkg=1.0")
+
+        assert files == {"usr/bin/foo"}
+        mock_write.assert_called_once_with("./usr/bin/foo", "pkg=1.0")
+
+    def test_mark_origin_stage_package_xattr_error(self, new_dir, mocker):
+        mock_write = mocker.patch(
+            "craft_parts.xattrs.write_origin_stage_package",
+            side_effect=errors.XAttributeError(key="key", path="path"),
+        )
+        Path("foo").touch()
+        Path("bar").touch()
+
+        files = base.mark_origin_stage_package(".", "pkg=1.0")
+
+        # don't keep trying to mirror to xattrs if unsupported
+        assert files == {"foo", "bar"}
+        assert mock_write.call_count == 1
+
+    def test_mark_origin_stage_package_no_xattrs(self, new_dir, mocker):
+        mock_write = mocker.patch("craft_parts.xattrs.write_origin_stage_package")
+        Path("foo").touch()
+
+        files = base.mark_origin_stage_package(".", "pkg=1.0", mirror_xattrs=False)
+
+        assert files == {"foo"}
+        mock_write.assert_not_called()
+
+    def test_origin_index(self, new_dir):
+        index_path = base.get_origin_index_path(Path("stage_packages"))
+        assert base.read_origin_index(index_path) is None
+
+        base.write_origin_index(
+            index_path,
+            {"usr/bin/foo": "foo=1.0", "usr/lib/libfoo.so": "foo=1.0", "bar": "bar=2"},
+        )
+
+        index = base.read_origin_index(index_path)
+        assert index == {
+            "foo=1.0": {"usr/bin/foo", "usr/lib/libfoo.so"},
+            "bar=2": {"bar"},
+        }
+        assert base.get_origin_stage_packages(index, {"usr/bin/foo", "baz"}) == {
+            "foo=1.0"
+        }
+        assert base.get_origin_stage_packages(index, {"baz"}) == set()
+
+    def test_relocate_origin_index(self, new_dir):
+        index_path = Path("origin_index.json")
+        base.write_origin_index(
+            index_path,
+            {"usr/bin/foo": "foo=1.0", "usr/lib/libfoo.so": "foo=1.0", "bar": "bar=2"},
+        )
+
+        base.relocate_origin_index(index_path, [("usr/lib", "lib"), ("bar", "baz")])
+
+        assert base.read_origin_index(index_path) == {
+            "foo=1.0": {"usr/bin/foo", "lib/libfoo.so"},
+            "bar=2": {"baz"},
+        }
+
+    def test_relocate_origin_index_missing(self, new_dir):
+        index_path = Path("origin_index.json")
+        base.relocate_origin_index(index_path, [("foo", "bar")])
+        assert index_path.exists() is False
@@ -227,6 +227,36 @@ class TestFixShebang:
             with open(data["file_path"], "r") as fd:
                 assert fd.read() == data["expected"]
 
+    def test_fix_shebang_with_args(self):
+        file_path = Path("root", "bin", "a")
+        file_path.parent.mkdir(parents=True)
+        file_path.write_text("#!/usr/bin/python3 -Es\nimport this")
+
+        normalize(Path("root"), repository=DummyRepository)
+
+        assert file_path.read_text() == (
+            "#!/bin/sh\n''''exec python3 -Es -- \"$0\" \"$@\" # '''\nimport this"
+        )
+
+    def test_fix_shebang_not_first_line(self):
+        file_path = Path("root", "bin", "a")
+        file_path.parent.mkdir(parents=True)
+        file_path.write_text("# comment\n#!/usr/bin/python\n")
+
+        normalize(Path("root"), repository=DummyRepository)
+
+        assert file_path.read_text() == "# comment\n#!/usr/bin/python\n"
+
+    def test_fix_shebang_binary_file(self):
+        file_path = Path("root", "bin", "a")
+        file_path.parent.mkdir(parents=True)
+        content = b"\x7fELF\xff\xfe#!/usr/bin/python\n"
+        file_path.write_bytes(content)
+
+        normalize(Path("root"), repository=DummyRepository)
+
+        assert file_path.read_bytes() == content
+
 
 @pytest.mark.usefixtures("new_dir")
 class TestRemoveUselessFiles:
@@ -14,6 +14,10 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
+from pathlib import Path
+from unittest.mock import call
+
 import pytest
 
 from craft_parts.packages import errors, snaps
@@ -21,6 +25,11 @@ from craft_parts.packages import errors, snaps
 # pylint: disable=missing-class-docstring
 
 
+@pytest.fixture(autouse=True)
+def clear_download_cache():
+    snaps._download_cache.clear()
+
+
 class TestSnapPackageCurrentChannel:
     def assert_channels(self, *, snap, installed_snaps, expected, fake_snapd):
         fake_snapd.snaps_result = installed_snaps
@@ -428,6 +437,73 @@ class TestSnapPackageLifecycle:
             ["snap", "download", "other-invalid"],
         ]
 
+    def test_download_snaps_parallel(self, fake_snapd, fake_snap_command):
+        snaps.download_snaps(
+            snaps_list=["fake-snap", "other-fake-snap", "another-fake-snap"],
+            directory="fakedir",
+            max_workers=3,
+        )
+        assert sorted(fake_snap_command.calls) == [
+            ["snap", "download", "another-fake-snap"],
+            ["snap", "download", "fake-snap"],
+            ["snap", "download", "other-fake-snap"],
+        ]
+
+    def test_download_snaps_parallel_with_invalid(self, fake_snapd, fake_snap_command):
+        fake_snap_command.download_side_effect = [True, False]
+
+        with pytest.raises(errors.SnapDownloadError):
+            snaps.download_snaps(
+                snaps_list=["fake-snap", "other-invalid"],
+                directory="fakedir",
+                max_workers=2,
+            )
+
+    def test_download_snaps_cached(self, new_dir, mocker):
+        def fake_download(*, directory):
+            Path(directory, "fake-snap_42.snap").write_text("snap")
+            Path(directory, "fake-snap_42.assert").write_text("assert")
+
+        mock_download = mocker.patch.object(
+            snaps.SnapPackage, "download", side_effect=fake_download
+        )
+
+        snaps.download_snaps(snaps_list=["fake-snap"], directory="dir1")
+        snaps.download_snaps(snaps_list=["fake-snap"], directory="dir2")
+
+        mock_download.assert_called_once_with(directory="dir1")
+        assert sorted(os.listdir("dir2")) == [
+            "fake-snap_42.assert",
+            "fake-snap_42.snap",
+        ]
+        assert Path("dir2/fake-snap_42.snap").read_text() == "snap"
+
+    def test_download_snaps_cached_other_channel(self, new_dir, mocker):
+        def fake_download(*, directory):
+            Path(directory, "fake-snap_42.snap").write_text("snap")
+
+        mock_download = mocker.patch.object(
+            snaps.SnapPackage, "download", side_effect=fake_download
+        )
+
+        snaps.download_snaps(snaps_list=["fake-snap"], directory="dir1")
+        snaps.download_snaps(snaps_list=["fake-snap/edge"], directory="dir2")
+
+        assert mock_download.mock_calls == [
+            call(directory="dir1"),
+            call(directory="dir2"),
+        ]
+
+    def test_download_snaps_cached_file_removed(self, new_dir, mocker):
+        mock_download = mocker.patch.object(snaps.SnapPackage, "download")
+        snaps._download_cache[("fake-snap", "latest/stable")] = [
+            str(Path("dir1/fake-snap_42.snap").absolute())
+        ]
+
+        snaps.download_snaps(snaps_list=["fake-snap"], directory="dir2")
+
+        mock_download.assert_called_once_with(directory="dir2")
+
     def test_refresh_to_classic(self, fake_snapd, fake_snap_command):
         fake_snapd.find_result = [
             {"fake-snap": {"channels": {"classic/stable": {"confinement": "classic"}}}}
@@ -544,3 +620,97 @@ class TestSnapdNotInstalled:
 
         installed_snaps = snaps.get_installed_snaps()
         assert installed_snaps == []
+
+
+class TestSnapdClient:
+    @pytest.fixture
+    def spy_get(self, mocker):
+        client = snaps.get_snapd_client()
+        return mocker.spy(client._session, "get")
+
+    def test_local_snap_info_cached(self, fake_snapd, spy_get):
+        fake_snapd.snaps_result = [{"name": "fake-snap", "revision": "10"}]
+        client = snaps.get_snapd_client()
+
+        assert client.get_local_snap_info("fake-snap") == {"revision": "10"}
+        assert client.get_local_snap_info("fake-snap") == {"revision": "10"}
+        assert client.get_local_snap_info("other-snap") is None
+        assert client.get_local_snap_info("other-snap") is None
+        assert spy_get.call_count == 2
+
+    def test_local_snaps_listing(self, fake_snapd, spy_get):
+        fake_snapd.snaps_result = [{"name": "fake-snap", "revision": "10"}]
+        client = snaps.get_snapd_client()
+
+        assert client.get_local_snaps() == [{"name": "fake-snap", "revision": "10"}]
+        assert client.get_local_snap_info("fake-snap") == {
+            "name": "fake-snap",
+            "revision": "10",
+        }
+        assert client.get_local_snap_info("other-snap") is None
+        assert snaps.get_installed_snaps() == ["fake-snap=10"]
+        assert spy_get.call_count == 1
+
+    def test_store_snap_info_cached(self, fake_snapd, spy_get):
+        fake_snapd.find_result = [{"fake-snap": {"channels": {}}}]
+        fake_snapd.snaps_result = []
+        client = snaps.get_snapd_client()
+
+        assert client.get_store_snap_info("fake-snap") == {"channels": {}}
+        assert snaps.SnapPackage("fake-snap").in_store is True
+        assert snaps.SnapPackage("fake-snap").is_valid() is False
+        assert spy_get.call_count == 2  # store info and local info
+
+    def test_invalidate(self, fake_snapd, spy_get):
+        fake_snapd.snaps_result = [{"name": "fake-snap", "revision": "10"}]
+        client = snaps.get_snapd_client()
+        client.get_local_snaps()
+
+        fake_snapd.snaps_result = [{"name": "fake-snap", "revision": "11"}]
+        client.invalidate("fake-snap")
+
+        assert client.get_local_snap_info("fake-snap") == {"revision": "11"}
+        assert spy_get.call_count == 2
+
+    def test_ttl(self, fake_snapd, mocker):
+        fake_snapd.snaps_result = [{"name": "fake-snap", "revision": "10"}]
+        client = snaps.SnapdClient(ttl=10)
+        spy_get = mocker.spy(client._session, "get")
+        mock_time = mocker.patch("time.monotonic", return_value=100)
+
+        client.get_local_snap_info("fake-snap")
+        mock_time.return_value = 109
+        client.get_local_snap_info("fake-snap")
+        assert spy_get.call_count == 1
+
+        mock_time.return_value = 111
+        client.get_local_snap_info("fake-snap")
+        assert spy_get.call_count == 2
+
+    def test_install_snaps_bulk_query(self, fake_snapd, spy_get):
+        fake_snapd.find_result = [
+            {
+                "fake-snap": {
+                    "channel": "stable",
+                    "type": "app",
+                    "channels": {"latest/stable": {"confinement": "strict"}},
+                }
+            },
+            {
+                "other-snap": {
+                    "channel": "stable",
+                    "type": "app",
+                    "channels": {"latest/stable": {"confinement": "strict"}},
+                }
+            },
+        ]
+        fake_snapd.snaps_result = [
+            {"name": "fake-snap", "channel": "stable", "revision": "1"},
+            {"name": "other-snap", "channel": "stable", "revision": "2"},
+        ]
+
+        installed_snaps = snaps.install_snaps(["fake-snap", "other-snap"])
+
+        assert installed_snaps == ["fake-snap=1", "other-snap=2"]
+        # one local snaps listing and one store query per snap
+        assert spy_get.call_count == 3
@@ -133,6 +133,16 @@ def test_get_build_environment(new_dir, part_info):
     }
 
 
+def test_get_build_caches(part_info):
+    properties = GoPlugin.properties_class.unmarshal({"source": "."})
+    plugin = GoPlugin(properties=properties, part_info=part_info)
+
+    assert plugin.get_build_caches() == {
+        "GOMODCACHE": "go-mod",
+        "GOCACHE": "go-build",
+    }
+
+
 def test_get_build_commands(part_info):
     properties = GoPlugin.properties_class.unmarshal({"source": "."})
     plugin = GoPlugin(properties=properties, part_info=part_info)
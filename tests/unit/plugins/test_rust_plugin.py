@@ -183,6 +183,15 @@ class TestPluginRustPlugin:
             "PATH": "${HOME}/.cargo/bin:${PATH}",
         }
 
+    def test_get_build_caches(self, part_info):
+        properties = RustPlugin.properties_class.unmarshal({"source": "."})
+        plugin = RustPlugin(properties=properties, part_info=part_info)
+
+        assert plugin.get_build_caches() == {
+            "CARGO_HOME": "cargo",
+            "CARGO_TARGET_DIR": "cargo-target-my-part",
+        }
+
     def test_get_build_commands(self, part_info):
         properties = RustPlugin.properties_class.unmarshal({"source": "."})
         plugin = RustPlugin(properties=properties, part_info=part_info)
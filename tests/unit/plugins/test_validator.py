@@ -15,6 +15,8 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set
@@ -22,9 +24,11 @@ from typing import Any, Dict, List, Optional, Set
 import pytest
 
 from craft_parts import errors
+from craft_parts.executor.shell_pool import ShellPool
 from craft_parts.infos import PartInfo, ProjectInfo
 from craft_parts.parts import Part
 from craft_parts.plugins import Plugin, PluginEnvironmentValidator, PluginProperties
+from craft_parts.plugins.validator import ProbeCache
 
 
 @pytest.fixture
@@ -174,3 +178,145 @@ def test_validation_output_error(part_info, empty_foo_exe):
     err = raised.value
     assert err.part_name == "my-part"
     assert err.reason == "foo is expected to print bar"
+
+
+def test_validation_shell_pool(mocker, part_info, foo_exe):
+    properties = FooPluginProperties()
+    shell_pool = ShellPool()
+    run = mocker.spy(subprocess, "run")
+
+    try:
+        validator = FooPlugin.validator_class(
+            part_name=part_info.part_name,
+            env=f"PATH={str(foo_exe.parent)}",
+            properties=properties,
+            shell_pool=shell_pool,
+        )
+        validator.validate_environment()
+
+        validator = FooPlugin.validator_class(
+            part_name=part_info.part_name,
+            env="PATH=/nonexistent",
+            properties=properties,
+            shell_pool=shell_pool,
+        )
+        with pytest.raises(errors.PluginEnvironmentValidationError) as raised:
+            validator.validate_environment()
+    finally:
+        shell_pool.close()
+
+    assert raised.value.reason == "foo executable not found"
+    run.assert_not_called()
+
+
+def test_validation_probe_cache(mocker, part_info, foo_exe):
+    properties = FooPluginProperties()
+    probe_cache = ProbeCache()
+    run = mocker.spy(subprocess, "run")
+
+    for part_name in ["p1", "p2"]:
+        validator = FooPlugin.validator_class(
+            part_name=part_name,
+            env=f"PATH={str(foo_exe.parent)}",
+            properties=properties,
+            probe_cache=probe_cache,
+        )
+        validator.validate_environment()
+
+    assert run.call_count == 1
+
+    # a different environment is probed again
+    validator = FooPlugin.validator_class(
+        part_name="p3",
+        env=f"PATH={str(foo_exe.parent)}:/usr/bin",
+        properties=properties,
+        probe_cache=probe_cache,
+    )
+    validator.validate_environment()
+
+    assert run.call_count == 2
+
+
+def test_validation_probe_cache_error(mocker, part_info):
+    properties = FooPluginProperties()
+    probe_cache = ProbeCache()
+    run = mocker.spy(subprocess, "run")
+
+    for part_name in ["p1", "p2"]:
+        validator = FooPlugin.validator_class(
+            part_name=part_name, env="", properties=properties, probe_cache=probe_cache
+        )
+        with pytest.raises(errors.PluginEnvironmentValidationError) as raised:
+            validator.validate_environment()
+        assert raised.value.part_name == part_name
+
+    assert run.call_count == 1
+
+
+class TestProbeCache:
+    """Verify the plugin validation command cache."""
+
+    def test_get(self, mocker):
+        probe_cache = ProbeCache()
+        execute = mocker.Mock(return_value="output")
+
+        assert probe_cache.get("env", "cmd", execute) == "output"
+        assert probe_cache.get("env", "cmd", execute) == "output"
+        assert probe_cache.get("env", "other", execute) == "output"
+        assert probe_cache.get("other", "cmd", execute) == "output"
+        assert execute.call_count == 3
+
+    def test_get_part_environment(self, mocker):
+        probe_cache = ProbeCache()
+        execute = mocker.Mock(return_value="output")
+
+        def env(part_name: str, path: str = "/usr/bin") -> str:
+            part_dir = f"/work/parts/{part_name}"
+            return (
+                "# Environment\n"
+                f'export CRAFT_PART_NAME="{part_name}"\n'
+                f'export CRAFT_PART_SRC="{part_dir}/src"\n'
+                f'export CRAFT_PART_BUILD="{part_dir}/build"\n'
+                f'export CRAFT_PART_INSTALL="{part_dir}/install"\n'
+                f'export PATH="{path}:$PATH"\n'
+                'export GOBIN="${CRAFT_PART_INSTALL}/bin"\n'
+                'export GOFLAGS="-mod=vendor"\n'
+            )
+
+        for part_name in ["p1", "p2", "p3"]:
+            probe_cache.get(env(part_name), "go version", execute)
+
+        assert execute.call_count == 1
+
+        # the part directories are in the executable search path
+        probe_cache.get(env("p4", path="/work/parts/p4/install/bin"), "go", execute)
+        probe_cache.get(env("p5", path="/work/parts/p5/install/bin"), "go", execute)
+        assert execute.call_count == 3
+
+        # non part-specific variables are part of the probe environment
+        probe_cache.get(env("p1").replace("vendor", "mod"), "go version", execute)
+        assert execute.call_count == 4
+
+    def test_get_concurrent(self):
+        probe_cache = ProbeCache()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def execute():
+            calls.append(1)
+            started.set()
+            release.wait(timeout=10)
+            return "output"
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(probe_cache.get, "env", "cmd", execute)]
+            started.wait(timeout=10)
+            futures += [
+                pool.submit(probe_cache.get, "env", "cmd", execute) for _ in range(3)
+            ]
+            release.set()
+            results = [f.result() for f in futures]
+
+        assert results == ["output"] * 4
+        assert len(calls) == 1
@@ -77,12 +77,94 @@ class TestSnapSource:
             source.pull()
 
         assert re.match(
-            f"unsquashfs -force -dest {self._path}/\\w+ "
+            f"unsquashfs -force -dest {self._path}/dest_dir "
             f"{self._path}/dest_dir/test-snap.snap",
             " ".join([str(s) for s in raised.value.command]),
         )
         assert raised.value.exit_code == 1
 
+    def _fake_unsquashfs(self, command):
+        dest = Path(command[command.index("-dest") + 1])
+        (dest / "meta").mkdir(parents=True)
+        (dest / "meta" / "snap.yaml").write_text("name: basic")
+        (dest / "bin").mkdir()
+        (dest / "bin" / "hello").write_text("hello")
+        return ""
+
+    def test_provision_in_place(self, new_dir, mocker):
+        run = mocker.patch(
+            "craft_parts.sources.snap_source.SnapSource._run_output",
+            side_effect=self._fake_unsquashfs,
+        )
+        copy_tree = mocker.spy(snap_source.file_utils, "link_or_copy_tree")
+        source = sources.SnapSource(
+            str(self._test_file), self._dest_dir, cache_dir=new_dir
+        )
+        source.provision(self._dest_dir, src=self._test_file, keep=True)
+
+        assert run.call_args[0][0][3] == str(self._dest_dir)
+        assert Path(self._dest_dir / "meta.basic/snap.yaml").is_file()
+        assert Path(self._dest_dir / "bin/hello").is_file()
+        assert Path(self._dest_dir / "meta").exists() is False
+        copy_tree.assert_not_called()
+
+    def test_provision_existing_meta(self, new_dir, mocker):
+        mocker.patch(
+            "craft_parts.sources.snap_source.SnapSource._run_output",
+            side_effect=self._fake_unsquashfs,
+        )
+        Path(self._dest_dir, "meta").mkdir()
+        Path(self._dest_dir, "meta", "other").touch()
+        source = sources.SnapSource(
+            str(self._test_file), self._dest_dir, cache_dir=new_dir
+        )
+        source.provision(self._dest_dir, src=self._test_file, keep=True)
+
+        assert sorted(os.listdir(self._dest_dir / "meta")) == ["other"]
+        assert Path(self._dest_dir / "meta.basic/snap.yaml").is_file()
+        assert Path(self._dest_dir / "bin/hello").is_file()
+
+    def test_provision_processors(self, new_dir, mocker):
+        run = mocker.patch(
+            "craft_parts.sources.snap_source.SnapSource._run_output",
+            side_effect=self._fake_unsquashfs,
+        )
+        source = sources.SnapSource(
+            str(self._test_file), self._dest_dir, cache_dir=new_dir, processors=3
+        )
+        source.provision(self._dest_dir, src=self._test_file, keep=True)
+
+        assert run.call_args[0][0] == [
+            "unsquashfs",
+            "-force",
+            "-processors",
+            "3",
+            "-dest",
+            str(self._dest_dir),
+            self._test_file,
+        ]
+
+    def test_provision_again(self, new_dir, mocker):
+        run = mocker.patch(
+            "craft_parts.sources.snap_source.SnapSource._run_output",
+            side_effect=self._fake_unsquashfs,
+        )
+        Path(self._dest_dir, "meta.basic").mkdir()
+        Path(self._dest_dir, "meta.basic", "old").touch()
+        source = sources.SnapSource(
+            str(self._test_file), self._dest_dir, cache_dir=new_dir
+        )
+        source.provision(self._dest_dir, src=self._test_file, keep=True)
+
+        # extracted to a temporary directory, not over the previous contents
+        assert run.call_args[0][0][3] != str(self._dest_dir)
+
+        assert sorted(os.listdir(self._dest_dir / "meta.basic")) == [
+            "old",
+            "snap.yaml",
+        ]
+        assert Path(self._dest_dir / "meta").exists() is False
+
 
 @pytest.mark.usefixtures("new_dir")
 class TestGetName:
@@ -111,3 +193,30 @@ class TestGetName:
         with pytest.raises(sources.errors.InvalidSnapPackage) as raised:
             snap_source._get_snap_name("snap", ".")
         assert raised.value.snap_file == "snap"
+
+
+def test_provision_keeps_linked_files(new_dir, mocker):
+    def fake_unsquashfs(command):
+        dest = Path(command[command.index("-dest") + 1])
+        (dest / "meta").mkdir(parents=True)
+        (dest / "meta" / "snap.yaml").write_text("name: basic")
+        (dest / "hello").write_text("new")
+        return ""
+
+    mocker.patch(
+        "craft_parts.sources.snap_source.SnapSource._run_output",
+        side_effect=fake_unsquashfs,
+    )
+    snap_file = Path("test-snap.snap")
+    snap_file.touch()
+    dest_dir = Path("install")
+    dest_dir.mkdir()
+    Path("stage").mkdir()
+    Path("stage/hello").write_text("old")
+    os.link("stage/hello", dest_dir / "hello")
+
+    source = sources.SnapSource(str(snap_file), dest_dir, cache_dir=new_dir)
+    source.provision(dest_dir, src=snap_file, keep=True)
+
+    assert Path("stage/hello").read_text() == "old"
+    assert Path(dest_dir / "meta.basic/snap.yaml").is_file()
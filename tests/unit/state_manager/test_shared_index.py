@@ -0,0 +1,161 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2022 Canonical Ltd.
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License version 3 as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+from pathlib import Path
+
+import pytest
+
+from craft_parts.state_manager import SharedAreaIndex
+
+
+class TestSharedAreaIndex:
+    """Verify the shared area index."""
+
+    @pytest.fixture(autouse=True)
+    def setup_method_fixture(self, new_dir):
+        # pylint: disable=attribute-defined-outside-init
+        self._state_paths = {"p1": Path("state/p1"), "p2": Path("state/p2")}
+        Path("state").mkdir()
+        for path in self._state_paths.values():
+            path.touch()
+
+        self._index = SharedAreaIndex(Path("index/stage"))
+        self._index.add(
+            "p1",
+            files={"bin/foo", "bin/bar"},
+            directories={"bin"},
+            state_path=self._state_paths["p1"],
+        )
+        self._index.add(
+            "p2",
+            files={"bin/bar", "lib/baz"},
+            directories={"bin", "lib"},
+            state_path=self._state_paths["p2"],
+        )
+        # pylint: enable=attribute-defined-outside-init
+
+    def test_exclusive_entries(self):
+        assert self._index.get_exclusive_entries("p1", part_names=["p1", "p2"]) == (
+            {"bin/foo"},
+            set(),
+        )
+        assert self._index.get_exclusive_entries("p2", part_names=["p1", "p2"]) == (
+            {"lib/baz"},
+            {"lib"},
+        )
+
+    def test_exclusive_entries_ignore_unknown_parts(self):
+        assert self._index.get_exclusive_entries("p1", part_names=["p1"]) == (
+            {"bin/foo", "bin/bar"},
+            {"bin"},
+        )
+
+    def test_remove(self):
+        self._index.remove("p2")
+        assert self._index.get_exclusive_entries("p1", part_names=["p1", "p2"]) == (
+            {"bin/foo", "bin/bar"},
+            {"bin"},
+        )
+        assert self._index.get_exclusive_entries("p2", part_names=["p1", "p2"]) == (
+            set(),
+            set(),
+        )
+
+    def test_add_replaces_entries(self):
+        self._index.add(
+            "p1", files={"bin/qux"}, directories=set(), state_path=Path("state/p1")
+        )
+        assert self._index.get_exclusive_entries("p1", part_names=["p1", "p2"]) == (
+            {"bin/qux"},
+            set(),
+        )
+
+    def test_write_load(self):
+        self._index.write()
+
+        index = SharedAreaIndex.load(Path("index/stage"))
+        assert index.is_current(self._state_paths)
+        assert index.get_exclusive_entries("p2", part_names=["p1", "p2"]) == (
+            {"lib/baz"},
+            {"lib"},
+        )
+
+    def test_load_missing(self):
+        index = SharedAreaIndex.load(Path("index/stage"))
+        assert index.get_exclusive_entries("p1", part_names=["p1"]) == (set(), set())
+
+    def test_load_invalid(self):
+        self._index.write()
+        Path("index/stage/p1.json").write_text("{invalid")
+
+        index = SharedAreaIndex.load(Path("index/stage"))
+        assert index.get_exclusive_entries("p1", part_names=["p1"]) == (set(), set())
+        assert index.get_exclusive_entries("p2", part_names=["p1", "p2"]) == (
+            {"bin/bar", "lib/baz"},
+            {"bin", "lib"},
+        )
+        assert index.is_current(self._state_paths) is False
+
+    def test_write_per_part(self):
+        self._index.write()
+        assert sorted(os.listdir("index/stage")) == ["p1.json", "p2.json"]
+
+        # parts are updated without loading the entries of other parts
+        index = SharedAreaIndex(Path("index/stage"))
+        index.add(
+            "p1", files={"bin/qux"}, directories=set(), state_path=Path("state/p1")
+        )
+        p2_time = os.stat("index/stage/p2.json").st_mtime_ns
+        index.write()
+
+        assert os.stat("index/stage/p2.json").st_mtime_ns == p2_time
+        index = SharedAreaIndex.load(Path("index/stage"))
+        assert index.get_exclusive_entries("p1", part_names=["p1", "p2"]) == (
+            {"bin/qux"},
+            set(),
+        )
+        assert index.get_exclusive_entries("p2", part_names=["p1", "p2"]) == (
+            {"bin/bar", "lib/baz"},
+            {"bin", "lib"},
+        )
+
+    def test_write_removed(self):
+        self._index.write()
+
+        index = SharedAreaIndex.load(Path("index/stage"))
+        index.remove("p1")
+        index.write()
+
+        assert sorted(os.listdir("index/stage")) == ["p2.json"]
+
+    def test_is_current(self):
+        assert self._index.is_current(self._state_paths)
+        assert self._index.is_current({"p1": self._state_paths["p1"]})
+        assert self._index.is_current({"p3": Path("state/p3")})
+
+    def test_is_current_state_changed(self):
+        stat = self._state_paths["p1"].stat()
+        os.utime(self._state_paths["p1"], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        assert self._index.is_current(self._state_paths) is False
+
+    def test_is_current_state_removed(self):
+        self._state_paths["p2"].unlink()
+        assert self._index.is_current(self._state_paths) is False
+
+    def test_is_current_part_not_indexed(self):
+        Path("state/p3").touch()
+        assert self._index.is_current({"p3": Path("state/p3")}) is False
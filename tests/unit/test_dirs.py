@@ -30,6 +30,8 @@ def test_dirs(new_dir):
     assert dirs.overlay_work_dir == new_dir / "overlay/work"
     assert dirs.stage_dir == new_dir / "stage"
     assert dirs.prime_dir == new_dir / "prime"
+    assert dirs.log_dir == new_dir / ".logs"
+    assert dirs.profile_dir == new_dir / ".profile"
 
 
 def test_dirs_work_dir(new_dir):
@@ -43,6 +45,8 @@ def test_dirs_work_dir(new_dir):
     assert dirs.overlay_work_dir == new_dir / "foobar/overlay/work"
     assert dirs.stage_dir == new_dir / "foobar/stage"
     assert dirs.prime_dir == new_dir / "foobar/prime"
+    assert dirs.log_dir == new_dir / "foobar/.logs"
+    assert dirs.profile_dir == new_dir / "foobar/.profile"
 
 
 def test_dirs_work_dir_resolving():
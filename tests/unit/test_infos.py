@@ -220,6 +220,20 @@ def test_project_info_get_project_var_bad_name():
 def test_project_info_default():
     info = ProjectInfo(application_name="test", cache_dir=Path())
     assert info.parallel_build_count == 1
+    assert info.build_caches is False
+    assert info.build_cache_size is None
+
+
+def test_project_info_build_caches():
+    info = ProjectInfo(
+        application_name="test",
+        cache_dir=Path(),
+        build_caches=True,
+        build_cache_size=1024,
+    )
+    assert info.build_caches is True
+    assert info.build_cache_size == 1024
+    assert "build_caches" not in info.custom_args
 
 
 def test_project_info_cache_dir_resolving():
@@ -0,0 +1,267 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2022 Canonical Ltd.
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License version 3 as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import pstats
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from craft_parts import instrumentation
+
+
+class TestSpans:
+    """Verify the recording of spans."""
+
+    def test_not_recording(self):
+        assert instrumentation.get_recorder() is None
+        assert instrumentation.is_recording() is False
+
+        with instrumentation.span("phase"):
+            instrumentation.annotate(foo="bar")
+
+        with instrumentation.action_span("action"):
+            pass
+
+    def test_span(self):
+        with instrumentation.recording() as recorder:
+            assert instrumentation.get_recorder() is recorder
+            with instrumentation.span("outer", foo=1):
+                with instrumentation.span("inner"):
+                    instrumentation.annotate(bar=2)
+                instrumentation.annotate(baz=3)
+
+        assert instrumentation.get_recorder() is None
+
+        inner, outer = recorder.spans
+        assert inner.name == "inner"
+        assert inner.category == "phase"
+        assert inner.args == {"bar": 2}
+        assert outer.name == "outer"
+        assert outer.args == {"foo": 1, "baz": 3}
+        assert outer.start <= inner.start
+        assert outer.duration >= inner.duration
+
+    def test_span_error(self):
+        with instrumentation.recording() as recorder:
+            with pytest.raises(ValueError):
+                with instrumentation.span("phase"):
+                    raise ValueError()
+
+        assert [span.name for span in recorder.spans] == ["phase"]
+
+    def test_span_decorator(self):
+        @instrumentation.span("decorated")
+        def func():
+            return 42
+
+        with instrumentation.recording() as recorder:
+            assert func() == 42
+            assert func() == 42
+
+        assert [span.name for span in recorder.spans] == ["decorated", "decorated"]
+
+    def test_action_span(self):
+        with instrumentation.recording() as recorder:
+            with instrumentation.action_span("p1:build", action_type="run"):
+                subprocess.run(
+                    ["python3", "-c", "sum(range(10**6))"],
+                    check=True,
+                )
+                instrumentation.annotate(bytes_written=100)
+
+        (span,) = recorder.spans
+        assert span.name == "p1:build"
+        assert span.category == "action"
+        assert span.args["action_type"] == "run"
+        assert span.args["bytes_written"] == 100
+        assert span.args["child_cpu_time"] > 0
+        assert span.args["max_rss"] > 0
+
+
+class TestRecorder:
+    """Verify the recorded data output."""
+
+    @pytest.fixture
+    def recorder(self):
+        recorder = instrumentation.Recorder()
+        recorder.add(
+            instrumentation.Span(
+                name="p1:build",
+                category="action",
+                start=0.5,
+                duration=2.0,
+                thread_id=1,
+                args={
+                    "child_cpu_time": 1.5,
+                    "max_rss": 2**21,
+                    "bytes_written": 2**20,
+                },
+            )
+        )
+        for start in [0.1, 3.0]:
+            recorder.add(
+                instrumentation.Span(
+                    name="migrate",
+                    category="phase",
+                    start=start,
+                    duration=0.25,
+                    thread_id=1,
+                )
+            )
+        return recorder
+
+    def test_chrome_trace(self, new_dir, recorder):
+        recorder.write_chrome_trace(Path("trace.json"))
+        trace = json.loads(Path("trace.json").read_text())
+
+        assert trace["displayTimeUnit"] == "ms"
+        event = trace["traceEvents"][0]
+        assert event["name"] == "p1:build"
+        assert event["cat"] == "action"
+        assert event["ph"] == "X"
+        assert event["ts"] == 500000
+        assert event["dur"] == 2000000
+        assert event["tid"] == 1
+        assert event["args"]["bytes_written"] == 2**20
+        assert len(trace["traceEvents"]) == 3
+
+    def test_summary(self, recorder):
+        lines = recorder.summary().splitlines()
+
+        assert lines[0].split() == [
+            "Action",
+            "Wall",
+            "(s)",
+            "CPU",
+            "(s)",
+            "Max",
+            "RSS",
+            "(MiB)",
+            "Written",
+            "(MiB)",
+        ]
+        assert lines[1].split() == ["p1:build", "2.000", "1.500", "2.0", "1.0"]
+        assert lines[2] == ""
+        assert lines[3].split() == ["Phase", "Count", "Total", "(s)"]
+        assert lines[4].split() == ["migrate", "2", "0.500"]
+
+
+class TestProfiler:
+    """Verify the profiling of spans."""
+
+    @pytest.fixture
+    def profiler(self, new_dir):
+        profiler = instrumentation.start_profiling(Path(new_dir, "profile"))
+        yield profiler
+        instrumentation.stop_profiling()
+
+    def test_not_profiling(self):
+        assert instrumentation.get_profiler() is None
+        assert instrumentation.is_profiling() is False
+
+    def test_profile_spans(self, profiler):
+        assert instrumentation.get_profiler() is profiler
+        assert instrumentation.is_profiling() is True
+        assert instrumentation.is_recording() is False
+
+        with instrumentation.span("plan"):
+            with instrumentation.span("load state"):
+                sum(range(10**5))
+        with instrumentation.action_span("p1:build"):
+            sorted(range(10**5), reverse=True)
+
+        assert sorted(path.name for path in profiler.profile_dir.iterdir()) == [
+            "001-plan.pstats",
+            "002-p1-build.pstats",
+            "profile.collapsed",
+        ]
+
+        stats = pstats.Stats(str(profiler.profile_dir / "002-p1-build.pstats"))
+        assert any(
+            name == "<built-in method builtins.sorted>" for *_, name in stats.stats
+        )
+
+        lines = profiler.collapsed_stacks_path.read_text().splitlines()
+        roots = {line.split(";", 1)[0] for line in lines}
+        assert roots == {"plan", "p1:build"}
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            assert int(count) > 0
+
+    def test_profile_and_record(self, profiler):
+        with instrumentation.recording() as recorder:
+            with instrumentation.span("plan", foo="bar"):
+                pass
+
+        assert [span.name for span in recorder.spans] == ["plan"]
+        assert (profiler.profile_dir / "001-plan.pstats").is_file()
+
+    def test_profiling_context(self, new_dir):
+        profiler = instrumentation.Profiler(Path(new_dir, "profile"))
+
+        with instrumentation.profiling(profiler):
+            assert instrumentation.get_profiler() is profiler
+            with instrumentation.profiling(None):
+                assert instrumentation.get_profiler() is profiler
+            with instrumentation.span("plan"):
+                pass
+
+        assert instrumentation.is_profiling() is False
+        assert (profiler.profile_dir / "001-plan.pstats").is_file()
+
+    def test_profiling_context_restores_profiler(self, new_dir, profiler):
+        other = instrumentation.Profiler(Path(new_dir, "other"))
+
+        with pytest.raises(RuntimeError), instrumentation.profiling(other):
+            assert instrumentation.get_profiler() is other
+            raise RuntimeError
+
+        assert instrumentation.get_profiler() is profiler
+
+    def test_profiler_removes_old_data(self, new_dir):
+        profile_dir = Path(new_dir, "profile")
+        profile_dir.mkdir()
+        Path(profile_dir, "001-old.pstats").touch()
+
+        instrumentation.Profiler(profile_dir)
+        assert profile_dir.exists() is False
+
+
+def test_collapse_stacks():
+    main = ("main.py", 1, "main")
+    func_a = ("a.py", 10, "func_a")
+    func_b = ("b.py", 20, "func_b")
+    builtin = ("~", 0, "<built-in method time.sleep>")
+
+    # (primitive calls, calls, own time, cumulative time, callers)
+    stats = {
+        main: (1, 1, 1.0, 10.0, {}),
+        func_a: (1, 1, 2.0, 6.0, {main: (1, 1, 2.0, 6.0)}),
+        func_b: (2, 2, 3.0, 3.0, {main: (1, 1, 1.5, 1.5), func_a: (1, 1, 1.5, 1.5)}),
+        builtin: (1, 1, 2.5, 2.5, {func_a: (1, 1, 2.5, 2.5)}),
+    }
+
+    stacks = instrumentation._collapse_stacks(stats)  # type: ignore
+
+    assert stacks == {
+        ("main (main.py:1)",): 1.0,
+        ("main (main.py:1)", "func_a (a.py:10)"): 2.0,
+        ("main (main.py:1)", "func_b (b.py:20)"): 1.5,
+        ("main (main.py:1)", "func_a (a.py:10)", "func_b (b.py:20)"): 1.5,
+        ("main (main.py:1)", "func_a (a.py:10)", "<built-in method time.sleep>"): 2.5,
+    }
@@ -25,10 +25,11 @@ from unittest.mock import ANY, call
 import pytest
 import yaml
 
-from craft_parts import errors
+from craft_parts import errors, instrumentation
 from craft_parts.lifecycle_manager import LifecycleManager
 from craft_parts.plugins import nil_plugin
 from craft_parts.state_manager import states
+from craft_parts.steps import Step
 
 
 class TestLifecycleManager:
@@ -160,9 +161,75 @@ class TestLifecycleManager:
                 extra_build_snaps=["snap1", "snap2"],
                 base_layer_dir=None,
                 base_layer_hash=None,
+                fast_clean=False,
+                persistent_shells=False,
+                part_logs=False,
             )
         ]
 
+    @pytest.mark.parametrize(
+        "profile,env_value,enabled",
+        [
+            (False, None, False),
+            (True, None, True),
+            (False, "1", True),
+            (False, "0", False),
+        ],
+    )
+    def test_profile(self, new_dir, monkeypatch, profile, env_value, enabled):
+        if env_value is None:
+            monkeypatch.delenv("CRAFT_PARTS_PROFILE", raising=False)
+        else:
+            monkeypatch.setenv("CRAFT_PARTS_PROFILE", env_value)
+
+        lf = LifecycleManager(
+            self._data,
+            application_name="test_manager",
+            cache_dir=new_dir,
+            profile=profile,
+        )
+
+        # state loading is profiled when the sequencer is created
+        stats_file = Path(new_dir, ".profile", "001-load-state.pstats")
+        assert stats_file.is_file() is enabled
+
+        # the profiler is only active while the manager is in use
+        assert instrumentation.is_profiling() is False
+
+        lf.plan(Step.PULL)
+        stats_file = Path(new_dir, ".profile", "002-plan.pstats")
+        assert stats_file.is_file() is enabled
+        assert instrumentation.is_profiling() is False
+
+    def test_profile_execution_context(self, new_dir, mocker):
+        mocker.patch("craft_parts.executor.Executor.prologue")
+        mocker.patch("craft_parts.executor.Executor.epilogue")
+        lf = LifecycleManager(
+            self._data,
+            application_name="test_manager",
+            cache_dir=new_dir,
+            profile=True,
+        )
+
+        with lf.action_executor():
+            assert instrumentation.is_profiling() is True
+
+        assert instrumentation.is_profiling() is False
+
+    def test_profile_execution_context_error(self, new_dir, mocker):
+        mocker.patch("craft_parts.executor.Executor.prologue", side_effect=RuntimeError)
+        lf = LifecycleManager(
+            self._data,
+            application_name="test_manager",
+            cache_dir=new_dir,
+            profile=True,
+        )
+
+        with pytest.raises(RuntimeError), lf.action_executor():
+            pass
+
+        assert instrumentation.is_profiling() is False
+
     def test_get_primed_stage_packages(self, new_dir):
         lf = LifecycleManager(
             self._data,
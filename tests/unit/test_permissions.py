@@ -14,6 +14,7 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import fnmatch
 import os
 
 import pydantic
@@ -21,6 +22,7 @@ import pytest
 
 from craft_parts.permissions import (
     Permissions,
+    PermissionsTable,
     apply_permissions,
     filter_permissions,
     permissions_are_compatible,
@@ -96,6 +98,73 @@ def test_filter_permissions():
     assert filter_permissions("etc/file1.txt", permissions) == [p1, p2, p3]
 
 
+@pytest.mark.parametrize(
+    "path", ["etc", "etc/file2.bin", "etc/file1.txt", "etc/sub/file1.txt", "usr"]
+)
+def test_permissions_table_filter(path):
+    permissions = [
+        Permissions(),
+        Permissions(path="etc/*"),
+        Permissions(path="etc/file1.txt"),
+        Permissions(path="*/file1.*"),
+        Permissions(path="[ef]tc"),
+    ]
+
+    table = PermissionsTable(permissions)
+
+    assert table.filter(path) == filter_permissions(path, permissions)
+    assert table.filter(path) is table.filter(path)
+
+
+def test_permissions_table_filter_multiple_wildcards():
+    permissions = [Permissions(path="*a*b"), Permissions(path="usr/*")]
+    table = PermissionsTable(permissions)
+
+    assert table.filter("usr/x") == [permissions[1]]
+    assert table.filter("usr/ab") == permissions
+
+
+def test_permissions_table_filter_pattern_groups(mocker):
+    # fnmatch.translate() emits named groups for "*a*b" on Python 3.9 and 3.10
+    mocker.patch(
+        "craft_parts.permissions.translate",
+        side_effect=lambda pattern: (
+            r"(?s:(?=(?P<g0>.*?a))(?P=g0).*b)\Z"
+            if pattern == "*a*b"
+            else fnmatch.translate(pattern)
+        ),
+    )
+    permissions = [Permissions(path="*a*b"), Permissions(path="usr/*")]
+    table = PermissionsTable(permissions)
+
+    assert table.filter("usr/x") == [permissions[1]]
+    assert table.filter("usr/ab") == permissions
+    assert table.filter("etc") == []
+
+
+def test_permissions_table_empty():
+    table = PermissionsTable(None)
+
+    assert not table
+    assert table.filter("etc") == []
+    assert table.squash("etc") is None
+
+
+def test_permissions_table_squash():
+    table = PermissionsTable(
+        [
+            Permissions(path="etc/*", mode="755"),
+            Permissions(path="etc/*.txt", owner=1111, group=2222),
+        ]
+    )
+
+    assert table.squash("usr") is None
+    assert table.squash("etc/file.bin") == Permissions(mode="755")
+    assert table.squash("etc/file.txt") == Permissions(
+        mode="755", owner=1111, group=2222
+    )
+
+
 def test_apply_permissions(tmp_path, mock_chown):
     target = tmp_path / "a.txt"
     target.touch()
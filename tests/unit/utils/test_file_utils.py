@@ -15,6 +15,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import shutil
 import stat
 from pathlib import Path
 
@@ -114,6 +115,137 @@ class TestLinkOrCopyTree:
         assert os.readlink(link) == "bar"
 
 
+class TestSyncTree:
+    """Verify incremental tree synchronization."""
+
+    def setup_method(self):
+        Path("src/dir").mkdir(parents=True)
+        Path("src/foo").write_text("foo")
+        Path("src/dir/bar").write_text("bar")
+        Path("src/link").symlink_to("foo")
+        self.manifest = Path("manifest")
+
+    def test_sync_new_tree(self):
+        file_utils.sync_tree("src", "dst", manifest=self.manifest)
+
+        assert Path("dst/foo").read_text() == "foo"
+        assert Path("dst/dir/bar").read_text() == "bar"
+        assert os.readlink("dst/link") == "foo"
+        assert os.path.samefile("src/foo", "dst/foo") is False
+        assert self.manifest.exists()
+
+    def test_sync_keeps_unchanged_files(self, mocker):
+        file_utils.sync_tree("src", "dst", manifest=self.manifest)
+        Path("dst/artifact.o").write_text("object")
+
+        link = mocker.spy(file_utils, "clone_or_copy")
+        file_utils.sync_tree("src", "dst", manifest=self.manifest)
+
+        link.assert_not_called()
+        assert Path("dst/artifact.o").read_text() == "object"
+
+    def test_sync_changed_files(self, mocker):
+        file_utils.sync_tree("src", "dst", manifest=self.manifest)
+
+        # replace a source file, and modify a synchronized file in place
+        Path("src/foo").unlink()
+        Path("src/foo").write_text("new foo")
+        Path("dst/dir/bar").unlink()
+        Path("dst/dir/bar").write_text("patched")
+
+        link = mocker.spy(file_utils, "clone_or_copy")
+        file_utils.sync_tree("src", "dst", manifest=self.manifest)
+
+        assert sorted(x.args[1] for x in link.call_args_list) == [
+            "dst/dir/bar",
+            "dst/foo",
+        ]
+        assert Path("dst/foo").read_text() == "new foo"
+        assert Path("dst/dir/bar").read_text() == "bar"
+
+    def test_sync_write_in_place(self):
+        file_utils.sync_tree("src", "dst", manifest=self.manifest)
+
+        with open("dst/foo", "a") as file:
+            file.write(" appended")
+        Path("dst/dir/bar").write_text("overwritten")
+
+        assert Path("src/foo").read_text() == "foo"
+        assert Path("src/dir/bar").read_text() == "bar"
+
+        file_utils.sync_tree("src", "dst", manifest=self.manifest)
+
+        assert Path("dst/foo").read_text() == "foo"
+        assert Path("dst/dir/bar").read_text() == "bar"
+
+    def test_sync_breaks_existing_links(self):
+        file_utils.sync_tree("src", "dst", manifest=self.manifest)
+
+        # destination files hard-linked to the source are copied again
+        Path("dst/foo").unlink()
+        os.link("src/foo", "dst/foo")
+        file_utils.sync_tree("src", "dst", manifest=self.manifest)
+        file_utils.sync_tree("src", "dst", manifest=self.manifest)
+
+        assert os.path.samefile("src/foo", "dst/foo") is False
+        assert Path("dst/foo").read_text() == "foo"
+
+    def test_sync_removed_entries(self):
+        file_utils.sync_tree("src", "dst", manifest=self.manifest)
+        Path("dst/dir/bar.o").write_text("object")
+        Path("src/dir/bar").unlink()
+        Path("src/link").unlink()
+
+        file_utils.sync_tree("src", "dst", manifest=self.manifest)
+
+        assert Path("dst/dir/bar").exists() is False
+        assert Path("dst/link").is_symlink() is False
+        assert Path("dst/dir/bar.o").exists()
+
+        Path("dst/dir/bar.o").unlink()
+        Path("src/dir").rmdir()
+        file_utils.sync_tree("src", "dst", manifest=self.manifest)
+
+        assert Path("dst/dir").exists() is False
+        assert Path("dst/foo").exists()
+
+    def test_sync_replaced_entry_type(self):
+        file_utils.sync_tree("src", "dst", manifest=self.manifest)
+        Path("src/dir/bar").unlink()
+        Path("src/dir").rmdir()
+        Path("src/dir").write_text("now a file")
+        Path("src/foo").unlink()
+        Path("src/foo/baz").mkdir(parents=True)
+
+        file_utils.sync_tree("src", "dst", manifest=self.manifest)
+
+        assert Path("dst/dir").read_text() == "now a file"
+        assert Path("dst/foo/baz").is_dir()
+
+    def test_sync_without_manifest(self):
+        Path("dst").mkdir()
+        Path("dst/foo").write_text("stale")
+
+        file_utils.sync_tree("src", "dst", manifest=self.manifest)
+
+        assert Path("dst/foo").read_text() == "foo"
+
+    def test_sync_missing_destination(self):
+        file_utils.sync_tree("src", "dst", manifest=self.manifest)
+        shutil.rmtree("dst")
+
+        file_utils.sync_tree("src", "dst", manifest=self.manifest)
+
+        assert Path("dst/foo").read_text() == "foo"
+        assert Path("dst/dir/bar").read_text() == "bar"
+
+    def test_sync_source_not_directory(self):
+        Path("file").touch()
+
+        with pytest.raises(errors.CopyTreeError):
+            file_utils.sync_tree("file", "dst", manifest=self.manifest)
+
+
 class TestLinkOrCopy:
     """Verify func:`link_or_copy` usage scenarios."""
 
@@ -185,7 +317,27 @@ class TestCopy:
         assert raised.value.name == "2"
 
 
-# TODO: test NonBlockingRWFifo
+class TestNonBlockingRWFifo:
+    """Verify the non-blocking FIFO."""
+
+    def test_read_write(self, tmp_path):
+        fifo = file_utils.NonBlockingRWFifo(str(tmp_path / "fifo"))
+        try:
+            assert fifo.read() == ""
+            fifo.write("h\u00e9llo ")
+            fifo.write("world")
+            assert fifo.read() == "h\u00e9llo world"
+            assert fifo.read() == ""
+        finally:
+            fifo.close()
+
+    def test_fileno(self, tmp_path):
+        fifo = file_utils.NonBlockingRWFifo(str(tmp_path / "fifo"))
+        try:
+            fifo.write("data")
+            assert os.read(fifo.fileno(), 10) == b"data"
+        finally:
+            fifo.close()
 
 
 def test_create_similar_directory_permissions(tmp_path, mock_chown):
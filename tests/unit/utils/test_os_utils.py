@@ -216,6 +216,50 @@ class TestGetPaths:
         ]
 
 
+class TestFindExistingPaths:
+    """Verify existing path discovery."""
+
+    def test_find_existing_paths(self, new_dir):
+        root = Path(new_dir)
+        Path("usr/lib").mkdir(parents=True)
+        Path("usr/bin").touch()
+        Path("lib").symlink_to("usr/lib")
+        Path("sbin").symlink_to("missing")
+
+        paths = [
+            root / "usr/lib",
+            root / "usr/bin",
+            root / "usr/include",
+            root / "lib",
+            root / "lib/pkgconfig",
+            root / "sbin",
+            root / "usr/bin/foo",
+            root / "share/foo/bar",
+        ]
+        assert os_utils.find_existing_paths(paths, root=root) == {
+            root / "usr/lib",
+            root / "usr/bin",
+            root / "lib",
+        }
+
+    def test_find_existing_paths_missing_root(self):
+        root = Path("/invalid")
+        paths = [root / "usr/lib", root / "bin"]
+
+        assert os_utils.find_existing_paths(paths, root=root) == set()
+
+    def test_find_existing_paths_lists_once(self, mocker, new_dir):
+        root = Path(new_dir)
+        Path("usr/lib/pkgconfig").mkdir(parents=True)
+        scandir = mocker.spy(os_utils.os, "scandir")
+
+        paths = os_utils.get_pkg_config_paths(root=root, arch_triplet="x86_64")
+
+        assert paths == [f"{root}/usr/lib/pkgconfig"]
+        listed = [call.args[0] for call in scandir.call_args_list]
+        assert sorted(listed) == [root, root / "usr", root / "usr/lib"]
+
+
 class TestTerminal:
     """Tests for terminal-related utilities."""
 
@@ -235,6 +279,48 @@ class TestTerminal:
         assert os_utils.is_dumb_terminal() == result
 
 
+class TestProcessRun:
+    """Verify the execution of commands with logged output."""
+
+    def test_process_run(self):
+        lines = []
+        os_utils.process_run(
+            [
+                "bash",
+                "-c",
+                "printf 'a\\n  b  \\r\\nc'; sleep 0.1; printf 'd\\n'; echo e >&2",
+            ],
+            lines.append,
+        )
+        assert lines == [":: a", ":: b", ":: cd", ":: e"]
+
+    def test_process_run_incomplete_line(self):
+        lines = []
+        os_utils.process_run(["printf", "a\\nb"], lines.append)
+        assert lines == [":: a", ":: b"]
+
+    def test_process_run_line_boundaries(self, mocker):
+        mocker.patch("locale.getpreferredencoding", return_value="utf-8")
+        lines = []
+        os_utils.process_run(
+            [
+                "bash",
+                "-c",
+                "printf 'a\\fb\\nc\\xc2\\x85d\\nd\\r'; sleep 0.1; "
+                "printf '\\ne\\r\\rf\\r'",
+            ],
+            lines.append,
+        )
+        assert lines == [":: a\x0cb", ":: c\x85d", ":: d", ":: e", ":: ", ":: f"]
+
+    def test_process_run_error(self):
+        lines = []
+        with pytest.raises(subprocess.CalledProcessError) as raised:
+            os_utils.process_run(["bash", "-c", "echo a; exit 3"], lines.append)
+        assert raised.value.returncode == 3
+        assert lines == [":: a"]
+
+
 @pytest.mark.usefixtures("new_dir")
 class TestOsRelease:
     """Verify os-release data retrieval."""
@@ -409,6 +495,16 @@ class TestMount:
             ["fuse-overlayfs", "some", "args", "/mountpoint"]
         )
 
+    def test_mount_kernel_overlayfs(self, mocker):
+        mock_run = mocker.patch("subprocess.run")
+        os_utils.mount_kernel_overlayfs("/mountpoint", "some", "args")
+        mock_run.assert_called_once_with(
+            ["/bin/mount", "-toverlay", "some", "args", "overlay", "/mountpoint"],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+
     def test_umount(self, mocker):
         mock_call = mocker.patch("subprocess.check_call")
         os_utils.umount("/mountpoint", "some", "args")